@@ -1,11 +1,32 @@
 from django_filters.rest_framework import CharFilter, FilterSet
+from rest_framework.filters import SearchFilter
 
 from .models import BlogPost
+from .search import get_search_backend
+
+
+def rank_by_search(queryset, query):
+    """
+    Restrict ``queryset`` to the posts matching ``query``, best match first.
+    Unlike the ``search`` action this is not capped: every match is kept
+    for the other filters and the pagination to see.
+    """
+    return get_search_backend().filter(queryset, query)
+
+
+class BlogSearchFilter(SearchFilter):
+    """``?search=`` answered by the blog full-text index instead of LIKE scans."""
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "").strip()
+        if not query:
+            return queryset
+        return rank_by_search(queryset, query)
 
 
 class BlogFilter(FilterSet):
     title = CharFilter(lookup_expr="icontains")
-    description = CharFilter(lookup_expr="exact")
+    description = CharFilter(method="filter_description")
     category_id = CharFilter(field_name="category__id", lookup_expr="exact")
     category_name = CharFilter(
         field_name="category__category_name", lookup_expr="icontains"
@@ -14,3 +35,6 @@ class BlogFilter(FilterSet):
     class Meta:
         model = BlogPost
         fields = ["title", "description", "category_id", "category_name"]
+
+    def filter_description(self, queryset, name, value):
+        return rank_by_search(queryset, value)
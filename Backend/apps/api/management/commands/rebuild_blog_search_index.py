@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.api.models import BlogPost
+from apps.api.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the blog full-text search index from the BlogPost table."
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        posts = BlogPost.objects.select_related("category").iterator(chunk_size=500)
+        backend.rebuild(posts)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Indexed {BlogPost.objects.count()} posts "
+                f"with {type(backend).__name__}."
+            )
+        )
@@ -1,9 +1,10 @@
+from apps.common.models import RenderedRichTextModel
+from apps.common.storage import content_storage
 from ckeditor_uploader.fields import RichTextUploadingField
 from django.contrib.auth import get_user_model
 from django.db import models
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from pyexpat import model
 
 
 class Category(models.Model):
@@ -19,7 +20,7 @@ class Category(models.Model):
         verbose_name_plural = "Categories"
 
 
-class Order(models.Model):
+class Order(RenderedRichTextModel):
     Customer_name = models.CharField(_("Customer Name :"), max_length=255)
     order_name = models.CharField(_("Order Name : "), max_length=255)
     description = RichTextUploadingField()
@@ -31,7 +32,7 @@ class Order(models.Model):
         return self.Customer_name
 
 
-class Reception(models.Model):
+class Reception(RenderedRichTextModel):
     User = get_user_model()
     designer = models.ForeignKey(User, on_delete=models.CASCADE)
     customer_name = models.CharField(_("Customer Name"), max_length=255)
@@ -62,10 +63,12 @@ class PostCategory(models.Model):
         return self.category_name
 
 
-class BlogPost(models.Model):
+class BlogPost(RenderedRichTextModel):
     title = models.CharField(max_length=255)
     category = models.ForeignKey(PostCategory, on_delete=models.CASCADE)
-    image = models.ImageField(upload_to="media/blog/", null=True, blank=True)
+    image = models.ImageField(
+        upload_to="media/blog/", storage=content_storage, null=True, blank=True
+    )
     description = RichTextUploadingField()
     created_at = models.DateField(_("Blog Post Created Date"), auto_now_add=True)
 
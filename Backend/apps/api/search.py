@@ -0,0 +1,198 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection, connections
+from django.db.models import Case, IntegerField, Q, When
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+
+from apps.common.richtext import html_to_text
+
+# Highlight markers placed by the index; swapped for <mark> after escaping
+HIGHLIGHT_START, HIGHLIGHT_END = "\x02", "\x03"
+
+
+def render_snippet(snippet):
+    return (
+        escape(snippet)
+        .replace(HIGHLIGHT_START, "<mark>")
+        .replace(HIGHLIGHT_END, "</mark>")
+    )
+
+
+@dataclass
+class SearchHit:
+    post_id: int
+    rank: float
+    snippet: str
+
+
+class BlogSearchBackend:
+    """Interface of a blog full-text index; see ``BLOG_SEARCH_BACKEND``."""
+
+    def install(self, using="default"):
+        """Create whatever storage the index needs; run after ``migrate``."""
+
+    def index(self, post):
+        raise NotImplementedError
+
+    def remove(self, post_id):
+        raise NotImplementedError
+
+    def search(self, query, limit=100):
+        """Best matches first, as ``SearchHit`` objects (all of them if no limit)."""
+        raise NotImplementedError
+
+    def filter(self, queryset, query):
+        """Restrict ``queryset`` to every post matching ``query``, best first."""
+        ids = [hit.post_id for hit in self.search(query, limit=None)]
+        if not ids:
+            return queryset.none()
+        ranking = Case(
+            *[When(pk=pk, then=position) for position, pk in enumerate(ids)],
+            output_field=IntegerField(),
+        )
+        return queryset.filter(pk__in=ids).order_by(ranking)
+
+    def rebuild(self, posts):
+        for post in posts:
+            self.index(post)
+
+
+class SQLiteFTS5Backend(BlogSearchBackend):
+    """
+    SQLite FTS5 index over title, stripped description and category name,
+    ranked with BM25 (title matches weigh the most).
+    """
+
+    table = "api_blogpost_fts"
+
+    def install(self, using="default"):
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+                "title, body, category, tokenize='unicode61 remove_diacritics 2')"
+            )
+
+    def index(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [post.pk])
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, title, body, category) "
+                "VALUES (%s, %s, %s, %s)",
+                [
+                    post.pk,
+                    post.title,
+                    html_to_text(post.description),
+                    post.category.category_name,
+                ],
+            )
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [post_id])
+
+    def rebuild(self, posts):
+        self.install()
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+        super().rebuild(posts)
+
+    def match(self, query):
+        # Quote every term so user input can never be FTS5 syntax; the
+        # trailing * gives prefix matching while typing.
+        terms = re.findall(r"\w+", query)
+        return " ".join(f'"{term}"*' for term in terms)
+
+    def search(self, query, limit=100):
+        match = self.match(query)
+        if not match:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, bm25({self.table}, 10.0, 1.0, 2.0) AS rank, "
+                f"snippet({self.table}, 1, %s, %s, '…', 16) "
+                f"FROM {self.table} WHERE {self.table} MATCH %s "
+                "ORDER BY rank LIMIT %s",
+                # LIMIT -1 is no limit
+                [HIGHLIGHT_START, HIGHLIGHT_END, match, -1 if limit is None else limit],
+            )
+            return [
+                SearchHit(post_id, rank, render_snippet(snippet))
+                for post_id, rank, snippet in cursor.fetchall()
+            ]
+
+    def filter(self, queryset, query):
+        # Matched and ranked inside the post query, so no id list is built
+        match = self.match(query)
+        if not match:
+            return queryset.none()
+        posts = queryset.model._meta.db_table
+        rank = RawSQL(
+            f"SELECT bm25({self.table}, 10.0, 1.0, 2.0) FROM {self.table} "
+            f"WHERE {self.table} MATCH %s AND rowid = {posts}.id",
+            [match],
+        )
+        return (
+            queryset.filter(
+                pk__in=RawSQL(
+                    f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s",
+                    [match],
+                )
+            )
+            .annotate(search_rank=rank)
+            .order_by("search_rank")
+        )
+
+
+class DatabaseSearchBackend(BlogSearchBackend):
+    """
+    Index-less fallback for databases without a configured full-text backend:
+    plain ``icontains`` over title and description.
+    """
+
+    def index(self, post):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def matching(self, queryset, query):
+        return queryset.filter(
+            Q(title__icontains=query) | Q(description__icontains=query)
+        ).order_by("-created_at")
+
+    def search(self, query, limit=100):
+        from .models import BlogPost
+
+        query = query.strip()
+        if not query:
+            return []
+        posts = self.matching(BlogPost.objects.all(), query)[:limit]
+
+        hits = []
+        for post in posts:
+            text = html_to_text(post.description)
+            start = max(text.lower().find(query.lower()), 0)
+            snippet = text[max(start - 60, 0) : start + len(query) + 60]
+            hits.append(SearchHit(post.pk, 0.0, escape(snippet)))
+        return hits
+
+    def filter(self, queryset, query):
+        query = query.strip()
+        if not query:
+            return queryset.none()
+        return self.matching(queryset, query)
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    path = getattr(settings, "BLOG_SEARCH_BACKEND", None)
+    if path:
+        return import_string(path)()
+    if connection.vendor == "sqlite":
+        return SQLiteFTS5Backend()
+    return DatabaseSearchBackend()
@@ -1,4 +1,5 @@
 from apps.api.models import BlogPost, Category, Order, PostCategory, Reception
+from apps.common.serializers import RenderedRichTextSerializerMixin
 from apps.users.serializers import UserSerializer
 from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
@@ -18,7 +19,7 @@ class OrderSerializer(serializers.ModelSerializer):
         fields = ["id", "Customer_name", "order_name"]
 
 
-class ReceptionSerializer(serializers.ModelSerializer):
+class ReceptionSerializer(RenderedRichTextSerializerMixin, serializers.ModelSerializer):
     category_id = serializers.PrimaryKeyRelatedField(
         queryset=Category.objects.all(), source="category"
     )
@@ -109,7 +110,7 @@ class PostCategorySerializer(serializers.ModelSerializer):
         fields = ["id", "category_name", "created_at"]
 
 
-class BlogPostSerializer(serializers.ModelSerializer):
+class BlogPostSerializer(RenderedRichTextSerializerMixin, serializers.ModelSerializer):
     category = serializers.PrimaryKeyRelatedField(queryset=PostCategory.objects.all())
 
     class Meta:
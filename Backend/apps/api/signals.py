@@ -0,0 +1,37 @@
+from django.db.models.signals import post_delete, post_migrate, post_save
+
+from .models import BlogPost, PostCategory
+from .search import get_search_backend
+
+
+def install_search_index(sender, using="default", **kwargs):
+    if sender.name == "apps.api":
+        get_search_backend().install(using)
+
+
+def index_blog_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        get_search_backend().index(instance)
+
+
+def unindex_blog_post(sender, instance, **kwargs):
+    get_search_backend().remove(instance.pk)
+
+
+def reindex_category_posts(sender, instance, created=False, raw=False, **kwargs):
+    # The category name is indexed with every post; new categories have none.
+    if created or raw:
+        return
+    backend = get_search_backend()
+    for post in instance.blogpost_set.select_related("category"):
+        backend.index(post)
+
+
+post_save.connect(index_blog_post, sender=BlogPost, dispatch_uid="blog_search_index")
+post_delete.connect(
+    unindex_blog_post, sender=BlogPost, dispatch_uid="blog_search_unindex"
+)
+post_save.connect(
+    reindex_category_posts, sender=PostCategory, dispatch_uid="blog_search_category"
+)
+post_migrate.connect(install_search_index, dispatch_uid="blog_search_install")
@@ -1,3 +1,132 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from io import BytesIO
 
-# Create your tests here.
+from apps.users.tasks import create_or_update_blog_post
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from .models import BlogPost, PostCategory
+from .search import get_search_backend
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class TestCreateOrUpdateBlogPost(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def test_existing_post_and_image_are_reused(self):
+        """the task updates the post in place and keeps its stored image"""
+        buffer = BytesIO()
+        Image.new("RGB", (4, 4)).save(buffer, format="PNG")
+        category = PostCategory.objects.create(category_name="News")
+        post = BlogPost.objects.create(
+            title="Hello",
+            category=category,
+            description="<p>Body</p>",
+            image=ContentFile(buffer.getvalue(), name="cover.png"),
+        )
+
+        post_id = create_or_update_blog_post(
+            {
+                "id": post.id,
+                "title": "Hello again",
+                "category": category.id,
+                "image": post.image.name,
+                "description": "<p>Body</p>",
+            }
+        )
+
+        self.assertEqual(post_id, post.id)
+        self.assertEqual(BlogPost.objects.count(), 1)
+        post.refresh_from_db()
+        self.assertEqual(post.title, "Hello again")
+        self.assertTrue(post.image.name.startswith("blobs/"))
+
+
+class TestBlogSearch(TestCase):
+    def setUp(self):
+        self.news = PostCategory.objects.create(category_name="News")
+        self.printing = BlogPost.objects.create(
+            title="Offset printing",
+            category=self.news,
+            description="<p>Large <b>offset</b> runs &amp; banners</p>",
+        )
+        self.design = BlogPost.objects.create(
+            title="Logo design",
+            category=self.news,
+            description="<p>How we print <script>x</script> brand books</p>",
+        )
+
+    def search_ids(self, query):
+        return [hit.post_id for hit in get_search_backend().search(query)]
+
+    def test_index_follows_create_update_and_delete(self):
+        """posts are indexed on save, reindexed on edit and dropped on delete"""
+        self.assertEqual(self.search_ids("banners"), [self.printing.id])
+
+        self.printing.description = "<p>Posters</p>"
+        self.printing.save()
+        self.assertEqual(self.search_ids("banners"), [])
+        self.assertEqual(self.search_ids("poster"), [self.printing.id])
+
+        self.news.category_name = "Announcements"
+        self.news.save()
+        self.assertCountEqual(
+            self.search_ids("announcements"), [self.printing.id, self.design.id]
+        )
+
+        self.design.delete()
+        self.assertEqual(self.search_ids("announcements"), [self.printing.id])
+
+    def test_ranked_results_with_escaped_snippets(self):
+        """title matches rank first and snippets only highlight indexed text"""
+        response = self.client.get(reverse("blog-post-search"), {"q": "print"})
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()
+        self.assertEqual(
+            [result["id"] for result in results], [self.printing.id, self.design.id]
+        )
+        self.assertIn("<mark>print</mark>", results[1]["snippet"])
+        self.assertNotIn("<script>", results[1]["snippet"])
+
+    def test_search_param_uses_index(self):
+        """?search= filters through the index, ignoring FTS syntax in input"""
+        url = reverse("blog-post-list")
+
+        response = self.client.get(url, {"search": '"offset*('})
+        self.assertEqual([post["id"] for post in response.json()], [self.printing.id])
+
+        response = self.client.get(url, {"description": "brand"})
+        self.assertEqual([post["id"] for post in response.json()], [self.design.id])
+
+    def test_search_param_keeps_every_match(self):
+        """?search= is not capped by the search action's limit before filtering"""
+        events = PostCategory.objects.create(category_name="Events")
+        for number in range(110):
+            BlogPost.objects.create(
+                title=f"Banner {number}",
+                category=self.news if number % 2 else events,
+                description="<p>Banners</p>",
+            )
+        url = reverse("blog-post-list")
+
+        self.assertEqual(len(get_search_backend().search("banner")), 100)
+        response = self.client.get(url, {"search": "banner"})
+        self.assertEqual(len(response.json()), 111)
+        response = self.client.get(
+            url, {"search": "banner", "category_id": events.pk}
+        )
+        self.assertEqual(len(response.json()), 55)
+
+        response = self.client.get(url, {"search": "print"})
+        self.assertEqual(
+            [post["id"] for post in response.json()], [self.printing.id, self.design.id]
+        )
@@ -1,15 +1,18 @@
 from apps.api import serializers as api_serializer
+from apps.common.cache import CachedContentMixin
 from apps.users.tasks import create_or_update_blog_post, delete_blog_post
 from django.contrib.auth.models import User
 from django_filters.rest_framework.backends import DjangoFilterBackend
 from rest_framework import generics, viewsets
+from rest_framework.decorators import action
 from rest_framework.exceptions import PermissionDenied
-from rest_framework.filters import SearchFilter
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
 
-from .filters import BlogFilter
+from .filters import BlogFilter, BlogSearchFilter
 from .models import BlogPost, Category, PostCategory, Reception
 from .permissions import CanUpdatePrice
+from .search import get_search_backend
 from .serializers import (
     BlogPostSerializer,
     CategorySerializer,
@@ -94,20 +97,54 @@ class PostCategoryDetail(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [AllowAny]
 
 
-class PostCategoryViewSet(viewsets.ModelViewSet):
+class PostCategoryViewSet(CachedContentMixin, viewsets.ModelViewSet):
+    cache_resource = "blog"
     permission_classes = [AllowAny]
     queryset = PostCategory.objects.all()
     serializer_class = PostCategorySerializer
 
 
-class BlogPostViewSet(viewsets.ModelViewSet):
+class BlogPostViewSet(CachedContentMixin, viewsets.ModelViewSet):
+    cache_resource = "blog"
     permission_classes = [AllowAny]
     queryset = BlogPost.objects.all()
     serializer_class = BlogPostSerializer
-    filter_backends = [DjangoFilterBackend, SearchFilter]
+    filter_backends = [DjangoFilterBackend, BlogSearchFilter]
     filterset_class = BlogFilter
     search_fields = ["title", "description", "category__category_name"]
 
+    @action(detail=False, methods=["get"], url_path="search")
+    def search(self, request, *args, **kwargs):
+        """Ranked full-text matches for ``?q=`` with highlighted snippets."""
+        return self.cached_response(request, self.get_search_results)
+
+    def get_search_results(self, request):
+        hits = get_search_backend().search(request.query_params.get("q", ""))
+        posts = BlogPost.objects.select_related("category").in_bulk(
+            [hit.post_id for hit in hits]
+        )
+        results = []
+        for hit in hits:
+            post = posts.get(hit.post_id)
+            if post is None:
+                continue
+            results.append(
+                {
+                    "id": post.id,
+                    "title": post.title,
+                    "category": post.category.category_name,
+                    "image": (
+                        request.build_absolute_uri(post.image.url)
+                        if post.image
+                        else None
+                    ),
+                    "created_at": post.created_at,
+                    "rank": hit.rank,
+                    "snippet": hit.snippet,
+                }
+            )
+        return Response(results)
+
     def perform_create(self, serializer):
         # Perform the actual creation logic
         instance = serializer.save()
@@ -115,7 +152,7 @@ class BlogPostViewSet(viewsets.ModelViewSet):
             "id": instance.id,
             "title": instance.title,
             "category": instance.category.id,
-            "image": instance.image.url if instance.image else None,
+            "image": instance.image.name if instance.image else None,
             "description": instance.description,
         }
         create_or_update_blog_post.delay(data)
@@ -126,7 +163,7 @@ class BlogPostViewSet(viewsets.ModelViewSet):
             "id": instance.id,
             "title": instance.title,
             "category": instance.category.id,
-            "image": instance.image.url if instance.image else None,
+            "image": instance.image.name if instance.image else None,
             "description": instance.description,
         }
         create_or_update_blog_post.delay(data)
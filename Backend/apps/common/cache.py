@@ -0,0 +1,86 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+CACHE_PREFIX = "site-content"
+CACHE_TIMEOUT = getattr(settings, "SITE_CONTENT_CACHE_TIMEOUT", 60 * 60 * 24)
+
+
+def _stamp_key(resource):
+    return f"{CACHE_PREFIX}:{resource}:stamp"
+
+
+def resource_stamp(resource):
+    """Time the resource last changed; part of every cache key and Last-Modified."""
+    stamp = cache.get(_stamp_key(resource))
+    if stamp is None:
+        cache.add(_stamp_key(resource), int(time.time()), None)
+        stamp = cache.get(_stamp_key(resource))
+    return stamp
+
+
+def invalidate_resource(resource):
+    """
+    Move the resource to a new stamp so every cached response for it (any
+    URL, filter or page) is bypassed; the stale entries simply expire.
+    """
+    previous = cache.get(_stamp_key(resource)) or 0
+    # Strictly increasing, so two edits within one second still change
+    # Last-Modified and the cache key.
+    cache.set(_stamp_key(resource), max(int(time.time()), previous + 1), None)
+
+
+class CachedContentMixin:
+    """
+    Serve GET list/retrieve responses of public site content from the cache.
+
+    Responses are keyed by resource stamp and absolute URL (serializers build
+    absolute media URLs from the host), carry an ``ETag`` and
+    ``Last-Modified`` header, and answer conditional requests with 304. A hit
+    runs no database queries. Writes invalidate the resource through the
+    signals in ``apps.common.signals``.
+    """
+
+    cache_resource = None
+
+    def cached_response(self, request, handler, *args, **kwargs):
+        # Imported here: the model signals import this module for
+        # invalidate_resource, and DRF need not load with the models.
+        from rest_framework.response import Response
+        from rest_framework.utils.encoders import JSONEncoder
+
+        last_modified = resource_stamp(self.cache_resource)
+        url_hash = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+        key = f"{CACHE_PREFIX}:{self.cache_resource}:{last_modified}:{url_hash}"
+
+        entry = cache.get(key)
+        if entry is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            body = json.dumps(response.data, cls=JSONEncoder, sort_keys=True)
+            entry = (response.data, quote_etag(hashlib.md5(body.encode()).hexdigest()))
+            cache.set(key, entry, CACHE_TIMEOUT)
+
+        data, etag = entry
+        not_modified = get_conditional_response(
+            request._request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return not_modified
+
+        response = Response(data)
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, super().retrieve, *args, **kwargs)
@@ -0,0 +1,212 @@
+import json
+import logging
+import statistics
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+
+from django.conf import settings
+from django.db import connections
+from django.utils.timezone import now
+
+logger = logging.getLogger("apps.instrumentation")
+
+DEFAULTS = {
+    "ENABLED": True,
+    # requests kept in memory per process for the admin endpoint
+    "BUFFER_SIZE": 500,
+    # requests slower than this keep their SQL and are logged as warnings
+    "SLOW_REQUEST_MS": 500,
+    # log every request as one JSON line on the apps.instrumentation logger
+    "LOG_REQUESTS": False,
+    # statements kept per slow request
+    "MAX_SQL": 200,
+}
+
+
+def get_setting(name):
+    return getattr(settings, "INSTRUMENTATION", {}).get(name, DEFAULTS[name])
+
+
+@dataclass
+class RequestMetrics:
+    method: str
+    path: str
+    started_at: str
+    view: str = ""
+    status: int = 0
+    queries: int = 0
+    db_ms: float = 0.0
+    serializer_ms: float = 0.0
+    total_ms: float = 0.0
+    sql: list = field(default_factory=list)
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.queries += 1
+            self.db_ms += elapsed
+            if len(self.sql) < get_setting("MAX_SQL"):
+                self.sql.append({"sql": sql, "ms": round(elapsed, 2)})
+
+
+current_metrics = ContextVar("current_metrics", default=None)
+
+
+class RequestBuffer:
+    """Fixed-size ring buffer of the most recent request metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._items = deque(maxlen=get_setting("BUFFER_SIZE"))
+
+    def append(self, item):
+        with self._lock:
+            self._items.append(item)
+
+    def snapshot(self):
+        with self._lock:
+            return list(self._items)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+buffer = RequestBuffer()
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of ``values``, ``fraction`` between 0 and 1."""
+    ordered = sorted(values)
+    return ordered[int(fraction * (len(ordered) - 1))]
+
+
+def summarize(requests):
+    """Per-view count, latency percentiles and query counts."""
+    by_view = defaultdict(list)
+    for item in requests:
+        by_view[item["view"] or item["path"]].append(item)
+
+    summary = {}
+    for view, items in by_view.items():
+        latencies = [item["total_ms"] for item in items]
+        queries = [item["queries"] for item in items]
+        summary[view] = {
+            "count": len(items),
+            "p50_ms": round(statistics.median(latencies), 2),
+            "p95_ms": round(percentile(latencies, 0.95), 2),
+            "max_ms": round(max(latencies), 2),
+            "mean_queries": round(statistics.mean(queries), 1),
+            "max_queries": max(queries),
+            "mean_db_ms": round(statistics.mean(i["db_ms"] for i in items), 2),
+            "mean_serializer_ms": round(
+                statistics.mean(i["serializer_ms"] for i in items), 2
+            ),
+        }
+    return summary
+
+
+class InstrumentationMiddleware:
+    """
+    Records query count, database time, serializer time (see
+    ``InstrumentedViewMixin``) and total latency of every request into
+    ``buffer``. Requests slower than ``SLOW_REQUEST_MS`` keep their SQL and
+    are logged; ``LOG_REQUESTS`` logs every request as structured JSON.
+    Configured through the ``INSTRUMENTATION`` setting.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not get_setting("ENABLED"):
+            return self.get_response(request)
+
+        metrics = RequestMetrics(
+            method=request.method,
+            path=request.path,
+            started_at=now().isoformat(),
+        )
+        token = current_metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(metrics.record_query)
+                    )
+                response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+
+        metrics.total_ms = (time.perf_counter() - started) * 1000
+        metrics.status = response.status_code
+        self.finish(metrics)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = current_metrics.get()
+        if metrics is not None:
+            view = getattr(view_func, "cls", None) or getattr(
+                view_func, "view_class", view_func
+            )
+            metrics.view = f"{view.__module__}.{view.__qualname__}"
+
+    def finish(self, metrics):
+        slow = metrics.total_ms >= get_setting("SLOW_REQUEST_MS")
+        if not slow:
+            metrics.sql = []
+        record = asdict(metrics)
+        for key in ("db_ms", "serializer_ms", "total_ms"):
+            record[key] = round(record[key], 2)
+        buffer.append(record)
+
+        if slow:
+            logger.warning(json.dumps({"event": "slow_request", **record}))
+        elif get_setting("LOG_REQUESTS"):
+            logger.info(json.dumps({"event": "request", **record}))
+
+
+class TimedDataMixin:
+    """Adds the time spent building ``serializer.data`` to the current request."""
+
+    @property
+    def data(self):
+        started = time.perf_counter()
+        try:
+            return super().data
+        finally:
+            metrics = current_metrics.get()
+            if metrics is not None:
+                metrics.serializer_ms += (time.perf_counter() - started) * 1000
+
+
+_timed_classes = {}
+
+
+def timed_serializer(serializer):
+    """Make ``serializer`` report its ``.data`` time, keeping its class identity."""
+    cls = type(serializer)
+    if not isinstance(serializer, TimedDataMixin):
+        if cls not in _timed_classes:
+            _timed_classes[cls] = type(cls.__name__, (TimedDataMixin, cls), {})
+        serializer.__class__ = _timed_classes[cls]
+    return serializer
+
+
+class InstrumentedViewMixin:
+    """
+    For DRF generic views and viewsets: serializers returned by
+    ``get_serializer`` report their rendering time to the instrumentation
+    middleware.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        return timed_serializer(super().get_serializer(*args, **kwargs))
@@ -0,0 +1,143 @@
+"""
+Gregorian <-> Jalali (Solar Hijri) day conversion for serializers, secret
+keys and reports.
+
+Days within ``JALALI_TABLE_YEARS`` (Gregorian years, both included) are
+looked up in a table built on first use by walking the calendar once; other
+days go through ``jdatetime`` behind an LRU cache. Both give the same
+answers, the table just avoids ``jdatetime``'s arithmetic and object churn
+when thousands of rows are serialized or bucketed at once.
+"""
+
+import datetime
+from functools import cache, lru_cache
+
+import jdatetime
+from django.conf import settings
+
+TABLE_YEARS = getattr(settings, "JALALI_TABLE_YEARS", (2010, 2040))
+CACHE_SIZE = 4096
+
+
+def _pack(year, month, day):
+    return year * 10000 + month * 100 + day
+
+
+def _unpack(packed):
+    return packed // 10000, packed // 100 % 100, packed % 100
+
+
+def month_length(year, month):
+    if month <= 6:
+        return 31
+    if month <= 11:
+        return 30
+    return 30 if jdatetime.date(year, 1, 1).isleap() else 29
+
+
+@cache
+def _table():
+    """
+    ``(first ordinal, [packed Jalali day per ordinal], {packed: ordinal})``
+    for every day of ``TABLE_YEARS``.
+    """
+    first = datetime.date(TABLE_YEARS[0], 1, 1)
+    last = datetime.date(TABLE_YEARS[1], 12, 31)
+    start = jdatetime.date.fromgregorian(date=first)
+    year, month, day = start.year, start.month, start.day
+    length = month_length(year, month)
+
+    days = []
+    for _ in range(first.toordinal(), last.toordinal() + 1):
+        days.append(_pack(year, month, day))
+        day += 1
+        if day > length:
+            day, month = 1, month + 1
+            if month > 12:
+                month, year = 1, year + 1
+            length = month_length(year, month)
+
+    ordinal = first.toordinal()
+    return ordinal, days, {packed: ordinal + i for i, packed in enumerate(days)}
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _to_jalali_uncached(day):
+    jalali = jdatetime.date.fromgregorian(date=day)
+    return jalali.year, jalali.month, jalali.day
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _to_gregorian_uncached(year, month, day):
+    return jdatetime.date(year, month, day).togregorian()
+
+
+def to_jalali(day):
+    """``(year, month, day)`` in the Jalali calendar for a ``date``/``datetime``."""
+    if isinstance(day, datetime.datetime):
+        day = day.date()
+    first, days, _ = _table()
+    offset = day.toordinal() - first
+    if 0 <= offset < len(days):
+        return _unpack(days[offset])
+    return _to_jalali_uncached(day)
+
+
+def to_gregorian(year, month, day):
+    """The Gregorian ``date`` of a Jalali day; ``ValueError`` if there is none."""
+    ordinal = _table()[2].get(_pack(year, month, day))
+    if ordinal is not None:
+        return datetime.date.fromordinal(ordinal)
+    if not (1 <= month <= 12 and 1 <= day <= month_length(year, month)):
+        raise ValueError(f"{year}-{month}-{day} is not a Jalali date")
+    return _to_gregorian_uncached(year, month, day)
+
+
+def to_jalali_many(days):
+    """``to_jalali`` for many days at once, e.g. a column of a queryset."""
+    first, table, _ = _table()
+    size = len(table)
+    result = []
+    for day in days:
+        if isinstance(day, datetime.datetime):
+            day = day.date()
+        offset = day.toordinal() - first
+        result.append(
+            _unpack(table[offset]) if 0 <= offset < size else _to_jalali_uncached(day)
+        )
+    return result
+
+
+def format_jalali(day, separator="-"):
+    """``1403-07-28`` for a Gregorian ``date``."""
+    if isinstance(day, datetime.datetime):
+        day = day.date()
+    return _format_jalali(day, separator)
+
+
+# Rows of one response mostly share a handful of days
+@lru_cache(maxsize=CACHE_SIZE)
+def _format_jalali(day, separator):
+    year, month, day = to_jalali(day)
+    return f"{year:04d}{separator}{month:02d}{separator}{day:02d}"
+
+
+def parse_jalali(value):
+    """The Gregorian ``date`` of ``YYYY-MM-DD`` or ``YYYY/MM/DD`` in Jalali."""
+    parts = value.strip().replace("/", "-").split("-")
+    if len(parts) != 3 or not all(part.isdigit() for part in parts):
+        raise ValueError(f"{value!r} is not a Jalali date")
+    return to_gregorian(*map(int, parts))
+
+
+def jalali_month(day):
+    """``(year, month)`` in the Jalali calendar, for bucketing by month."""
+    return to_jalali(day)[:2]
+
+
+def jalali_month_range(year, month):
+    """First and last Gregorian day of a Jalali month."""
+    return (
+        to_gregorian(year, month, 1),
+        to_gregorian(year, month, month_length(year, month)),
+    )
@@ -0,0 +1,66 @@
+import datetime
+import json
+import random
+import time
+
+import jdatetime
+from django.core.management.base import BaseCommand
+
+from apps.common import jalali
+
+
+class Command(BaseCommand):
+    help = (
+        "Time Gregorian -> Jalali conversion of many dates through jdatetime "
+        "and through apps.common.jalali."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dates", type=int, default=100_000)
+        parser.add_argument(
+            "--span-days",
+            type=int,
+            default=3 * 365,
+            help="The dates are spread over this many days up to today.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Also write the results to this file.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        today = datetime.date.today()
+        dates = [
+            today - datetime.timedelta(days=rng.randrange(options["span_days"]))
+            for _ in range(options["dates"])
+        ]
+
+        jalali._table()  # built once per process, not part of a request
+        timings = {
+            "jdatetime": self.time(
+                lambda: [
+                    jdatetime.date.fromgregorian(date=day).strftime("%Y-%m-%d")
+                    for day in dates
+                ]
+            ),
+            "format_jalali": self.time(
+                lambda: [jalali.format_jalali(day) for day in dates]
+            ),
+            "to_jalali_many": self.time(lambda: jalali.to_jalali_many(dates)),
+        }
+
+        results = {"dates": len(dates), "ms": {}, "speedup": {}}
+        for name, seconds in timings.items():
+            results["ms"][name] = round(seconds * 1000, 1)
+            results["speedup"][name] = round(timings["jdatetime"] / seconds, 1)
+            self.stdout.write(
+                f"{name:<16}{seconds * 1000:>10.1f} ms"
+                f"{timings['jdatetime'] / seconds:>8.1f}x"
+            )
+        if options["output"]:
+            with open(options["output"], "w") as fp:
+                json.dump(results, fp, indent=2)
+
+    def time(self, function):
+        started = time.perf_counter()
+        function()
+        return time.perf_counter() - started
@@ -0,0 +1,125 @@
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from apps.common.instrumentation import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the per-request overhead of the middleware stack, database "
+        "connection handling and cache backend of the active settings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--warmup", type=int, default=20)
+        parser.add_argument(
+            "--path",
+            default="/group/categories/",
+            help="A cheap public GET endpoint to request.",
+        )
+        parser.add_argument("--output", help="Also write the results to this file.")
+
+    def handle(self, *args, **options):
+        with ExitStack() as stack:
+            self.use_test_database(stack)
+            results = self.run(options)
+
+        for key, value in results.items():
+            self.stdout.write(f"{key:<22}{value}")
+        if options["output"]:
+            with open(options["output"], "w") as fp:
+                json.dump(results, fp, indent=2)
+
+    def use_test_database(self, stack):
+        """
+        A throwaway copy of the default database. SQLite gets a file rather
+        than the in-memory test database, so connection setup and pragmas cost
+        what they cost in production.
+        """
+        setup_test_environment()
+        stack.callback(teardown_test_environment)
+        if connection.vendor == "sqlite":
+            directory = stack.enter_context(tempfile.TemporaryDirectory())
+            connection.settings_dict["TEST"]["NAME"] = os.path.join(
+                directory, "benchmark.sqlite3"
+            )
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        stack.callback(connection.creation.destroy_test_db, old_name, verbosity=0)
+
+    def run(self, options):
+        opened = []
+
+        def count_connection(sender, connection, **kwargs):
+            opened.append(connection.alias)
+
+        # The test Client keeps database connections open across requests;
+        # a WSGI handler closes them the way the application server does.
+        handler = WSGIHandler()
+        for _ in range(options["warmup"]):
+            self.request(handler, options["path"])
+
+        latencies = []
+        connection_created.connect(count_connection, weak=False)
+        try:
+            for _ in range(options["requests"]):
+                started = time.perf_counter()
+                status = self.request(handler, options["path"])
+                latencies.append((time.perf_counter() - started) * 1000)
+        finally:
+            connection_created.disconnect(count_connection)
+
+        return {
+            "path": options["path"],
+            "status": status,
+            "requests": len(latencies),
+            "mean_ms": round(statistics.mean(latencies), 3),
+            "p50_ms": round(percentile(latencies, 0.50), 3),
+            "p95_ms": round(percentile(latencies, 0.95), 3),
+            "p99_ms": round(percentile(latencies, 0.99), 3),
+            "connections_opened": len(opened),
+            "middleware": len(settings.MIDDLEWARE),
+            "conn_max_age": connection.settings_dict["CONN_MAX_AGE"],
+            "cache": settings.CACHES["default"]["BACKEND"].rsplit(".", 1)[-1],
+            "journal_mode": self.journal_mode(),
+        }
+
+    def request(self, handler, path):
+        statuses = []
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": path,
+            "QUERY_STRING": "",
+            "SERVER_NAME": "testserver",
+            "SERVER_PORT": "80",
+            "wsgi.input": io.BytesIO(),
+            "wsgi.errors": sys.stderr,
+            "wsgi.url_scheme": "http",
+        }
+        response = handler(environ, lambda status, headers: statuses.append(status))
+        b"".join(response)
+        response.close()  # sends request_finished
+        return int(statuses[0].split()[0])
+
+    def journal_mode(self):
+        if connection.vendor != "sqlite":
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            return cursor.fetchone()[0]
@@ -0,0 +1,84 @@
+import re
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from apps.common.models import StoredBlob
+from apps.common.renditions import delete_renditions
+from apps.common.signals import CONTENT_ADDRESSED_FIELDS, RICH_TEXT_FIELDS
+from apps.common.storage import CKEditorContentStorage, content_storage
+
+
+class Command(BaseCommand):
+    help = "Recount references to content-addressed media blobs and delete orphans"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-hours",
+            type=int,
+            default=24,
+            help="Keep orphans touched more recently than this (uploads in flight)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would be deleted without deleting anything",
+        )
+
+    def count_references(self):
+        references = Counter()
+
+        for model, field in CONTENT_ADDRESSED_FIELDS.items():
+            names = model.objects.exclude(**{field: ""}).values_list(field, flat=True)
+            references.update(name for name in names.iterator() if name)
+
+        # CKEditor uploads are only referenced from inside RichText HTML
+        prefix = CKEditorContentStorage().prefix.strip("/")
+        pattern = re.compile(
+            re.escape(settings.MEDIA_URL.strip("/"))
+            + "/("
+            + re.escape(prefix)
+            + r"/[^\s\"'<>)]+)"
+        )
+        for model, fields in RICH_TEXT_FIELDS.items():
+            for values in model.objects.values_list(*fields).iterator():
+                for html in values:
+                    references.update(pattern.findall(html or ""))
+        return references
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        references = self.count_references()
+        cutoff = now() - timedelta(hours=options["grace_hours"])
+
+        changed, orphans = [], []
+        for blob in StoredBlob.objects.iterator():
+            count = references.get(blob.name, 0)
+            if blob.ref_count != count:
+                blob.ref_count = count
+                changed.append(blob)
+            if count == 0 and blob.updated_at < cutoff:
+                orphans.append(blob)
+
+        if not dry_run:
+            StoredBlob.objects.bulk_update(changed, ["ref_count"], batch_size=500)
+
+        freed = 0
+        for blob in orphans:
+            freed += blob.size
+            if dry_run:
+                self.stdout.write(f"Would delete {blob.name}")
+                continue
+            content_storage.purge(blob.name)
+            delete_renditions(blob.name, content_storage)
+            blob.delete()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Recounted {len(changed)} blobs, deleted {len(orphans)} orphans "
+                f"({freed} bytes){' [dry run]' if dry_run else ''}"
+            )
+        )
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from apps.common.renditions import generate_renditions
+from apps.common.signals import RENDITION_FIELDS, renditions_built
+from apps.users.tasks import process_uploaded_image
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the missing thumbnail/medium/large renditions of every stored "
+        "image (images uploaded before renditions existed, failed tasks)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--queue",
+            action="store_true",
+            help="Queue a Celery task per image instead of building them here",
+        )
+
+    def handle(self, *args, **options):
+        for model, field in RENDITION_FIELDS.items():
+            names = (
+                model.objects.exclude(**{field: ""})
+                .exclude(renditions_for=F(field))
+                .values_list(field, flat=True)
+                .distinct()
+            )
+            built, failed = 0, 0
+            for name in list(names):
+                if not name:
+                    continue
+                if options["queue"]:
+                    process_uploaded_image.delay(name)
+                    built += 1
+                    continue
+                try:
+                    # Renditions that already exist are only recorded on the rows
+                    generate_renditions(name)
+                    renditions_built(name)
+                    built += 1
+                except (OSError, ValueError) as e:
+                    failed += 1
+                    self.stderr.write(f"{name}: {e}")
+            self.stdout.write(
+                f"{model._meta.label}: "
+                f"{'queued' if options['queue'] else 'built'} {built}, failed {failed}"
+            )
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.common.startup import STARTUP_TARGETS, profile_startup, startup_budget
+
+
+class Command(BaseCommand):
+    help = (
+        "Profile process start-up with python -X importtime: wall time and the "
+        "slowest imports for a web, worker or bare django.setup() process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", choices=sorted(STARTUP_TARGETS), default="web")
+        parser.add_argument("--top", type=int, default=20)
+        parser.add_argument(
+            "--runs",
+            type=int,
+            default=3,
+            help="Start this many processes and report the fastest.",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Fail when start-up is over STARTUP_BUDGET_MS.",
+        )
+
+    def handle(self, *args, **options):
+        target = options["target"]
+        profile = min(
+            (profile_startup(target) for _ in range(options["runs"])),
+            key=lambda profile: profile.wall_ms,
+        )
+        # Timing without -X importtime, which slows imports down itself.
+        wall_ms = min(
+            profile_startup(target, importtime=False).wall_ms
+            for _ in range(options["runs"])
+        )
+        budget = startup_budget(target)
+
+        self.stdout.write(
+            f"{target}: {wall_ms:.0f} ms (budget {budget} ms), "
+            f"{len(profile.modules)} modules"
+        )
+        for title, key, top_level in (
+            ("Slowest top-level imports (cumulative)", "cumulative_us", True),
+            ("Slowest modules (self)", "self_us", False),
+        ):
+            self.stdout.write(f"\n{title}:")
+            for timing in profile.slowest(options["top"], key, top_level):
+                self.stdout.write(
+                    f"{getattr(timing, key) / 1000:>9.1f} ms  {timing.module}"
+                )
+
+        if options["check"] and wall_ms > budget:
+            raise CommandError(
+                f"{target} start-up took {wall_ms:.0f} ms, over the {budget} ms budget"
+            )
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from apps.common.cache import invalidate_resource
+from apps.common.signals import CACHED_RESOURCES, RICH_TEXT_FIELDS
+from apps.users.tasks import process_rich_text_images
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-render the cached sanitized HTML and excerpt of every RichText "
+        "description (after deploying the render pipeline or changing it)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument(
+            "--skip-renditions",
+            action="store_true",
+            help="Do not queue rendition builds for embedded images",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        for model in RICH_TEXT_FIELDS:
+            rendered, queued, batch = 0, 0, []
+            for instance in model.objects.iterator(chunk_size=batch_size):
+                if instance.render_description().missing_renditions:
+                    if not options["skip_renditions"]:
+                        process_rich_text_images.delay(model._meta.label, instance.pk)
+                        queued += 1
+                batch.append(instance)
+                if len(batch) >= batch_size:
+                    rendered += self.save(model, batch)
+            rendered += self.save(model, batch)
+            for resource in CACHED_RESOURCES.get(model, []):
+                invalidate_resource(resource)
+            self.stdout.write(
+                f"{model._meta.label}: rendered {rendered}, "
+                f"queued {queued} for image renditions"
+            )
+
+    def save(self, model, batch):
+        # bulk_update skips save(), signals and auto_now fields on purpose.
+        model.objects.bulk_update(batch, ["description_html", "description_excerpt"])
+        count = len(batch)
+        batch.clear()
+        return count
@@ -4,8 +4,11 @@ import uuid
 from apps.group.models import Category
 from ckeditor_uploader.fields import RichTextUploadingField
 from django.db import models
+from django.db.models import F
 from django.utils.translation import gettext_lazy as _
-from pyexpat import model
+
+from .richtext import render_rich_text
+from .storage import content_storage
 
 
 class TimeStampedUUIDModel(models.Model):
@@ -18,7 +21,81 @@ class TimeStampedUUIDModel(models.Model):
         abstract = True
 
 
-class Category(models.Model):
+class RenderedRichTextModel(models.Model):
+    """
+    A model with a CKEditor ``description`` whose sanitized HTML and plain-text
+    excerpt are rendered once on save (see ``apps.common.richtext``) instead
+    of on every response.
+    """
+
+    description_html = models.TextField(blank=True, editable=False)
+    description_excerpt = models.TextField(blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def render_description(self):
+        rendered = render_rich_text(self.description)
+        self.description_html = rendered.html
+        self.description_excerpt = rendered.excerpt
+        # Read by apps.common.signals to build the missing image renditions.
+        self.missing_renditions = rendered.missing_renditions
+        return rendered
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "description" in update_fields:
+            self.render_description()
+            if update_fields is not None:
+                kwargs["update_fields"] = {
+                    *update_fields,
+                    "description_html",
+                    "description_excerpt",
+                }
+        super().save(*args, **kwargs)
+
+
+class RenditionsModel(models.Model):
+    """
+    A model whose image gets renditions (see ``apps.common.renditions``).
+    ``renditions_for`` names the image they were last built for, so responses
+    pick the renditions without asking the storage about every row.
+    """
+
+    renditions_for = models.CharField(max_length=255, blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+
+class StoredBlob(models.Model):
+    """One row per file kept by ``ContentAddressedStorage``."""
+
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Stored Blob")
+        verbose_name_plural = _("Stored Blobs")
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
+
+    @classmethod
+    def acquire(cls, name):
+        cls.objects.filter(name=name).update(ref_count=F("ref_count") + 1)
+
+    @classmethod
+    def release(cls, name):
+        cls.objects.filter(name=name, ref_count__gt=0).update(
+            ref_count=F("ref_count") - 1
+        )
+
+
+class Category(RenderedRichTextModel):
     name = models.CharField(verbose_name=_("category name"), max_length=255)
     description = RichTextUploadingField()
     image = models.ImageField(upload_to="images/category")
@@ -33,8 +110,10 @@ class Category(models.Model):
         ordering = ["-created_at"]
 
 
-class SubCategory(models.Model):
-    category = models.ForeignKey(Category, on_delete=models.CASCADE)
+class SubCategory(RenditionsModel):
+    category = models.ForeignKey(
+        Category, on_delete=models.CASCADE, related_name="subcategories"
+    )
     name = models.CharField(max_length=255)
     image = models.ImageField(upload_to="subcategory/")
     created_at = models.DateTimeField(auto_now_add=True)
@@ -48,7 +127,7 @@ class SubCategory(models.Model):
         ordering = ["-created_at"]
 
 
-class Services(models.Model):
+class Services(RenderedRichTextModel, RenditionsModel):
     title = models.CharField(max_length=255)
     description = RichTextUploadingField()
     image = models.ImageField(upload_to="services")
@@ -59,8 +138,10 @@ class Services(models.Model):
     class Meta:
         ordering = ["created_at"]
 
-class Images(models.Model):
-    images = models.ImageField(upload_to="slider/images", null=True, blank=True)
+class Images(RenditionsModel):
+    images = models.ImageField(
+        upload_to="slider/images", storage=content_storage, null=True, blank=True
+    )
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -85,11 +166,13 @@ class GalleryCategory(models.Model):
         return str(self.name)
 
 
-class Gallery(models.Model):
+class Gallery(RenditionsModel):
     category = models.ForeignKey(
         GalleryCategory, on_delete=models.CASCADE, null=True, blank=True
     )
-    image = models.ImageField(_("Gallery Images "), upload_to="gallery/images")
+    image = models.ImageField(
+        _("Gallery Images "), upload_to="gallery/images", storage=content_storage
+    )
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -102,7 +185,7 @@ class Gallery(models.Model):
         return str(self.image.url) if self.image else "No Image"
 
 
-class AboutModel(models.Model):
+class AboutModel(RenditionsModel):
     image = models.ImageField(_("About Images "), upload_to="gallery/about")
 
     created_at = models.DateTimeField(auto_now_add=True)
@@ -116,9 +199,9 @@ class AboutModel(models.Model):
         return str(self.image.url) if self.image else "No Image"
 
 
-class CustomerImages(models.Model):
+class CustomerImages(RenditionsModel):
     name = models.CharField(max_length=255)
-    image = models.ImageField(upload_to="customer_images.")
+    image = models.ImageField(upload_to="customer_images.", storage=content_storage)
 
     def __str__(self):
         return self.name
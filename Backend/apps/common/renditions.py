@@ -0,0 +1,108 @@
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+# name -> longest edge in pixels
+RENDITION_SIZES = getattr(
+    settings,
+    "IMAGE_RENDITION_SIZES",
+    {"thumbnail": 320, "medium": 800, "large": 1600},
+)
+
+# extension -> (PIL format, save options)
+RENDITION_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def rendition_name(name, size, extension):
+    """
+    Storage name of a rendition, stored beside the original:
+    ``gallery/images/photo.png`` -> ``gallery/images/photo.thumbnail.webp``.
+    """
+    root, _ = posixpath.splitext(name)
+    return f"{root}.{size}.{extension}"
+
+
+def generate_renditions(name, storage=None):
+    """
+    Build every size/format rendition of the image stored under ``name``.
+
+    Images are opened from storage (not from a URL), resized with their aspect
+    ratio preserved and never upscaled. Renditions that already exist are left
+    alone, so re-running the pipeline is cheap. Returns the names written.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    storage = storage or default_storage
+    missing = [
+        (size, edge, extension)
+        for size, edge in RENDITION_SIZES.items()
+        for extension in RENDITION_FORMATS
+        if not storage.exists(rendition_name(name, size, extension))
+    ]
+    if not missing:
+        return []
+
+    with storage.open(name, "rb") as source:
+        try:
+            original = Image.open(source)
+            original.load()
+        except UnidentifiedImageError:
+            raise ValueError(f"{name} is not a readable image")
+    original = ImageOps.exif_transpose(original)
+    if original.mode not in ("RGB", "RGBA", "L"):
+        original = original.convert("RGBA")
+
+    written = []
+    resized = {}
+    for size, edge, extension in missing:
+        if size not in resized:
+            resized[size] = original.copy()
+            resized[size].thumbnail((edge, edge), Image.LANCZOS)
+        image = resized[size]
+        image_format, options = RENDITION_FORMATS[extension]
+        if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        buffer = BytesIO()
+        image.save(buffer, format=image_format, **options)
+        target = rendition_name(name, size, extension)
+        storage.save(target, ContentFile(buffer.getvalue()))
+        written.append(target)
+    return written
+
+
+def delete_renditions(name, storage=None):
+    storage = storage or default_storage
+    # Content-addressed storage ignores delete(); its files go with purge()
+    delete = getattr(storage, "purge", storage.delete)
+    for size in RENDITION_SIZES:
+        for extension in RENDITION_FORMATS:
+            delete(rendition_name(name, size, extension))
+
+
+def rendition_urls(field_file, request=None, sizes=None):
+    """
+    ``{"thumbnail": {"webp": url, "jpg": url}, ...}`` for an image field value.
+    Until the renditions are built (by the upload task or the
+    ``generate_renditions`` command) every entry is the original's URL; the
+    row's ``renditions_for`` tells which, storage is not asked.
+    """
+    if not field_file:
+        return None
+    storage = field_file.storage
+    built = getattr(field_file.instance, "renditions_for", None) == field_file.name
+    urls = {}
+    for size in sizes or RENDITION_SIZES:
+        urls[size] = {}
+        for extension in RENDITION_FORMATS:
+            name = rendition_name(field_file.name, size, extension)
+            url = storage.url(name if built else field_file.name)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            urls[size][extension] = url
+    return urls
@@ -0,0 +1,206 @@
+import html
+import posixpath
+import re
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from urllib.parse import unquote, urlparse
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils.html import escape, strip_tags
+from django.utils.text import Truncator
+
+from .renditions import RENDITION_SIZES, rendition_name
+
+EXCERPT_LENGTH = getattr(settings, "RICHTEXT_EXCERPT_LENGTH", 300)
+
+# tag -> attributes kept on it; any other tag is dropped but its text kept
+ALLOWED_TAGS = {
+    **{
+        tag: set()
+        for tag in (
+            "p br hr b strong i em u s strike sub sup small span div blockquote "
+            "pre code ul ol li h1 h2 h3 h4 h5 h6 table thead tbody tfoot tr "
+            "caption figure figcaption"
+        ).split()
+    },
+    "a": {"href", "title", "target"},
+    "img": {"src", "alt", "title", "width", "height"},
+    "td": {"colspan", "rowspan"},
+    "th": {"colspan", "rowspan"},
+    "ol": {"start"},
+}
+GLOBAL_ATTRIBUTES = {"style", "dir", "lang"}
+VOID_TAGS = {"br", "hr", "img"}
+
+# tags dropped together with everything inside them
+DROPPED_TAGS = {"script", "style", "iframe", "object", "embed", "noscript", "svg"}
+
+ALLOWED_STYLES = {
+    "text-align",
+    "color",
+    "background-color",
+    "font-weight",
+    "font-style",
+    "text-decoration",
+    "width",
+    "height",
+    "float",
+    "margin",
+    "margin-left",
+    "margin-right",
+    "padding",
+    "border",
+    "border-collapse",
+}
+ALLOWED_SCHEMES = {"", "http", "https", "mailto", "tel"}
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
+
+
+def html_to_text(value):
+    """Plain text of a RichText HTML body, whitespace collapsed."""
+    text = html.unescape(strip_tags(value or ""))
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def make_excerpt(value, length=None):
+    return Truncator(html_to_text(value)).chars(length or EXCERPT_LENGTH)
+
+
+def clean_style(value):
+    declarations = []
+    for declaration in value.split(";"):
+        prop, _, val = declaration.partition(":")
+        prop, val = prop.strip().lower(), val.strip()
+        if prop in ALLOWED_STYLES and val and not re.search(r"[()\\<>]", val):
+            declarations.append(f"{prop}: {val}")
+    return "; ".join(declarations)
+
+
+def is_safe_url(value):
+    # Browsers ignore control characters and whitespace inside schemes.
+    compact = re.sub(r"[\x00-\x20]", "", value)
+    return urlparse(compact).scheme.lower() in ALLOWED_SCHEMES
+
+
+def media_name(src):
+    """Storage name of a local media URL, or None for external images."""
+    path = unquote(urlparse(src).path)
+    base = urlparse(default_storage.base_url).path
+    if not path.startswith(base):
+        return None
+    name = path[len(base) :]
+    if posixpath.splitext(name)[1].lower() not in IMAGE_EXTENSIONS:
+        return None
+    return name
+
+
+@dataclass
+class RenderedRichText:
+    html: str
+    excerpt: str
+    # local images referenced without renditions yet
+    missing_renditions: list = field(default_factory=list)
+
+
+class RichTextRenderer(HTMLParser):
+    """
+    Whitelist sanitizer for CKEditor HTML. Local images whose renditions
+    exist are pointed at them, with the WebP renditions as ``srcset``.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.output = []
+        self.open_tags = []
+        self.dropping = 0
+        self.missing_renditions = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROPPED_TAGS:
+            self.dropping += 1
+            return
+        if self.dropping or tag not in ALLOWED_TAGS:
+            return
+
+        allowed = ALLOWED_TAGS[tag] | GLOBAL_ATTRIBUTES
+        cleaned = {}
+        for name, value in attrs:
+            if name not in allowed or value is None:
+                continue
+            if name == "style":
+                value = clean_style(value)
+            elif name in ("href", "src") and not is_safe_url(value):
+                continue
+            if value:
+                cleaned[name] = value
+        if tag == "img":
+            if "src" not in cleaned:
+                return
+            self.use_renditions(cleaned)
+        if tag == "a" and cleaned.get("target") == "_blank":
+            cleaned["rel"] = "noopener noreferrer"
+
+        rendered = "".join(f' {k}="{escape(v)}"' for k, v in cleaned.items())
+        self.output.append(f"<{tag}{rendered}>")
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in DROPPED_TAGS:
+            return
+        self.handle_starttag(tag, attrs)
+        if tag in self.open_tags and tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROPPED_TAGS:
+            self.dropping = max(self.dropping - 1, 0)
+            return
+        if self.dropping or tag not in self.open_tags:
+            return
+        # Close anything left open inside this tag so the output stays balanced.
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.output.append(f"</{open_tag}>")
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if not self.dropping:
+            self.output.append(escape(data))
+
+    def use_renditions(self, attrs):
+        name = media_name(attrs["src"])
+        if name is None:
+            return
+        largest = max(RENDITION_SIZES, key=RENDITION_SIZES.get)
+        if not default_storage.exists(rendition_name(name, largest, "webp")):
+            if default_storage.exists(name):
+                self.missing_renditions.append(name)
+            return
+        attrs["src"] = default_storage.url(rendition_name(name, largest, "jpg"))
+        attrs["srcset"] = ", ".join(
+            f"{default_storage.url(rendition_name(name, size, 'webp'))} {edge}w"
+            for size, edge in sorted(RENDITION_SIZES.items(), key=lambda i: i[1])
+        )
+        attrs.setdefault("loading", "lazy")
+
+    def render(self, value):
+        self.feed(value or "")
+        self.close()
+        self.output.extend(f"</{tag}>" for tag in reversed(self.open_tags))
+        self.open_tags = []
+        return "".join(self.output)
+
+
+def render_rich_text(value):
+    renderer = RichTextRenderer()
+    rendered = renderer.render(value)
+    return RenderedRichText(
+        html=rendered,
+        excerpt=make_excerpt(rendered),
+        missing_renditions=renderer.missing_renditions,
+    )
+
@@ -10,20 +10,65 @@ from .models import (
     Services,
     SubCategory,
 )
+from .renditions import rendition_urls
 
 
-class ServicesSerializer(serializers.ModelSerializer):
+class RenditionsField(serializers.ReadOnlyField):
+    """
+    Read-only serializer field exposing the renditions of an image field, or
+    with ``size`` only that rendition's ``{"webp": url, "jpg": url}``.
+    """
+
+    def __init__(self, size=None, **kwargs):
+        self.size = size
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if self.size is None:
+            return rendition_urls(value, self.context.get("request"))
+        urls = rendition_urls(value, self.context.get("request"), [self.size])
+        return urls and urls[self.size]
+
+
+class RenderedRichTextSerializerMixin:
+    """
+    For models built on ``RenderedRichTextModel``: list responses carry
+    ``description_excerpt`` instead of the full ``description`` body, single
+    objects add the sanitized ``description_html``.
+    """
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if isinstance(self.parent, serializers.ListSerializer):
+            data.pop("description", None)
+            data["description_excerpt"] = instance.description_excerpt
+        else:
+            data["description_html"] = instance.description_html
+        return data
+
+
+class ServicesSerializer(RenderedRichTextSerializerMixin, serializers.ModelSerializer):
+    image_renditions = RenditionsField(source="image")
+
     class Meta:
         model = Services
-        fields = ["id", "title", "description", "image", "created_at"]
+        fields = [
+            "id",
+            "title",
+            "description",
+            "image",
+            "image_renditions",
+            "created_at",
+        ]
 
 
 class ImagesSerializer(serializers.ModelSerializer):
     images = serializers.SerializerMethodField()
+    images_renditions = RenditionsField(source="images")
 
     class Meta:
         model = Images
-        fields = ["id", "images"]
+        fields = ["id", "images", "images_renditions"]
 
     def get_images(self, obj):
         request = self.context.get("request")
@@ -39,21 +84,34 @@ class GalleryCategorySerializer(serializers.ModelSerializer):
 
 
 class GallerySerializer(serializers.ModelSerializer):
+    image_renditions = RenditionsField(source="image")
+
     class Meta:
         model = Gallery
-        fields = ["id", "category", "image", "created_at", "updated_at"]
+        fields = [
+            "id",
+            "category",
+            "image",
+            "image_renditions",
+            "created_at",
+            "updated_at",
+        ]
 
 
 class AboutModelSerializer(serializers.ModelSerializer):
+    image_renditions = RenditionsField(source="image")
+
     class Meta:
         model = AboutModel
-        fields = ["id", "image", "created_at", "updated_at"]
+        fields = ["id", "image", "image_renditions", "created_at", "updated_at"]
 
 
 class CustomerImagesSerializer(serializers.ModelSerializer):
+    image_renditions = RenditionsField(source="image")
+
     class Meta:
         model = CustomerImages
-        fields = ["id", "name", "image"]
+        fields = ["id", "name", "image", "image_renditions"]
 
     def update(self, instance, validated_data):
         instance.name = validated_data.get("name", instance.name)
@@ -65,13 +123,14 @@ class CustomerImagesSerializer(serializers.ModelSerializer):
 class SubCategorySerializer(serializers.ModelSerializer):
 
     category = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all())
+    image_renditions = RenditionsField(source="image")
 
     class Meta:
         model = SubCategory
-        fields = ["id", "name", "image", "created_at", "category"]
+        fields = ["id", "name", "image", "image_renditions", "created_at", "category"]
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(RenderedRichTextSerializerMixin, serializers.ModelSerializer):
     subcategories = SubCategorySerializer(many=True, read_only=True)
 
     class Meta:
@@ -80,6 +139,24 @@ class CategorySerializer(serializers.ModelSerializer):
         ref_name = "ApiCategory"
 
 
+class SubCategoryTreeSerializer(serializers.ModelSerializer):
+    image_renditions = RenditionsField(source="image")
+
+    class Meta:
+        model = SubCategory
+        fields = ["id", "name", "image", "image_renditions"]
+
+
+class CategoryTreeSerializer(serializers.ModelSerializer):
+    """Compact category -> subcategory tree for the product catalogue."""
+
+    subcategories = SubCategoryTreeSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Category
+        fields = ["id", "name", "image", "subcategories"]
+
+
 # class BenefitSerializer(serializers.ModelSerializer):
 #     class Meta:
 #         # model = .Benefits
@@ -0,0 +1,159 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from apps.api.models import BlogPost
+from apps.api.models import Order as ApiOrder
+from apps.api.models import PostCategory, Reception
+from apps.staff.models import Staff
+from apps.users.tasks import process_rich_text_images, process_uploaded_image
+
+from .cache import invalidate_resource
+from .models import (
+    AboutModel,
+    Category,
+    CustomerImages,
+    Gallery,
+    GalleryCategory,
+    Images,
+    Services,
+    StoredBlob,
+    SubCategory,
+)
+
+# model -> image field that gets thumbnail/medium/large renditions
+RENDITION_FIELDS = {
+    Images: "images",
+    Gallery: "image",
+    AboutModel: "image",
+    CustomerImages: "image",
+    Services: "image",
+    SubCategory: "image",
+    Staff: "photo",
+}
+
+# model -> file field kept in ContentAddressedStorage
+CONTENT_ADDRESSED_FIELDS = {
+    Images: "images",
+    Gallery: "image",
+    CustomerImages: "image",
+    BlogPost: "image",
+}
+
+# model -> RichText fields that can embed CKEditor uploads
+RICH_TEXT_FIELDS = {
+    BlogPost: ["description"],
+    Services: ["description"],
+    Category: ["description"],
+    ApiOrder: ["description"],
+    Reception: ["description"],
+}
+
+# model -> cached public resources (see apps.common.cache) its writes invalidate
+CACHED_RESOURCES = {
+    Services: ["services"],
+    Images: ["slider"],
+    Gallery: ["gallery"],
+    GalleryCategory: ["gallery"],
+    AboutModel: ["about"],
+    CustomerImages: ["customer-images"],
+    Category: ["categories"],
+    SubCategory: ["categories"],
+    BlogPost: ["blog"],
+    PostCategory: ["blog"],
+}
+
+
+def queue_renditions(sender, instance, **kwargs):
+    image = getattr(instance, RENDITION_FIELDS[sender])
+    if image:
+        transaction.on_commit(lambda: process_uploaded_image.delay(image.name))
+
+
+def renditions_built(name):
+    """
+    Called once the renditions of the stored image ``name`` exist: point the
+    rows showing it at them and drop the cached responses that still carry
+    the original's URLs.
+    """
+    models = [
+        model
+        for model, field in RENDITION_FIELDS.items()
+        if model.objects.filter(**{field: name}).update(renditions_for=name)
+    ]
+
+    def invalidate():
+        for model in models:
+            for resource in CACHED_RESOURCES.get(model, []):
+                invalidate_resource(resource)
+
+    transaction.on_commit(invalidate)
+
+
+def queue_rich_text_renditions(sender, instance, **kwargs):
+    if getattr(instance, "missing_renditions", None):
+        label, pk = sender._meta.label, instance.pk
+        transaction.on_commit(lambda: process_rich_text_images.delay(label, pk))
+
+
+def remember_blob(sender, instance, **kwargs):
+    field = CONTENT_ADDRESSED_FIELDS[sender]
+    instance._previous_blob = None
+    if instance.pk:
+        instance._previous_blob = (
+            sender.objects.filter(pk=instance.pk).values_list(field, flat=True).first()
+        )
+
+
+def update_blob_references(acquired=None, released=None):
+    def update():
+        if acquired:
+            StoredBlob.acquire(acquired)
+        if released:
+            StoredBlob.release(released)
+
+    if acquired != released:
+        transaction.on_commit(update)
+
+
+def count_blob_reference(sender, instance, **kwargs):
+    name = getattr(instance, CONTENT_ADDRESSED_FIELDS[sender]).name
+    update_blob_references(name or None, getattr(instance, "_previous_blob", None))
+
+
+def release_blob_reference(sender, instance, **kwargs):
+    name = getattr(instance, CONTENT_ADDRESSED_FIELDS[sender]).name
+    update_blob_references(released=name or None)
+
+
+def invalidate_cached_resources(sender, **kwargs):
+    # After the commit, so a read between the write and the commit cannot
+    # cache the old rows again
+    def invalidate():
+        for resource in CACHED_RESOURCES[sender]:
+            invalidate_resource(resource)
+
+    transaction.on_commit(invalidate)
+
+
+for model in RENDITION_FIELDS:
+    post_save.connect(
+        queue_renditions, sender=model, dispatch_uid=f"renditions-{model.__name__}"
+    )
+
+for model in RICH_TEXT_FIELDS:
+    post_save.connect(
+        queue_rich_text_renditions,
+        sender=model,
+        dispatch_uid=f"richtext-{model._meta.label}",
+    )
+
+for model in CONTENT_ADDRESSED_FIELDS:
+    uid = f"blobs-{model._meta.label}"
+    pre_save.connect(remember_blob, sender=model, dispatch_uid=uid)
+    post_save.connect(count_blob_reference, sender=model, dispatch_uid=uid)
+    post_delete.connect(release_blob_reference, sender=model, dispatch_uid=uid)
+
+for model in CACHED_RESOURCES:
+    uid = f"cache-{model._meta.label}"
+    post_save.connect(invalidate_cached_resources, sender=model, dispatch_uid=uid)
+    post_delete.connect(invalidate_cached_resources, sender=model, dispatch_uid=uid)
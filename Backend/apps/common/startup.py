@@ -0,0 +1,97 @@
+"""
+Process start-up timing for the import-time budget (``STARTUP_BUDGET_MS``).
+
+Web and Celery workers are restarted often, so everything imported while
+Django starts is paid again on every restart.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+
+from django.conf import settings
+
+# What each kind of process runs before it can serve its first request or task
+STARTUP_TARGETS = {
+    "setup": "import django; django.setup()",
+    "web": "import django; django.setup(); import config.urls",
+    "worker": "import django; django.setup(); import apps.users.tasks",
+}
+
+DEFAULT_BUDGET_MS = {"setup": 2000, "web": 2500, "worker": 2000}
+
+
+def startup_budget(target):
+    return getattr(settings, "STARTUP_BUDGET_MS", DEFAULT_BUDGET_MS)[target]
+
+
+@dataclass
+class ImportTiming:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+@dataclass
+class StartupProfile:
+    target: str
+    wall_ms: float
+    imports: list = field(default_factory=list)
+    modules: list = field(default_factory=list)
+
+    def slowest(self, count, key="cumulative_us", top_level=True):
+        timings = [i for i in self.imports if i.depth == 0 or not top_level]
+        return sorted(timings, key=lambda i: getattr(i, key), reverse=True)[:count]
+
+
+def parse_importtime(output):
+    """``ImportTiming`` rows from the stderr of ``python -X importtime``."""
+    timings = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        timings.append(
+            ImportTiming(name.strip(), int(self_us), int(cumulative_us), depth)
+        )
+    return timings
+
+
+def profile_startup(target="web", importtime=True):
+    """
+    Start a fresh interpreter running ``STARTUP_TARGETS[target]`` and time it,
+    interpreter start included. ``-X importtime`` adds its own overhead, so
+    budgets are checked with ``importtime=False``.
+    """
+    code = (
+        STARTUP_TARGETS[target]
+        + "; import sys, json; print(json.dumps(sorted(sys.modules)))"
+    )
+    command = [
+        sys.executable,
+        *(["-X", "importtime"] if importtime else []),
+        "-c",
+        code,
+    ]
+    env = {**os.environ}
+    env.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+    started = time.perf_counter()
+    result = subprocess.run(
+        command, cwd=settings.BASE_DIR, env=env, capture_output=True, text=True
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode:
+        raise RuntimeError(f"{target} start-up failed:\n{result.stderr[-2000:]}")
+
+    return StartupProfile(
+        target=target,
+        wall_ms=wall_ms,
+        imports=parse_importtime(result.stderr) if importtime else [],
+        modules=json.loads(result.stdout.strip().splitlines()[-1]),
+    )
@@ -0,0 +1,85 @@
+import hashlib
+import posixpath
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+from django.utils.timezone import now
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores every file under the SHA-256 of its content, so uploading the same
+    bytes twice keeps a single copy on disk:
+
+        gallery/images/photo.JPG -> blobs/3f/a1/3fa1...9c.jpg
+
+    Blobs are shared between rows, so ``delete()`` never removes bytes. Rows
+    referencing a blob are counted in ``StoredBlob`` by the signals in
+    ``apps.common.signals``; unreferenced blobs are removed by the
+    ``gc_media_blobs`` management command.
+    """
+
+    prefix = "blobs"
+
+    def __init__(self, prefix=None, **kwargs):
+        if prefix is not None:
+            self.prefix = prefix
+        kwargs.setdefault("allow_overwrite", True)
+        super().__init__(**kwargs)
+
+    def blob_name(self, digest, name):
+        extension = posixpath.splitext(name)[1].lower()
+        return posixpath.join(
+            self.prefix.strip("/"), digest[:2], digest[2:4], f"{digest}{extension}"
+        )
+
+    def save(self, name, content, max_length=None):
+        from apps.common.models import StoredBlob
+
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+
+        sha256 = hashlib.sha256()
+        for chunk in content.chunks():
+            sha256.update(chunk)
+        content.seek(0)
+        name = self.blob_name(sha256.hexdigest(), name)
+
+        if not self.exists(name):
+            # Identical content may race us here; overwriting with the same
+            # bytes is harmless, which is why ``allow_overwrite`` is on.
+            name = self._save(name, content)
+
+        blob, created = StoredBlob.objects.get_or_create(
+            name=name, defaults={"size": content.size}
+        )
+        if not created:
+            # Re-uploaded orphans get a fresh grace period before collection.
+            StoredBlob.objects.filter(pk=blob.pk).update(updated_at=now())
+        return name
+
+    def delete(self, name):
+        """Blobs may be shared; ``gc_media_blobs`` removes them once orphaned."""
+
+    def purge(self, name):
+        super().delete(name)
+
+
+@deconstructible
+class CKEditorContentStorage(ContentAddressedStorage):
+    """
+    Content-addressed storage for CKEditor uploads. Blobs stay under
+    ``CKEDITOR_UPLOAD_PATH`` so the CKEditor image browser still finds them.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("prefix", settings.CKEDITOR_UPLOAD_PATH)
+        super().__init__(**kwargs)
+
+
+content_storage = ContentAddressedStorage()
@@ -1,3 +1,409 @@
-from django.test import TestCase
+import datetime
+import json
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+import jdatetime
+from apps.users.tasks import process_uploaded_image
+from config.settings.base import cache_config, database_config
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APIClient
+
+from .cache import resource_stamp
+from .instrumentation import RequestMetrics, buffer, current_metrics, timed_serializer
+from .jalali import (
+    format_jalali,
+    jalali_month,
+    jalali_month_range,
+    parse_jalali,
+    to_jalali,
+    to_jalali_many,
+)
+from .models import Category, Gallery, Services, StoredBlob, SubCategory
+from .renditions import generate_renditions, rendition_name
+from .richtext import render_rich_text
+from .serializers import GallerySerializer, ServicesSerializer
+from .startup import parse_importtime, profile_startup, startup_budget
+from .storage import content_storage
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image(width, height, image_format="PNG"):
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), "red").save(buffer, format=image_format)
+    return ContentFile(buffer.getvalue(), name=f"photo.{image_format.lower()}")
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class TestRenditions(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def test_renditions_keep_aspect_ratio_beside_original(self):
+        """renditions are stored next to the original and never squashed"""
+        name = default_storage.save("gallery/images/photo.png", make_image(1000, 500))
+        written = generate_renditions(name)
+
+        self.assertIn("gallery/images/photo.thumbnail.webp", written)
+        with default_storage.open(rendition_name(name, "thumbnail", "jpg")) as f:
+            self.assertEqual(Image.open(f).size, (320, 160))
+        with default_storage.open(rendition_name(name, "large", "webp")) as f:
+            self.assertEqual(Image.open(f).size, (1000, 500))  # never upscaled
+
+    def test_existing_renditions_are_not_rebuilt(self):
+        name = default_storage.save("gallery/images/again.png", make_image(40, 40))
+        generate_renditions(name)
+        self.assertEqual(generate_renditions(name), [])
+
+    @mock.patch("apps.users.tasks.process_uploaded_image.delay")
+    def test_originals_are_served_until_renditions_are_backfilled(self, delay):
+        gallery = Gallery.objects.create(image=make_image(50, 50))
+        urls = GallerySerializer(gallery).data["image_renditions"]
+        self.assertEqual(urls["thumbnail"]["webp"], gallery.image.url)
+
+        call_command("generate_renditions", stdout=StringIO())
+        gallery.refresh_from_db()
+        # The row records its renditions; rendering does not ask the storage
+        with mock.patch.object(type(gallery.image.storage), "exists") as exists:
+            urls = GallerySerializer(gallery).data["image_renditions"]
+        exists.assert_not_called()
+        thumbnail = rendition_name(gallery.image.name, "thumbnail", "webp")
+        self.assertEqual(urls["thumbnail"]["webp"], default_storage.url(thumbnail))
+
+    @mock.patch("apps.users.tasks.process_uploaded_image.delay")
+    def test_saving_an_image_queues_renditions_by_storage_name(self, delay):
+        with self.captureOnCommitCallbacks(execute=True):
+            gallery = Gallery.objects.create(image=make_image(10, 10))
+        delay.assert_called_once_with(gallery.image.name)
+
+    @mock.patch("apps.users.tasks.process_uploaded_image.delay")
+    def test_built_renditions_are_recorded_and_invalidate_the_cache(self, delay):
+        gallery = Gallery.objects.create(image=make_image(30, 30))
+        stamp = resource_stamp("gallery")
+        with self.captureOnCommitCallbacks(execute=True):
+            process_uploaded_image(gallery.image.name)
+        self.assertGreater(resource_stamp("gallery"), stamp)
+        gallery.refresh_from_db()
+        self.assertEqual(gallery.renditions_for, gallery.image.name)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+@mock.patch("apps.users.tasks.process_uploaded_image.delay")
+class TestContentAddressedStorage(TestCase):
+    def create_gallery(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Gallery.objects.create(image=make_image(30, 20))
+
+    def test_same_content_is_stored_once_and_reference_counted(self, delay):
+        first = self.create_gallery()
+        second = self.create_gallery()
+
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(first.image.name.startswith("blobs/"))
+        self.assertEqual(StoredBlob.objects.get().ref_count, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(StoredBlob.objects.get().ref_count, 1)
+        self.assertTrue(content_storage.exists(second.image.name))
+
+    def test_gc_removes_only_orphaned_blobs(self, delay):
+        kept = self.create_gallery()
+        orphan = content_storage.save("gallery/images/x.png", make_image(5, 5))
+        renditions = generate_renditions(orphan)
+        self.assertEqual(len(renditions), 6)
+
+        call_command("gc_media_blobs", "--grace-hours=0", stdout=mock.Mock())
+
+        self.assertFalse(content_storage.exists(orphan))
+        self.assertTrue(content_storage.exists(kept.image.name))
+        for name in renditions:
+            self.assertFalse(content_storage.exists(name))
+        self.assertEqual(StoredBlob.objects.get().name, kept.image.name)
+
+
+class TestCachedContent(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        Services.objects.create(title="Print", description="<p>x</p>", image="a.jpg")
+
+    def test_repeated_anonymous_hits_run_no_queries(self):
+        url = reverse("service-list-create")
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(first["ETag"], second["ETag"])
+
+    def test_write_invalidates_and_conditional_get_returns_304(self):
+        url = reverse("service-list-create")
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        queue = mock.patch("celery.app.task.Task.apply_async")
+        with queue, self.captureOnCommitCallbacks(execute=True):
+            Services.objects.create(title="Design", description="", image="b.jpg")
+            # Other connections cannot see the row before the commit
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+class TestCategoryTree(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def add_categories(self, count, subcategories_each):
+        # Commit callbacks also queue the images' renditions
+        queue = mock.patch("celery.app.task.Task.apply_async")
+        with queue, self.captureOnCommitCallbacks(execute=True):
+            for index in range(count):
+                category = Category.objects.create(
+                    name=f"Category {index}", description="", image="c.jpg"
+                )
+                SubCategory.objects.bulk_create(
+                    SubCategory(category=category, name=f"Sub {n}", image="s.jpg")
+                    for n in range(subcategories_each)
+                )
+
+    def assert_query_count_constant(self, url):
+        self.add_categories(1, 1)
+        with self.assertNumQueries(2):
+            self.client.get(url)
+
+        self.add_categories(20, 5)  # also invalidates the cached response
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        return response.json()
+
+    def test_tree_is_two_queries_regardless_of_size(self):
+        tree = self.assert_query_count_constant(reverse("category-tree"))
+        self.assertEqual(len(tree), 21)
+        self.assertEqual(sum(len(c["subcategories"]) for c in tree), 101)
+
+    def test_category_list_prefetches_subcategories(self):
+        categories = self.assert_query_count_constant(reverse("category-list"))
+        self.assertEqual(len(categories[0]["subcategories"]), 5)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class TestRichText(TestCase):
+    def test_sanitizes_and_excerpts(self):
+        rendered = render_rich_text(
+            '<p onclick="x()" style="color: red; background: url(x)">Hi'
+            '<script>alert(1)</script> <a href="javascript:alert(1)">there</a>'
+            '<iframe src="//evil"></iframe> &amp; welcome</p><unknown>!</unknown>'
+        )
+
+        self.assertEqual(
+            rendered.html, '<p style="color: red">Hi <a>there</a> &amp; welcome</p>!'
+        )
+        self.assertEqual(rendered.excerpt, "Hi there & welcome!")
+
+    @mock.patch("apps.users.tasks.process_uploaded_image.delay")
+    @mock.patch("apps.users.tasks.process_rich_text_images.delay")
+    def test_embedded_images_use_renditions_once_built(self, delay, _):
+        name = default_storage.save("uploads/ckeditor/photo.png", make_image(8, 8))
+        html = f'<img alt="x" src="{default_storage.url(name)}">'
+
+        with self.captureOnCommitCallbacks(execute=True):
+            service = Services.objects.create(
+                title="Print", description=html, image="a.jpg"
+            )
+        self.assertEqual(service.description_html, html)
+        delay.assert_called_once_with("common.Services", service.pk)
+
+        generate_renditions(name)
+        service.save()
+        self.assertIn(
+            'src="/media/uploads/ckeditor/photo.large.jpg"', service.description_html
+        )
+        self.assertIn("photo.thumbnail.webp 320w", service.description_html)
+
+    def test_lists_serve_the_excerpt_instead_of_the_body(self):
+        cache.clear()
+        service = Services.objects.create(
+            title="Print", description="<p>" + "word " * 500 + "</p>", image="a.jpg"
+        )
+
+        listed = APIClient().get(reverse("service-list-create")).json()[0]
+        self.assertNotIn("description", listed)
+        self.assertLessEqual(len(listed["description_excerpt"]), 300)
+
+        detail = APIClient().get(reverse("service-detail", args=[service.pk])).json()
+        self.assertEqual(detail["description_html"], service.description_html)
+
+
+class TestInstrumentation(TestCase):
+    def setUp(self):
+        cache.clear()
+        buffer.clear()
+        self.client = APIClient()
+        Services.objects.create(title="Print", description="", image="a.jpg")
+
+    def test_requests_are_recorded_with_their_queries(self):
+        with override_settings(INSTRUMENTATION={"SLOW_REQUEST_MS": 0}):
+            with self.assertLogs("apps.instrumentation", "WARNING"):
+                self.client.get(reverse("service-list-create"))
+
+        [record] = buffer.snapshot()
+        self.assertEqual(record["view"], "apps.common.views.ServiceListCreate")
+        self.assertEqual(record["status"], 200)
+        self.assertGreaterEqual(record["queries"], 1)
+        self.assertEqual(len(record["sql"]), record["queries"])
+
+    def test_fast_requests_drop_their_sql(self):
+        self.client.get(reverse("service-list-create"))
+        self.assertEqual(buffer.snapshot()[0]["sql"], [])
+
+    def test_serializer_time_is_attributed_to_the_request(self):
+        metrics = RequestMetrics(method="GET", path="/", started_at="")
+        token = current_metrics.set(metrics)
+        try:
+            serializer = timed_serializer(
+                ServicesSerializer(Services.objects.all(), many=True)
+            )
+            self.assertEqual(len(serializer.data), 1)
+        finally:
+            current_metrics.reset(token)
+        self.assertGreater(metrics.serializer_ms, 0)
+
+    def test_endpoint_is_admin_only(self):
+        url = reverse("instrumentation")
+        self.assertIn(self.client.get(url).status_code, (401, 403))
+
+        admin = get_user_model().objects.create_superuser(
+            first_name="A", last_name="B", email="admin@example.com", password="x"
+        )
+        self.client.force_authenticate(admin)
+        self.client.get(reverse("service-list-create"))
+        response = self.client.get(url, {"view": "ServiceListCreate"})
+
+        self.assertEqual(response.status_code, 200)
+        summary = response.json()["summary"]["apps.common.views.ServiceListCreate"]
+        self.assertEqual(summary["count"], 1)
+
+
+class TestSettingsProfile(TestCase):
+    def test_middleware_runs_once_each(self):
+        self.assertEqual(len(settings.MIDDLEWARE), len(set(settings.MIDDLEWARE)))
+
+    def test_sqlite_connections_use_tuned_pragmas(self):
+        database = database_config(conn_max_age=600)
+        self.assertEqual(database["CONN_MAX_AGE"], 600)
+        self.assertTrue(database["CONN_HEALTH_CHECKS"])
+        self.assertIn("PRAGMA journal_mode=WAL", database["OPTIONS"]["init_command"])
+
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+
+    def test_database_url(self):
+        database = database_config("postgres://user:secret@db:5432/tamadon", 60)
+        self.assertEqual(database["NAME"], "tamadon")
+        self.assertEqual(database["CONN_MAX_AGE"], 60)
+        self.assertNotIn("init_command", database.get("OPTIONS", {}))
+
+    def test_cache_url(self):
+        self.assertEqual(
+            cache_config("file:///var/tmp/cache")["LOCATION"], "/var/tmp/cache"
+        )
+        self.assertTrue(
+            cache_config("redis://localhost:6379/1")["BACKEND"].endswith("RedisCache")
+        )
+        self.assertTrue(cache_config("locmem://")["BACKEND"].endswith("LocMemCache"))
+        with self.assertRaises(ImproperlyConfigured):
+            cache_config("memcached://localhost")
+
+
+class TestStartupBudget(TestCase):
+    def test_parse_importtime(self):
+        timings = parse_importtime(
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   json.decoder\n"
+            "import time:       300 |        420 | json\n"
+        )
+        self.assertEqual(
+            [(t.module, t.self_us, t.cumulative_us, t.depth) for t in timings],
+            [("json.decoder", 120, 120, 1), ("json", 300, 420, 0)],
+        )
+
+    def test_web_and_worker_start_within_budget(self):
+        for target in ("web", "worker"):
+            profile = profile_startup(target, importtime=False)
+            self.assertLessEqual(profile.wall_ms, startup_budget(target), target)
+
+            self.assertNotIn("networkx", profile.modules)
+            if target == "worker":
+                # workers never render API responses
+                self.assertNotIn("rest_framework.serializers", profile.modules)
+
+
+class TestJalali(TestCase):
+    def test_table_matches_jdatetime(self):
+        day = datetime.date(2023, 1, 1)
+        # 2024 is leap in both calendars; 1403 ends on 20 March 2025
+        while day < datetime.date(2026, 1, 1):
+            expected = jdatetime.date.fromgregorian(date=day)
+            self.assertEqual(
+                to_jalali(day), (expected.year, expected.month, expected.day)
+            )
+            self.assertEqual(parse_jalali(expected.strftime("%Y/%m/%d")), day)
+            day += datetime.timedelta(days=1)
+
+    def test_days_outside_the_table(self):
+        day = datetime.date(1990, 3, 21)
+        self.assertEqual(to_jalali(day), (1369, 1, 1))
+        self.assertEqual(parse_jalali("1369-01-01"), day)
+        self.assertEqual(
+            to_jalali_many([day, datetime.datetime(2024, 3, 20, 23, 0)]),
+            [(1369, 1, 1), (1403, 1, 1)],
+        )
+
+    def test_formatting_parsing_and_months(self):
+        self.assertEqual(format_jalali(datetime.date(2026, 10, 19)), "1405-07-27")
+        self.assertEqual(parse_jalali("1405-7-27"), datetime.date(2026, 10, 19))
+        for invalid in ["1404-12-30", "1405-13-01", "1405-07", "27-07-1405x"]:
+            with self.assertRaises(ValueError):
+                parse_jalali(invalid)
+
+        self.assertEqual(jalali_month(datetime.date(2026, 10, 19)), (1405, 7))
+        self.assertEqual(
+            jalali_month_range(1403, 12),
+            (datetime.date(2025, 2, 19), datetime.date(2025, 3, 20)),
+        )
+
+    def test_benchmark_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "jalali.json")
+            call_command(
+                "benchmark_jalali", dates=1000, output=output, stdout=StringIO()
+            )
+            with open(output) as fp:
+                results = json.load(fp)
+        self.assertEqual(results["dates"], 1000)
+        self.assertEqual(
+            set(results["ms"]), {"jdatetime", "format_jalali", "to_jalali_many"}
+        )
@@ -9,6 +9,7 @@ from .views import (
     GalleryCategoryViewSet,
     GalleryViewSet,
     ImageUploadView,
+    InstrumentationView,
     ServiceDelete,
     ServiceDetail,
     ServiceListCreate,
@@ -37,6 +38,7 @@ urlpatterns = [
     path(
         "common/upload-image/<int:pk>/", ImageUploadView.as_view(), name="delete-image"
     ),
+    path("instrumentation/", InstrumentationView.as_view(), name="instrumentation"),
     path("", include(router.urls)),
     path(
         "customer-images/",
@@ -9,14 +9,17 @@ from apps.users.tasks import (
     process_service_creation,
     process_service_deletion,
     process_service_update,
-    process_uploaded_image,
 )
+from django.db.models import Prefetch
 from django.http import JsonResponse
 from rest_framework import generics, status, viewsets
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.decorators import action
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .cache import CachedContentMixin
+from .instrumentation import buffer, summarize
 from .models import (
     AboutModel,
     Category,
@@ -30,6 +33,7 @@ from .models import (
 from .serializers import (
     AboutModelSerializer,
     CategorySerializer,
+    CategoryTreeSerializer,
     CustomerImagesSerializer,
     GalleryCategorySerializer,
     GallerySerializer,
@@ -40,7 +44,8 @@ from .serializers import (
 
 
 # View for listing and creating services
-class ServiceListCreate(generics.ListCreateAPIView):
+class ServiceListCreate(CachedContentMixin, generics.ListCreateAPIView):
+    cache_resource = "services"
     queryset = Services.objects.all()
     serializer_class = ServicesSerializer
     permission_classes = [AllowAny]
@@ -51,7 +56,8 @@ class ServiceListCreate(generics.ListCreateAPIView):
 
 
 # View for retrieving details of a single service
-class ServiceDetail(generics.RetrieveAPIView):
+class ServiceDetail(CachedContentMixin, generics.RetrieveAPIView):
+    cache_resource = "services"
     queryset = Services.objects.all()
     serializer_class = ServicesSerializer
     permission_classes = [AllowAny]
@@ -96,11 +102,15 @@ class ServiceUpdate(generics.UpdateAPIView):
         serializer.save()
 
 
-class ImageUploadView(APIView):
+class ImageUploadView(CachedContentMixin, APIView):
     permission_classes = [AllowAny]
+    cache_resource = "slider"
 
     def get(self, request, pk=None):
         """Handle GET request to retrieve all images or a specific image."""
+        return self.cached_response(request, self.get_images, pk=pk)
+
+    def get_images(self, request, pk=None):
         if pk:
             try:
                 image = Images.objects.get(pk=pk)
@@ -123,10 +133,9 @@ class ImageUploadView(APIView):
             )
 
         image = request.data["image"]
+        # Renditions are generated by the post_save signal in apps.common.signals
         new_image = Images.objects.create(images=image)
 
-        process_uploaded_image.delay(new_image.images.url)
-
         return Response(
             {
                 "id": new_image.id,
@@ -149,8 +158,6 @@ class ImageUploadView(APIView):
             image_instance.images = image
             image_instance.save()
 
-            process_uploaded_image.delay(image_instance.images.url)
-
         serializer = ImagesSerializer(image_instance, context={"request": request})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -173,7 +180,8 @@ class ImageUploadView(APIView):
             )
 
 
-class GalleryCategoryViewSet(viewsets.ModelViewSet):
+class GalleryCategoryViewSet(CachedContentMixin, viewsets.ModelViewSet):
+    cache_resource = "gallery"
     queryset = GalleryCategory.objects.all()
     serializer_class = GalleryCategorySerializer
     permission_classes = [AllowAny]
@@ -192,7 +200,8 @@ class GalleryCategoryViewSet(viewsets.ModelViewSet):
         log_delete_category.delay(category_id)
 
 
-class GalleryViewSet(viewsets.ModelViewSet):
+class GalleryViewSet(CachedContentMixin, viewsets.ModelViewSet):
+    cache_resource = "gallery"
     queryset = Gallery.objects.all()
     serializer_class = GallerySerializer
     permission_classes = [AllowAny]
@@ -226,14 +235,15 @@ class GalleryViewSet(viewsets.ModelViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class AboutModelViewSet(viewsets.ModelViewSet):
-
+class AboutModelViewSet(CachedContentMixin, viewsets.ModelViewSet):
+    cache_resource = "about"
     queryset = AboutModel.objects.all()
     serializer_class = AboutModelSerializer
     permission_classes = [AllowAny]
 
 
-class CustomerImagesListCreateView(generics.ListCreateAPIView):
+class CustomerImagesListCreateView(CachedContentMixin, generics.ListCreateAPIView):
+    cache_resource = "customer-images"
     queryset = CustomerImages.objects.all()
     serializer_class = CustomerImagesSerializer
     permission_classes = [AllowAny]
@@ -245,11 +255,31 @@ class CustomerImageRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIVi
     permission_classes = [AllowAny]
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
-    queryset = Category.objects.all()
+class CategoryViewSet(CachedContentMixin, viewsets.ModelViewSet):
+    cache_resource = "categories"
+    queryset = Category.objects.prefetch_related("subcategories")
     serializer_class = CategorySerializer
     permission_classes = [AllowAny]
 
+    @action(detail=False, methods=["get"], url_path="tree")
+    def tree(self, request, *args, **kwargs):
+        """Whole category -> subcategory tree in two queries."""
+        return self.cached_response(request, self.get_tree)
+
+    def get_tree(self, request):
+        queryset = Category.objects.only("id", "name", "image").prefetch_related(
+            Prefetch(
+                "subcategories",
+                queryset=SubCategory.objects.only(
+                    "id", "name", "image", "renditions_for", "category"
+                ),
+            )
+        )
+        serializer = CategoryTreeSerializer(
+            queryset, many=True, context=self.get_serializer_context()
+        )
+        return Response(serializer.data)
+
 
 from rest_framework import viewsets
 from apps.common.models import SubCategory
@@ -257,7 +287,8 @@ from apps.common.serializers import SubCategorySerializer
 from rest_framework.permissions import AllowAny
 
 
-class SubCategoryViewSet(viewsets.ModelViewSet):
+class SubCategoryViewSet(CachedContentMixin, viewsets.ModelViewSet):
+    cache_resource = "categories"
     queryset = SubCategory.objects.all()
     serializer_class = SubCategorySerializer
     permission_classes = [AllowAny]
@@ -278,3 +309,30 @@ class SubCategoryViewSet(viewsets.ModelViewSet):
                 )
 
         return super().create(request, *args, **kwargs)
+
+
+class InstrumentationView(APIView):
+    """
+    Recent request metrics of this process (newest first) and a per-view
+    summary. Filters: ``?view=`` (substring), ``?slow=1``, ``?limit=``.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        requests = buffer.snapshot()
+        view = request.query_params.get("view")
+        if view:
+            requests = [item for item in requests if view in item["view"]]
+        if request.query_params.get("slow"):
+            requests = [item for item in requests if item["sql"]]
+        try:
+            limit = int(request.query_params.get("limit", 100))
+        except ValueError:
+            limit = 100
+        return Response(
+            {
+                "summary": summarize(requests),
+                "requests": requests[::-1][:limit],
+            }
+        )
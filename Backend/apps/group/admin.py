@@ -1,49 +1,90 @@
-import csv
+from itertools import chain
 
-import openpyxl
+from apps.common.paginators import EstimatedCountPaginator
 from apps.users.models import User
 from django import forms
-from django.contrib import admin
-from django.core.exceptions import ValidationError
-from django.http import HttpResponse
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.http import FileResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
-from import_export import resources
-from import_export.admin import ExportMixin
-
-from .models import Category, Order, ReceptionOrder
-
-
-# Create a resource for the Order model
-class OrderResource(resources.ModelResource):
-    designer = resources.Field(attribute="designer", column_name="Designer")
-    category = resources.Field(attribute="category", column_name="Category")
-
-    class Meta:
-        model = Order
-        fields = (
-            "order_name",
-            "customer_name",
-            "designer",
-            "category",
-            "status",
-            "created_at",
-            "updated_at",
-        )
 
-    def dehydrate_designer(self, order):
-        # Use first_name and last_name to represent the designer
-        return (
-            f"{order.designer.first_name} {order.designer.last_name}"
-            if order.designer
-            else None
+from .exports import start_export
+from .models import Category, ExportJob, ImportJob, Order, ReceptionOrder
+
+
+class DesignerListFilter(admin.SimpleListFilter):
+    """Designers only, rather than every user as the default filter lists."""
+
+    title = _("designer")
+    parameter_name = "designer__id__exact"
+
+    def lookups(self, request, model_admin):
+        designers = User.objects.filter(role=User.Designer).order_by(
+            "first_name", "last_name"
         )
+        return [
+            (pk, f"{first_name} {last_name}")
+            for pk, first_name, last_name in designers.values_list(
+                "pk", "first_name", "last_name"
+            )
+        ]
 
-    def dehydrate_category(self, order):
-        return order.category.name if order.category else None
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(designer_id=self.value())
+
+
+class StatusListFilter(admin.SimpleListFilter):
+    """Statuses are category stages, read off the categories, not the orders."""
+
+    title = _("status")
+    parameter_name = "status"
+
+    def lookups(self, request, model_admin):
+        stages = Category.objects.values_list("stages", flat=True)
+        return [(stage, stage) for stage in dict.fromkeys(chain.from_iterable(stages))]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(status=self.value())
+
+
+# Changelist parameters an export over every matching order keeps
+EXPORT_PARAMETERS = {
+    "status": "status",
+    "category__id__exact": "category",
+    "designer__id__exact": "designer",
+    "created_at__year": "year",
+    "created_at__month": "month",
+    "created_at__day": "day",
+    "q": "search",
+}
+IGNORED_PARAMETERS = {"o", "p", "designer"}
+
+
+def export_filters(request, queryset):
+    """
+    Export filters for the orders an admin action was applied to: the
+    changelist filters when "select all" was used, else the selected ids.
+    ``ValidationError`` if "select all" was used with a filter exports lack.
+    """
+    if request.POST.get("select_across") != "1":
+        return {"ids": list(queryset.values_list("pk", flat=True))}
+    params = set(request.GET) - IGNORED_PARAMETERS
+    unknown = params - EXPORT_PARAMETERS.keys()
+    if unknown:
+        raise ValidationError(
+            f"Exports cannot filter by {', '.join(sorted(unknown))}; "
+            "select the orders instead."
+        )
+    return {EXPORT_PARAMETERS[name]: request.GET[name] for name in params}
 
 
 # Customizing the admin for Order
-class OrderAdmin(ExportMixin, admin.ModelAdmin):
+class OrderAdmin(admin.ModelAdmin):
     list_display = (
         "order_name",
         "customer_name",
@@ -54,16 +95,16 @@ class OrderAdmin(ExportMixin, admin.ModelAdmin):
         "created_at",
         "updated_at",
     )
-    search_fields = (
-        "order_name",
-        "customer_name",
-        "designer__first_name",
-        "designer__last_name",
-    )
-    list_filter = ("status", "category", "designer")
+    list_select_related = ("designer", "category")
+    # Designers are picked with the filter; searching their names joined users
+    search_fields = ("=secret_key", "order_name", "customer_name")
+    list_filter = (StatusListFilter, "category", DesignerListFilter)
+    autocomplete_fields = ("designer", "category")
     ordering = ("-created_at",)
-
-    resource_class = OrderResource
+    date_hierarchy = "created_at"
+    change_list_template = "admin/calendar_change_list.html"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     # Designer Filter Form
     class DesignerFilterForm(forms.Form):
@@ -73,171 +114,37 @@ class OrderAdmin(ExportMixin, admin.ModelAdmin):
             label="Select Designer",
         )
 
-    # Custom action for exporting orders based on designer
-    def export_orders_by_designer(self, request, queryset):
-        designer_id = request.GET.get("designer", None)
-
-        if designer_id:
-            queryset = queryset.filter(designer_id=designer_id)
-
-        # Create a CSV response
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = (
-            'attachment; filename="orders_by_designer.csv"'
-        )
-        writer = csv.writer(response)
-
-        # Writing headers
-        writer.writerow(
-            [
-                "Order Name",
-                "Customer Name",
-                "Designer",
-                "Category",
-                "Status",
-                "Created At",
-                "Updated At",
-            ]
+    def queue_export(self, request, queryset, format, by_designer=False):
+        try:
+            filters = export_filters(request, queryset)
+            designer_id = request.GET.get("designer") if by_designer else None
+            if designer_id:
+                filters["designer"] = designer_id
+            job = start_export(request.user, format, filters)
+        except ValidationError as e:
+            self.message_user(request, " ".join(e.messages), messages.ERROR)
+            return
+        url = reverse("admin:group_exportjob_change", args=[job.pk])
+        self.message_user(
+            request,
+            format_html('<a href="{}">Export {}</a> was queued.', url, job.pk),
         )
 
-        # Writing data rows
-        for order in queryset:
-            writer.writerow(
-                [
-                    order.order_name,
-                    order.customer_name,
-                    f"{order.designer.first_name} {order.designer.last_name}",
-                    order.category.name,
-                    order.status,
-                    order.created_at,
-                    order.updated_at,
-                ]
-            )
-
-        return response
-
-    # Custom action for exporting all orders (CSV format)
+    @admin.action(description=_("Export orders (CSV)"))
     def export_all_orders(self, request, queryset):
-        # Create a CSV response for all orders
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = 'attachment; filename="all_orders.csv"'
-        writer = csv.writer(response)
-
-        # Writing headers
-        writer.writerow(
-            [
-                "Order Name",
-                "Customer Name",
-                "Designer",
-                "Category",
-                "Status",
-                "Created At",
-                "Updated At",
-            ]
-        )
+        self.queue_export(request, queryset, ExportJob.Format.CSV)
 
-        # Writing data rows
-        for order in queryset:
-            writer.writerow(
-                [
-                    order.order_name,
-                    order.customer_name,
-                    f"{order.designer.first_name} {order.designer.last_name}",
-                    order.category.name,
-                    order.status,
-                    order.created_at,
-                    order.updated_at,
-                ]
-            )
+    @admin.action(description=_("Export orders (Excel)"))
+    def export_all_orders_excel(self, request, queryset):
+        self.queue_export(request, queryset, ExportJob.Format.XLSX)
 
-        return response
+    @admin.action(description=_("Export orders by designer (CSV)"))
+    def export_orders_by_designer(self, request, queryset):
+        self.queue_export(request, queryset, ExportJob.Format.CSV, by_designer=True)
 
-    # Custom action for exporting orders to Excel (based on designer)
+    @admin.action(description=_("Export orders by designer (Excel)"))
     def export_orders_by_designer_excel(self, request, queryset):
-        designer_id = request.GET.get("designer", None)
-        if designer_id:
-            queryset = queryset.filter(designer_id=designer_id)
-
-        # Create an Excel response
-        response = HttpResponse(
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-        response["Content-Disposition"] = (
-            'attachment; filename="orders_by_designer.xlsx"'
-        )
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Orders"
-
-        # Writing headers
-        headers = [
-            "Order Name",
-            "Customer Name",
-            "Designer",
-            "Category",
-            "Status",
-            "Created At",
-            "Updated At",
-        ]
-        ws.append(headers)
-
-        # Writing data rows
-        for order in queryset:
-            ws.append(
-                [
-                    order.order_name,
-                    order.customer_name,
-                    f"{order.designer.first_name} {order.designer.last_name}",
-                    order.category.name,
-                    order.status,
-                    order.created_at,
-                    order.updated_at,
-                ]
-            )
-
-        wb.save(response)
-        return response
-
-    # Custom action for exporting all orders to Excel
-    def export_all_orders_excel(self, request, queryset):
-        # Create an Excel response for all orders
-        response = HttpResponse(
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-        response["Content-Disposition"] = 'attachment; filename="all_orders.xlsx"'
-
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Orders"
-
-        # Writing headers
-        headers = [
-            "Order Name",
-            "Customer Name",
-            "Designer",
-            "Category",
-            "Status",
-            "Created At",
-            "Updated At",
-        ]
-        ws.append(headers)
-
-        # Writing data rows
-        for order in queryset:
-            ws.append(
-                [
-                    order.order_name,
-                    order.customer_name,
-                    f"{order.designer.first_name} {order.designer.last_name}",
-                    order.category.name,
-                    order.status,
-                    order.created_at,
-                    order.updated_at,
-                ]
-            )
-
-        wb.save(response)
-        return response
+        self.queue_export(request, queryset, ExportJob.Format.XLSX, by_designer=True)
 
     # Register the custom export actions
     actions = [
@@ -276,4 +183,101 @@ from .models import AttributeType, AttributeValue
 
 admin.site.register(AttributeType)
 admin.site.register(AttributeValue)
-admin.site.register(ReceptionOrder)
+
+
+class ReceptionOrderAdmin(admin.ModelAdmin):
+    list_display = (
+        "order",
+        "reception_name",
+        "price",
+        "receive_price",
+        "reminder_price",
+        "is_checked",
+        "created_at",
+    )
+    list_select_related = ("order", "reception_name")
+    list_filter = ("is_checked",)
+    search_fields = ("=order__secret_key",)
+    raw_id_fields = ("order",)
+    autocomplete_fields = ("reception_name",)
+    date_hierarchy = "created_at"
+    change_list_template = "admin/calendar_change_list.html"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+admin.site.register(ReceptionOrder, ReceptionOrderAdmin)
+
+
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "format",
+        "status",
+        "progress",
+        "requested_by",
+        "created_at",
+        "expires_at",
+        "download_link",
+    )
+    list_select_related = ("requested_by",)
+    list_filter = ("status", "format")
+    readonly_fields = [field.name for field in ExportJob._meta.fields] + [
+        "progress",
+        "download_link",
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                "<int:pk>/download/",
+                self.admin_site.admin_view(self.download_view),
+                name="group_exportjob_download",
+            )
+        ] + super().get_urls()
+
+    def download_view(self, request, pk):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        job = get_object_or_404(ExportJob, pk=pk, status=ExportJob.Status.DONE)
+        return FileResponse(
+            job.file.open("rb"),
+            as_attachment=True,
+            filename=f"orders-{job.pk}.{job.format}",
+        )
+
+    @admin.display(description=_("Download"))
+    def download_link(self, job):
+        if job.status != ExportJob.Status.DONE:
+            return "-"
+        url = reverse("admin:group_exportjob_download", args=[job.pk])
+        return format_html('<a href="{}">{}</a>', url, job.file.name)
+
+
+admin.site.register(ExportJob, ExportJobAdmin)
+
+
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "format",
+        "dry_run",
+        "status",
+        "total_rows",
+        "imported_rows",
+        "failed_rows",
+        "requested_by",
+        "created_at",
+    )
+    list_select_related = ("requested_by",)
+    list_filter = ("status", "dry_run")
+    readonly_fields = [field.name for field in ImportJob._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+
+admin.site.register(ImportJob, ImportJobAdmin)
@@ -0,0 +1,217 @@
+"""
+Order exports written in the background.
+
+``start_export`` records an ``ExportJob`` and queues ``export_orders``; the
+task reads the orders in primary key chunks (each one an indexed range
+query returning plain values), streams them into a CSV or write-only XLSX
+file, records the rows written after every chunk, and stores the file under
+``MEDIA_ROOT/exports/``. ``expire_exports`` removes files past their
+``EXPORT_TTL``.
+
+Exports are filtered with ``EXPORT_FILTERS`` plus ``search``, matched like
+the order changelist search; at most ``EXPORT_MAX_IDS`` orders can be
+picked by id.
+"""
+
+import csv
+import datetime
+import io
+import tempfile
+import uuid
+
+import openpyxl
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import smart_split, unescape_string_literal
+
+from .models import ExportJob, Order
+
+EXPORT_CHUNK_SIZE = getattr(settings, "EXPORT_CHUNK_SIZE", 2000)
+EXPORT_TTL = getattr(settings, "EXPORT_TTL", datetime.timedelta(days=1))
+EXPORT_MAX_IDS = getattr(settings, "EXPORT_MAX_IDS", 10000)
+
+# filter -> order lookup
+EXPORT_FILTERS = {
+    "ids": "pk__in",
+    "status": "status",
+    "category": "category_id",
+    "designer": "designer_id",
+    "year": "created_at__year",
+    "month": "created_at__month",
+    "day": "created_at__day",
+}
+
+HEADERS = [
+    "Order Name",
+    "Customer Name",
+    "Designer",
+    "Category",
+    "Status",
+    "Created At",
+    "Updated At",
+]
+VALUES = [
+    "order_name",
+    "customer_name",
+    "designer__first_name",
+    "designer__last_name",
+    "category__name",
+    "status",
+    "created_at",
+    "updated_at",
+]
+
+
+def clean_filters(filters):
+    unknown = set(filters) - EXPORT_FILTERS.keys() - {"search"}
+    if unknown:
+        raise ValidationError(f"Unknown export filters: {', '.join(sorted(unknown))}")
+    ids = filters.get("ids")
+    if ids is not None and not isinstance(ids, list):
+        raise ValidationError("Export ids must be a list.")
+    if ids and len(ids) > EXPORT_MAX_IDS:
+        raise ValidationError(
+            f"At most {EXPORT_MAX_IDS} orders can be exported by id; "
+            "filter them instead."
+        )
+    return {name: value for name, value in filters.items() if value not in ("", None)}
+
+
+def search_orders(orders, query):
+    """Orders matching every word of ``query``, as the order changelist does."""
+    for word in smart_split(query):
+        if word[0] in "\"'" and word[0] == word[-1]:
+            word = unescape_string_literal(word)
+        orders = orders.filter(
+            Q(secret_key=word)
+            | Q(order_name__icontains=word)
+            | Q(customer_name__icontains=word)
+        )
+    return orders
+
+
+def export_queryset(filters):
+    filters = dict(filters)
+    search = filters.pop("search", "")
+    orders = Order.objects.filter(
+        **{EXPORT_FILTERS[name]: value for name, value in filters.items()}
+    ).order_by()
+    return search_orders(orders, search) if search else orders
+
+
+def start_export(user, format, filters=None):
+    """Record an export of the orders matching ``filters`` and queue it."""
+    from apps.users.tasks import export_orders
+
+    job = ExportJob.objects.create(
+        requested_by=user, format=format, filters=clean_filters(filters or {})
+    )
+    transaction.on_commit(lambda: export_orders.delay(job.pk))
+    return job
+
+
+def _local(moment):
+    # openpyxl rejects aware datetimes
+    return timezone.localtime(moment).replace(tzinfo=None)
+
+
+def iter_rows(job_id, orders, chunk_size=EXPORT_CHUNK_SIZE):
+    """Export rows chunk by chunk, recording progress after every chunk."""
+    last_pk, written = 0, 0
+    while True:
+        chunk = list(
+            orders.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", *VALUES)[:chunk_size]
+        )
+        if not chunk:
+            return
+        for _, name, customer, first, last, category, status, created, updated in chunk:
+            designer = f"{first} {last}" if first is not None else ""
+            yield [
+                name,
+                customer,
+                designer,
+                category,
+                status,
+                _local(created),
+                _local(updated),
+            ]
+        last_pk = chunk[-1][0]
+        written += len(chunk)
+        ExportJob.objects.filter(pk=job_id).update(exported_rows=written)
+
+
+def write_csv(buffer, rows):
+    text = io.TextIOWrapper(buffer, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    writer.writerow(HEADERS)
+    writer.writerows(rows)
+    text.flush()
+    text.detach()
+
+
+def write_xlsx(buffer, rows):
+    # Write-only workbooks keep a single row in memory
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("Orders")
+    sheet.append(HEADERS)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(buffer)
+
+
+WRITERS = {ExportJob.Format.CSV: write_csv, ExportJob.Format.XLSX: write_xlsx}
+
+
+def run_export(job_id, chunk_size=EXPORT_CHUNK_SIZE):
+    """Write the file of a pending job; returns the job, or ``None`` if taken."""
+    jobs = ExportJob.objects.filter(pk=job_id)
+    # Claimed with one UPDATE so a redelivered task does not export twice
+    if not jobs.filter(status=ExportJob.Status.PENDING).update(
+        status=ExportJob.Status.RUNNING
+    ):
+        return None
+    job = jobs.get()
+    orders = export_queryset(job.filters)
+    jobs.update(total_rows=orders.count())
+    try:
+        with tempfile.TemporaryFile() as buffer:
+            WRITERS[job.format](buffer, iter_rows(job.pk, orders, chunk_size))
+            buffer.seek(0)
+            name = job.file.storage.save(
+                f"exports/orders-{job.pk}-{uuid.uuid4().hex}.{job.format}",
+                File(buffer),
+            )
+    except Exception as e:
+        jobs.update(
+            status=ExportJob.Status.FAILED, error=str(e), finished_at=timezone.now()
+        )
+        raise
+    finished = timezone.now()
+    jobs.update(
+        status=ExportJob.Status.DONE,
+        file=name,
+        finished_at=finished,
+        expires_at=finished + EXPORT_TTL,
+    )
+    return jobs.get()
+
+
+def expire_exports(now=None):
+    """Delete the files of exports past ``expires_at``; returns how many."""
+    expired = ExportJob.objects.filter(
+        status=ExportJob.Status.DONE, expires_at__lte=now or timezone.now()
+    )
+    count = 0
+    for job in expired.iterator():
+        job.file.delete(save=False)
+        ExportJob.objects.filter(pk=job.pk).update(
+            status=ExportJob.Status.EXPIRED, file=""
+        )
+        count += 1
+    return count
@@ -0,0 +1,295 @@
+"""
+Bulk data factories for tests, benchmarks and seeding.
+
+Every ``make_*`` helper writes with chunked ``bulk_create`` and takes a
+``random.Random`` so the same seed always produces the same data.
+"""
+
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from functools import lru_cache
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.common.models import Gallery, GalleryCategory
+from apps.users.models import ChatMassage
+
+from .models import AttributeType, AttributeValue, Category, Order, ReceptionOrder
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+
+DEFAULT_STAGES = ["Designer", "Printer", "Delivered"]
+
+ROLE_NAMES = {role: name for role, name in User.ROLE_CHOICES}
+
+
+def chunked(iterable, size=BATCH_SIZE):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def bulk_create(model, objects, batch_size=BATCH_SIZE):
+    created = []
+    for batch in chunked(objects, batch_size):
+        created.extend(model.objects.bulk_create(batch))
+    return created
+
+
+@lru_cache(maxsize=None)
+def hashed_password(raw_password):
+    # Hashing is deliberately slow; seeding thousands of users hashes once.
+    return make_password(raw_password)
+
+
+@contextmanager
+def backdated(model):
+    """Let ``bulk_create`` keep explicit values of ``auto_now``/``auto_now_add``."""
+    fields = [
+        (field, field.auto_now, field.auto_now_add)
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    for field, _, _ in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in fields:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def make_user(role, email=None, **fields):
+    """An active user with ``role`` (and its profile, through the user signals)."""
+    name = ROLE_NAMES[role]
+    email = email or f"{name.lower()}{User.objects.count() + 1}@example.com"
+    user = User.objects.create_user(
+        first_name=fields.pop("first_name", name),
+        last_name=fields.pop("last_name", "User"),
+        email=email,
+        password=None,
+    )
+    fields["password"] = hashed_password(fields.get("password", "password"))
+    User.objects.filter(pk=user.pk).update(role=role, is_active=True, **fields)
+    user.refresh_from_db()
+    return user
+
+
+def make_users(roles, per_role=1):
+    return {role: [make_user(role) for _ in range(per_role)] for role in roles}
+
+
+def make_categories(count, rng, attribute_types=3, values_per_type=4):
+    """Categories with staged workflows and dropdown/input/date/checkbox attributes."""
+    categories = bulk_create(
+        Category,
+        (
+            Category(
+                name=f"Category {index}",
+                stages=DEFAULT_STAGES[: rng.randint(1, len(DEFAULT_STAGES))],
+                category_list=rng.choice(Category.CategoryList.values),
+            )
+            for index in range(count)
+        ),
+    )
+    kinds = [choice for choice, _ in AttributeType.ATTRIBUTE_CHOICE_TYPE]
+    types = bulk_create(
+        AttributeType,
+        (
+            AttributeType(
+                name=f"Attribute {index}",
+                category=category,
+                attribute_type=kinds[index % len(kinds)],
+            )
+            for category in categories
+            for index in range(attribute_types)
+        ),
+    )
+    bulk_create(
+        AttributeValue,
+        (
+            AttributeValue(attribute=attribute, attribute_value=f"Value {index}")
+            for attribute in types
+            if attribute.attribute_type == "dropdown"
+            for index in range(values_per_type)
+        ),
+    )
+    return categories
+
+
+def next_secret_keys(count):
+    start = (Order.objects.aggregate(last=Max("secret_key"))["last"] or 0) + 1
+    return range(start, start + count)
+
+
+def attribute_schema(categories):
+    """``{category_id: [(name, kind, dropdown values), ...]}`` in two queries."""
+    values = {}
+    for attribute_id, value in AttributeValue.objects.filter(
+        attribute__category__in=categories
+    ).values_list("attribute_id", "attribute_value"):
+        values.setdefault(attribute_id, []).append(value)
+    schema = {category.pk: [] for category in categories}
+    for attribute in AttributeType.objects.filter(category__in=categories):
+        schema[attribute.category_id].append(
+            (attribute.name, attribute.attribute_type, values.get(attribute.pk, []))
+        )
+    return schema
+
+
+def order_attributes(schema, rng, created):
+    """Attribute values an order form would submit for ``schema``."""
+    attributes = {}
+    for name, kind, values in schema:
+        if kind == "dropdown" and values:
+            attributes[name] = rng.choice(values)
+        elif kind == "date":
+            due = created + timedelta(days=rng.randint(1, 14))
+            attributes[name] = due.date().isoformat()
+        elif kind == "checkbox":
+            attributes[name] = rng.random() < 0.5
+        elif kind == "input":
+            attributes[name] = str(rng.randint(1, 1000))
+    return attributes
+
+
+def progress_status(stages, age, rng, turnaround=3):
+    """
+    New orders sit in the early stages and most orders older than
+    ``turnaround`` days have reached the last one.
+    """
+    stages = stages or DEFAULT_STAGES
+    progress = min(age.total_seconds() / 86400 / turnaround + rng.gauss(0, 0.25), 1)
+    return stages[min(max(int(progress * len(stages)), 0), len(stages) - 1)]
+
+
+def build_orders(
+    count, rng, categories, designers, statuses=None, days=0, names=None, now=None
+):
+    """
+    Unsaved orders for ``make_orders``, generated lazily so callers can
+    stream millions of rows through ``chunked``. ``names`` is an optional
+    ``(order names, customer names)`` pair to pick from.
+    """
+    now = now or timezone.now()
+    schema = attribute_schema(categories)
+    order_names, customer_names = names or ((), ())
+    for secret_key in next_secret_keys(count):
+        created = now - timedelta(seconds=rng.randint(0, days * 86400) if days else 0)
+        category = rng.choice(categories)
+        yield Order(
+            order_name=(
+                rng.choice(order_names) if order_names else f"Order {secret_key}"
+            ),
+            customer_name=(
+                rng.choice(customer_names)
+                if customer_names
+                else f"Customer {rng.randint(1, count)}"
+            ),
+            designer=rng.choice(designers),
+            description="",
+            secret_key=secret_key,
+            category=category,
+            status=(
+                rng.choice(statuses)
+                if statuses
+                else progress_status(category.stages, now - created, rng)
+            ),
+            attributes=order_attributes(schema[category.pk], rng, created),
+            created_at=created,
+            updated_at=created,
+        )
+
+
+def make_orders(count, rng, categories, designers, statuses=None, days=0):
+    """
+    ``count`` orders spread over ``categories`` and ``designers``, created at
+    random times over the last ``days`` days (all now when ``days`` is 0), in
+    one of ``statuses`` or by default a stage of their category matching
+    their age.
+    """
+    with backdated(Order):
+        return bulk_create(
+            Order, build_orders(count, rng, categories, designers, statuses, days)
+        )
+
+
+def build_reception_order(order, rng, receptionists):
+    """
+    The payment taken for ``order``: delivered orders are mostly settled,
+    the rest carry an outstanding balance more often than not.
+    """
+    price = Decimal(rng.randint(10, 500) * 10)
+    delivered = order.status == (order.category.stages or DEFAULT_STAGES)[-1]
+    if rng.random() < (0.9 if delivered else 0.4):
+        received = price
+    else:
+        received = Decimal(rng.randint(0, int(price) // 10) * 10)
+    return ReceptionOrder(
+        order=order,
+        reception_name=rng.choice(receptionists),
+        price=price,
+        receive_price=received,
+        reminder_price=price - received,
+        created_at=order.created_at + timedelta(minutes=rng.randint(5, 240)),
+    )
+
+
+def make_reception_orders(orders, rng, receptionists):
+    """One payment record per order, some fully paid."""
+    with backdated(ReceptionOrder):
+        return bulk_create(
+            ReceptionOrder,
+            (build_reception_order(order, rng, receptionists) for order in orders),
+        )
+
+
+def build_messages(count, rng, users, around=None):
+    """
+    ``count`` chat messages between random pairs of ``users``, sent within a
+    day after a random one of the ``around`` datetimes (now if not given).
+    """
+    now = timezone.now()
+    for index in range(count):
+        sender, receiver = rng.sample(users, 2)
+        sent = (
+            min(rng.choice(around) + timedelta(seconds=rng.randint(0, 86400)), now)
+            if around
+            else now
+        )
+        yield ChatMassage(
+            sender=sender,
+            receiver=receiver,
+            message=f"Message {index}",
+            is_read=rng.random() < 0.7,
+            date=sent,
+        )
+
+
+def make_messages(count, rng, users, around=None):
+    with backdated(ChatMassage):
+        return bulk_create(ChatMassage, build_messages(count, rng, users, around))
+
+
+def make_gallery(count, rng, categories=3):
+    gallery_categories = bulk_create(
+        GalleryCategory,
+        (GalleryCategory(name=f"Gallery {index}") for index in range(categories)),
+    )
+    return bulk_create(
+        Gallery,
+        (
+            Gallery(
+                category=rng.choice(gallery_categories),
+                image=f"gallery/images/{index}.jpg",
+            )
+            for index in range(count)
+        ),
+    )
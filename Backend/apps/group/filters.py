@@ -1,14 +1,19 @@
 
+from apps.common.business_day import day_range, in_range
 from django_filters import rest_framework as filters
 from .models import Order
 
 class OrderFilter(filters.FilterSet):
     status = filters.CharFilter(field_name="status", lookup_expr="iexact")
     designer_id = filters.NumberFilter(field_name='designer__id', label="Filter by Designer ID")
-    date = filters.DateFilter(field_name='created_at', lookup_expr='date')
+    # The shop's business day, as a range on created_at
+    date = filters.DateFilter(field_name='created_at', method='filter_business_day')
     class Meta:
         model = Order
         fields = ['status', 'designer_id']
 
+    def filter_business_day(self, queryset, name, value):
+        return queryset.filter(in_range(name, day_range(value)))
+
 
         
\ No newline at end of file
@@ -0,0 +1,306 @@
+"""
+Order sheets (CSV or XLSX) imported in bulk.
+
+``start_import`` records an ``ImportJob`` for the upload and imports it
+right away, or queues ``import_orders`` when the file is larger than
+``IMPORT_BACKGROUND_BYTES``. Rows are read one at a time (a streaming CSV
+reader, a read-only workbook) and handled ``IMPORT_CHUNK_SIZE`` at a time:
+each chunk is validated against the categories and their attribute types
+and values (loaded once per import), its designers are looked up with one
+query, its secret keys are reserved as one block and its orders written
+with one ``bulk_create``. Rejected rows are reported by line number.
+
+Columns are the ones ``apps.group.exports`` writes (``Order Name``,
+``Customer Name``, ``Category``, ``Designer``, ``Status``) plus
+``Description``; the designer is given by email and the category by name
+or id. Any other column is the value of the category's attribute of that
+name.
+"""
+
+import csv
+import datetime
+import io
+import posixpath
+import zipfile
+from itertools import islice
+
+import openpyxl
+from apps.common.jalali import parse_jalali
+from apps.users.models import User
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    AttributeType,
+    AttributeValue,
+    Category,
+    ExportJob,
+    ImportJob,
+    Order,
+    reserve_secret_keys,
+)
+from .reports import add_to_rollups
+
+IMPORT_CHUNK_SIZE = getattr(settings, "IMPORT_CHUNK_SIZE", 500)
+IMPORT_BACKGROUND_BYTES = getattr(settings, "IMPORT_BACKGROUND_BYTES", 1024 * 1024)
+IMPORT_MAX_ERRORS = getattr(settings, "IMPORT_MAX_ERRORS", 1000)
+
+FIELDS = {
+    "order_name",
+    "customer_name",
+    "category",
+    "designer",
+    "status",
+    "description",
+}
+REQUIRED_FIELDS = ["order_name", "customer_name", "category"]
+TRUE_VALUES = {"1", "true", "yes", "y"}
+FALSE_VALUES = {"0", "false", "no", "n"}
+
+# Raised by a file that is not the CSV or workbook it claims to be
+FILE_ERRORS = (csv.Error, UnicodeDecodeError, zipfile.BadZipFile, OSError)
+
+
+def file_format(name):
+    return posixpath.splitext(name)[1].lower().lstrip(".")
+
+
+def _field(header):
+    return header.strip().lower().replace(" ", "_")
+
+
+def _text(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def read_rows(file, format):
+    """``(line number, {header: value})`` for every row that is not blank."""
+    if format == ExportJob.Format.XLSX:
+        workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+        rows = workbook.active.iter_rows(values_only=True)
+    else:
+        workbook = None
+        rows = csv.reader(io.TextIOWrapper(file, encoding="utf-8-sig", newline=""))
+    try:
+        header = [_text(name) for name in next(rows, ())]
+        for number, values in enumerate(rows, start=2):
+            if any(_text(value) for value in values):
+                yield number, dict(zip(header, values))
+    finally:
+        if workbook is not None:
+            workbook.close()
+
+
+def load_schema():
+    """
+    ``(categories, attributes)``: categories by lower-cased name and by id,
+    and ``{category_id: {attribute name: (kind, allowed values)}}``.
+    """
+    categories = {}
+    for category in Category.objects.all():
+        categories[category.name.strip().lower()] = category
+        categories[str(category.pk)] = category
+
+    values = {}
+    for attribute_id, value in AttributeValue.objects.values_list(
+        "attribute_id", "attribute_value"
+    ):
+        values.setdefault(attribute_id, set()).add(value)
+    attributes = {}
+    for pk, category_id, name, kind in AttributeType.objects.values_list(
+        "pk", "category_id", "name", "attribute_type"
+    ):
+        attributes.setdefault(category_id, {})[name] = (kind, values.get(pk, set()))
+    return categories, attributes
+
+
+def clean_attribute(kind, allowed, value):
+    """The stored form of an attribute value; ``ValueError`` if invalid."""
+    if kind == "checkbox":
+        if isinstance(value, bool):
+            return value
+        text = _text(value).lower()
+        if text not in TRUE_VALUES | FALSE_VALUES:
+            raise ValueError(f"{value!r} is not yes or no.")
+        return text in TRUE_VALUES
+    if kind == "date":
+        if isinstance(value, datetime.datetime):
+            return value.date().isoformat()
+        if isinstance(value, datetime.date):
+            return value.isoformat()
+        text = _text(value).replace("/", "-")
+        try:
+            # Partner sheets give dates in either calendar
+            if text[:4].isdigit() and int(text[:4]) < 1700:
+                return parse_jalali(text).isoformat()
+            return datetime.date.fromisoformat(text).isoformat()
+        except ValueError:
+            raise ValueError(f"{value!r} is not a date.")
+    text = _text(value)
+    if kind == "dropdown" and text not in allowed:
+        raise ValueError(f"{text!r} is not one of: {', '.join(sorted(allowed))}.")
+    return text
+
+
+def build_order(values, schema, designers):
+    """An unsaved ``Order`` for a row, or ``None`` and ``{column: error}``."""
+    categories, attributes = schema
+    fields, extra, errors = {}, {}, {}
+    for header, value in values.items():
+        if _field(header) in FIELDS:
+            fields[_field(header)] = _text(value)
+        elif header:
+            extra[header] = value
+
+    for name in REQUIRED_FIELDS:
+        if not fields.get(name):
+            errors[name] = "This field is required."
+    category = categories.get(fields.get("category", "").lower())
+    if fields.get("category") and category is None:
+        errors["category"] = f"Unknown category {fields['category']!r}."
+
+    designer_id = None
+    if fields.get("designer"):
+        designer_id = designers.get(fields["designer"].lower())
+        if designer_id is None:
+            errors["designer"] = f"No designer with email {fields['designer']!r}."
+
+    status, order_attributes = fields.get("status", ""), {}
+    if category is not None:
+        if category.stages and status and status not in category.stages:
+            errors["status"] = f"{status!r} is not a stage of {category.name}."
+        status = status or (category.stages[0] if category.stages else "")
+        category_attributes = attributes.get(category.pk, {})
+        for name, value in extra.items():
+            if _text(value) == "":
+                continue
+            if name not in category_attributes:
+                errors[name] = f"{category.name} has no attribute {name!r}."
+                continue
+            try:
+                order_attributes[name] = clean_attribute(
+                    *category_attributes[name], value
+                )
+            except ValueError as e:
+                errors[name] = str(e)
+
+    if errors:
+        return None, errors
+    return (
+        Order(
+            order_name=fields["order_name"],
+            customer_name=fields["customer_name"],
+            description=fields.get("description", ""),
+            category=category,
+            designer_id=designer_id,
+            status=status,
+            attributes=order_attributes,
+        ),
+        {},
+    )
+
+
+def import_chunk(rows, schema, dry_run=False):
+    """Validate and write one chunk; returns ``(orders written, row errors)``."""
+    emails = {
+        _text(value)
+        for _, values in rows
+        for header, value in values.items()
+        if _field(header) == "designer"
+    }
+    designers = {
+        email.lower(): pk
+        for pk, email in User.objects.filter(
+            email__in=emails - {""}, role__in=[User.Designer, User.SuperDesigner]
+        ).values_list("pk", "email")
+    }
+
+    orders, errors = [], []
+    for number, values in rows:
+        order, row_errors = build_order(values, schema, designers)
+        if row_errors:
+            errors.append({"row": number, "errors": row_errors})
+        else:
+            orders.append(order)
+    if orders and not dry_run:
+        with transaction.atomic():
+            for order, secret_key in zip(orders, reserve_secret_keys(len(orders))):
+                order.secret_key = secret_key
+            Order.objects.bulk_create(orders)
+            # bulk_create skips the signals that keep the report rollups current
+            add_to_rollups(
+                (order.created_at, order.category_id, 1, 0, 0) for order in orders
+            )
+    return len(orders), errors
+
+
+def start_import(user, file, dry_run=False):
+    """
+    Record an import of the uploaded ``file``; small files are imported
+    before returning, larger ones are queued.
+    """
+    from apps.users.tasks import import_orders
+
+    job = ImportJob.objects.create(
+        requested_by=user, format=file_format(file.name), file=file, dry_run=dry_run
+    )
+    if file.size > IMPORT_BACKGROUND_BYTES:
+        transaction.on_commit(lambda: import_orders.delay(job.pk))
+        return job
+    return run_import(job.pk)
+
+
+def run_import(job_id, chunk_size=IMPORT_CHUNK_SIZE):
+    """Import the file of a pending job; returns the job, or ``None`` if taken."""
+    jobs = ImportJob.objects.filter(pk=job_id)
+    if not jobs.filter(status=ImportJob.Status.PENDING).update(
+        status=ImportJob.Status.RUNNING
+    ):
+        return None
+    job = jobs.get()
+    schema = load_schema()
+    total = imported = failed = 0
+    errors = []
+    try:
+        with job.file.open("rb") as file:
+            rows = read_rows(file, job.format)
+            while chunk := list(islice(rows, chunk_size)):
+                written, chunk_errors = import_chunk(chunk, schema, job.dry_run)
+                total += len(chunk)
+                imported += written
+                failed += len(chunk_errors)
+                errors.extend(chunk_errors[: IMPORT_MAX_ERRORS - len(errors)])
+                jobs.update(
+                    total_rows=total, imported_rows=imported, failed_rows=failed
+                )
+    except FILE_ERRORS as e:
+        jobs.update(
+            status=ImportJob.Status.FAILED,
+            file="",
+            error=f"The file could not be read: {e}",
+            finished_at=timezone.now(),
+        )
+        return jobs.get()
+    except Exception as e:
+        jobs.update(
+            status=ImportJob.Status.FAILED,
+            file="",
+            error=str(e),
+            finished_at=timezone.now(),
+        )
+        raise
+    finally:
+        job.file.delete(save=False)
+
+    jobs.update(
+        status=ImportJob.Status.DONE,
+        file="",
+        errors=errors,
+        finished_at=timezone.now(),
+    )
+    return jobs.get()
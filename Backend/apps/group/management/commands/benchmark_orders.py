@@ -0,0 +1,277 @@
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+from contextlib import ExitStack
+from unittest import mock
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.common.instrumentation import percentile
+from apps.group import factories
+from apps.group.models import ReceptionOrder
+from apps.users.models import User
+
+ROLES = [User.Admin, User.Designer, User.Reception]
+
+# The "order-list" URL name resolves to apps.order, so the router path is fixed.
+ORDERS_PATH = "/group/orders/"
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the hot order-management endpoints against a synthetic "
+        "dataset and write throughput and latency percentiles as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=5000)
+        parser.add_argument("--categories", type=int, default=20)
+        parser.add_argument(
+            "--days", type=int, default=30, help="Spread orders over this many days."
+        )
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=37)
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            dest="scenarios",
+            help="Only run this scenario (repeatable).",
+        )
+        parser.add_argument("--output", default="benchmark_orders.json")
+        parser.add_argument(
+            "--compare", help="Earlier results file to print the deltas against."
+        )
+        parser.add_argument(
+            "--max-regression",
+            type=float,
+            help="Fail when any p95 is this many percent slower than --compare.",
+        )
+        parser.add_argument(
+            "--current-database",
+            action="store_true",
+            help="Seed the configured database instead of a throwaway test one.",
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"]) as fp:
+                baseline = json.load(fp)
+
+        # Order saves queue Celery tasks; the benchmark measures the request,
+        # not a broker round-trip.
+        with ExitStack() as stack:
+            stack.enter_context(mock.patch("celery.app.task.Task.apply_async"))
+            if not options["current_database"]:
+                self.use_test_database(stack)
+            results = self.run(options)
+
+        with open(options["output"], "w") as fp:
+            json.dump(results, fp, indent=2)
+        self.report(results, baseline)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+        if baseline and options["max_regression"] is not None:
+            regressions = self.regressions(results, baseline, options["max_regression"])
+            if regressions:
+                raise CommandError("p95 regressions: " + ", ".join(regressions))
+
+    def use_test_database(self, stack):
+        setup_test_environment()
+        stack.callback(teardown_test_environment)
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        stack.callback(connection.creation.destroy_test_db, old_name, verbosity=0)
+
+    def seed(self, options):
+        rng = random.Random(options["seed"])
+        started = time.perf_counter()
+        users = {role: factories.make_user(role) for role in ROLES}
+        User.objects.filter(pk=users[User.Admin].pk).update(is_staff=True)
+        categories = factories.make_categories(options["categories"], rng)
+        orders = factories.make_orders(
+            options["orders"],
+            rng,
+            categories,
+            [users[User.Designer]],
+            days=options["days"],
+        )
+        factories.make_reception_orders(orders[::2], rng, [users[User.Reception]])
+        self.stdout.write(
+            f"Seeded {len(orders)} orders in {time.perf_counter() - started:.1f}s"
+        )
+        return users, categories
+
+    def scenarios(self, users, categories, rng):
+        admin, designer = users[User.Admin], users[User.Designer]
+        category = categories[0]
+        stage = category.stages[0]
+        unsettled = iter(
+            ReceptionOrder.objects.filter(reminder_price__gt=0)
+            .values_list("order_id", flat=True)
+            .order_by("pk")
+        )
+        # once every balance is settled, settling again is a no-op update
+        settled = ReceptionOrder.objects.values_list("order_id", flat=True).first()
+
+        def create():
+            return (
+                "post",
+                ORDERS_PATH,
+                {
+                    "order_name": "Benchmark order",
+                    "customer_name": f"Customer {rng.randint(1, 1000)}",
+                    "category": category.pk,
+                    "status": stage,
+                    "attributes": {},
+                },
+            )
+
+        def settle():
+            order_id = next(unsettled, settled)
+            return "post", reverse("update-reminder-price", args=[order_id]), {}
+
+        def get(path, **params):
+            return lambda: ("get", path, params)
+
+        return {
+            "orders.list": (admin, get(ORDERS_PATH)),
+            "orders.create": (designer, create),
+            "orders.today": (admin, get(reverse("order-today-list"))),
+            "orders.search": (
+                admin,
+                get(ORDERS_PATH, search=f"Customer {rng.randint(1, 99)}"),
+            ),
+            "orders.status": (
+                admin,
+                get(reverse("order-list-by-status", args=[stage])),
+            ),
+            "orders.status_role": (
+                admin,
+                get(reverse("order-status-role-list", args=[stage])),
+            ),
+            "categories.attributes": (
+                admin,
+                get(reverse("category-attributes", args=[category.pk])),
+            ),
+            "reception_orders.list": (admin, get(reverse("receptionorder-list"))),
+            "reception_orders.settle": (admin, settle),
+        }
+
+    def run(self, options):
+        users, categories = self.seed(options)
+        scenarios = self.scenarios(users, categories, random.Random(options["seed"]))
+        selected = options["scenarios"] or list(scenarios)
+        unknown = set(selected) - scenarios.keys()
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+        client = APIClient()
+        client.raise_request_exception = False
+        results = {}
+        for name in selected:
+            user, request = scenarios[name]
+            client.force_authenticate(user)
+            results[name] = self.measure(client, request, options)
+
+        return {
+            "meta": {
+                "commit": git_commit(),
+                "created_at": timezone.now().isoformat(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                **{
+                    key: options[key]
+                    for key in ("orders", "categories", "days", "iterations", "seed")
+                },
+            },
+            "scenarios": results,
+        }
+
+    def measure(self, client, request, options):
+        def send():
+            method, path, data = request()
+            if method == "get":
+                return client.get(path, data)
+            return client.post(path, data, format="json")
+
+        for _ in range(options["warmup"]):
+            send()
+
+        latencies, errors = [], 0
+        reset_queries()  # seeding can fill the query log under DEBUG
+        with CaptureQueriesContext(connection) as queries:
+            send()
+        started = time.perf_counter()
+        for _ in range(options["iterations"]):
+            request_started = time.perf_counter()
+            response = send()
+            latencies.append((time.perf_counter() - request_started) * 1000)
+            errors += response.status_code >= 400
+        elapsed = time.perf_counter() - started
+
+        return {
+            "iterations": len(latencies),
+            "errors": errors,
+            "queries": len(queries),
+            "throughput_rps": round(len(latencies) / elapsed, 2),
+            "mean_ms": round(statistics.mean(latencies), 2),
+            "p50_ms": round(percentile(latencies, 0.50), 2),
+            "p95_ms": round(percentile(latencies, 0.95), 2),
+            "p99_ms": round(percentile(latencies, 0.99), 2),
+        }
+
+    def report(self, results, baseline=None):
+        previous = (baseline or {}).get("scenarios", {})
+        self.stdout.write(
+            f"{'scenario':<26}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}"
+            f"{'queries':>9}{'errors':>8}"
+        )
+        for name, row in results["scenarios"].items():
+            line = (
+                f"{name:<26}{row['throughput_rps']:>9}{row['p50_ms']:>9}"
+                f"{row['p95_ms']:>9}{row['p99_ms']:>9}{row['queries']:>9}"
+                f"{row['errors']:>8}"
+            )
+            if name in previous and previous[name]["p95_ms"]:
+                change = row["p95_ms"] / previous[name]["p95_ms"] * 100 - 100
+                line += f"   p95 {change:+.1f}%"
+            self.stdout.write(line)
+
+    def regressions(self, results, baseline, threshold):
+        previous = baseline.get("scenarios", {})
+        return [
+            f"{name} ({previous[name]['p95_ms']} -> {row['p95_ms']} ms)"
+            for name, row in results["scenarios"].items()
+            if name in previous
+            and row["p95_ms"] > previous[name]["p95_ms"] * (1 + threshold / 100)
+        ]
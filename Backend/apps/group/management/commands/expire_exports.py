@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.group.exports import expire_exports
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the files of order exports past their expiry (EXPORT_TTL); "
+        "run it from cron, or schedule the expire_export_jobs task instead."
+    )
+
+    def handle(self, *args, **options):
+        count = expire_exports()
+        self.stdout.write(self.style.SUCCESS(f"Expired {count} exports."))
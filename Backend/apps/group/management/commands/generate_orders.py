@@ -1,42 +1,117 @@
 import random
+import time
 
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from faker import Faker
 
-from apps.group.models import Category, Order
-from apps.users.models import User
+from apps.group import factories
+from apps.group.models import Order, ReceptionOrder
+from apps.group.reports import rebuild_rollups
+from apps.users.models import ChatMassage, User
 
 
 class Command(BaseCommand):
-    help = "Generate 100 random Order records"
+    help = (
+        "Generate realistic orders with matching payments, attributes and chat "
+        "traffic for load and benchmark work. The same --seed always produces "
+        "the same data."
+    )
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=1000)
+        parser.add_argument(
+            "--days", type=int, default=365, help="Spread orders over this many days."
+        )
+        parser.add_argument("--categories", type=int, default=10)
+        parser.add_argument(
+            "--attribute-types", type=int, default=4, help="Attributes per category."
+        )
+        parser.add_argument("--designers", type=int, default=10)
+        parser.add_argument("--receptionists", type=int, default=3)
+        parser.add_argument(
+            "--payments",
+            type=float,
+            default=0.8,
+            help="Fraction of orders with a reception payment.",
+        )
+        parser.add_argument(
+            "--messages", type=float, default=0.5, help="Chat messages per order."
+        )
+        parser.add_argument("--seed", type=int, default=38)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
         fake = Faker()
+        fake.seed_instance(options["seed"])
+        names = (
+            [fake.catch_phrase() for _ in range(500)],
+            [fake.name() for _ in range(5000)],
+        )
 
-        # Get categories and users to assign them to orders
-        categories = Category.objects.all()
-        users = User.objects.all()
-
-        # Create 1000 orders
-        for _ in range(30):
-            order_name = fake.word()  # Random word for order name
-            customer_name = fake.name()  # Random name for customer
-            description = fake.text()  # Random description text
-            designer = random.choice(users)  # Random user for designer
-            category = random.choice(categories)  # Random category
-            status = random.choice(
-                [
-                "Head_of_designers" ]
-            )
-            order = Order(
-                order_name=order_name,
-                customer_name=customer_name,
-                designer=designer,
-                description=description,
-                category=category,
-                status=status,
+        designers = [
+            factories.make_user(User.Designer) for _ in range(options["designers"])
+        ]
+        receptionists = [
+            factories.make_user(User.Reception) for _ in range(options["receptionists"])
+        ]
+        categories = factories.make_categories(
+            options["categories"], rng, attribute_types=options["attribute_types"]
+        )
+
+        orders = factories.build_orders(
+            options["orders"],
+            rng,
+            categories,
+            designers,
+            days=options["days"],
+            names=names,
+        )
+        started = time.perf_counter()
+        totals = {"orders": 0, "payments": 0, "messages": 0}
+        with (
+            factories.backdated(Order),
+            factories.backdated(ReceptionOrder),
+            factories.backdated(ChatMassage),
+        ):
+            for batch in factories.chunked(orders, options["batch_size"]):
+                with transaction.atomic():
+                    self.write_batch(
+                        batch, rng, receptionists, designers, options, totals
+                    )
+                if options["verbosity"] > 1:
+                    self.stdout.write(
+                        f"{totals['orders']}/{options['orders']} orders "
+                        f"({totals['orders'] / (time.perf_counter() - started):.0f}/s)"
+                    )
+
+        # bulk_create skips the signals that keep the report rollups current
+        rebuild_rollups()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {totals['orders']} orders, {totals['payments']} payments "
+                f"and {totals['messages']} messages in {elapsed:.1f}s"
             )
-            order.save()
+        )
 
-            # Print out each created order's secret key for tracking
-            self.stdout.write(self.style.SUCCESS(f"Order created: {order.secret_key}"))
+    def write_batch(self, batch, rng, receptionists, designers, options, totals):
+        orders = Order.objects.bulk_create(batch)
+        payments = ReceptionOrder.objects.bulk_create(
+            factories.build_reception_order(order, rng, receptionists)
+            for order in orders
+            if rng.random() < options["payments"]
+        )
+        messages = ChatMassage.objects.bulk_create(
+            factories.build_messages(
+                round(len(orders) * options["messages"]),
+                rng,
+                designers + receptionists,
+                around=[order.created_at for order in orders],
+            )
+        )
+        totals["orders"] += len(orders)
+        totals["payments"] += len(payments)
+        totals["messages"] += len(messages)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.group.reports import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the per-day order rollups behind the Jalali reports from "
+        "every order, e.g. after orders were imported or bulk-created."
+    )
+
+    def handle(self, *args, **options):
+        rows = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} rollup rows."))
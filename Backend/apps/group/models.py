@@ -98,24 +98,29 @@ class AttributeValue(models.Model):
         ordering = ["attribute", "attribute_value"]
 
 
+SECRET_KEY_SEQUENCE = "group.order.secret_key"
+
+
+def reserve_secret_keys(count):
+    """
+    ``count`` consecutive unused secret keys, reserved with one update of an
+    ``IdSequence`` row. The sequence is first moved past the highest key in
+    use, so keys written without it (fixtures, older rows) are never reused.
+    """
+    from apps.order.models import IdSequence
+
+    floor = (Order.objects.aggregate(last=models.Max("secret_key"))["last"] or 0) + 1
+    IdSequence.objects.filter(name=SECRET_KEY_SEQUENCE, next_value__lt=floor).update(
+        next_value=floor
+    )
+    start = IdSequence.reserve(SECRET_KEY_SEQUENCE, count, floor)
+    return range(start, start + count)
+
+
 def generate_secret_key():
     """Generates a sequential unique secret key starting from 1."""
     try:
-        # Get the last order created and its secret_key
-        last_order = Order.objects.order_by("-secret_key").first()
-        if last_order:
-            print(
-                f"Last secret_key: {last_order.secret_key} (type: {type(last_order.secret_key)})"
-            )
-            new_secret_key = int(last_order.secret_key) + 1
-        else:
-            # Start from 1 if no orders exist yet
-            new_secret_key = 1
-
-        while Order.objects.filter(secret_key=new_secret_key).exists():
-            new_secret_key += 1
-
-        return new_secret_key
+        return reserve_secret_keys(1)[0]
     except Exception as e:
         raise ValidationError(f"ERROR generating secret key: {e}")
 
@@ -148,6 +153,8 @@ class Order(models.Model):
         verbose_name = "Order"
         verbose_name_plural = "Orders"
         ordering = ["-created_at"]
+        # "today" and "before today" are ranges on created_at
+        indexes = [models.Index(fields=["created_at"], name="order_created_at_idx")]
 
     def save(self, *args, **kwargs):
         is_creating = self._state.adding
@@ -207,10 +214,149 @@ class ReceptionOrder(models.Model):
         if self.order:
             order_display = (
                 self.order.secret_key
-                if self.order.secret_key and "temp-" not in self.order.secret_key
+                if self.order.secret_key and "temp-" not in str(self.order.secret_key)
                 else f"ID:{self.order.pk}"
             )
         return f"Reception for Order {order_display} - Price: {self.price}"
 
     class Meta:
         ordering = ["-created_at"]
+        # Admin changelist ordering and date hierarchy
+        indexes = [models.Index(fields=["created_at"], name="reception_created_at_idx")]
+
+
+class OrderDayRollup(models.Model):
+    """
+    Orders and their reception amounts per category per day, keyed by the
+    day both in the Gregorian and the Jalali calendar so reports can group
+    by Jalali year, month or week in the database. Orders count under the
+    local day they were created on; rows are kept up to date by
+    ``apps.group.reports``.
+    """
+
+    date = models.DateField(_("Date"))
+    # Saturday starting the (Jalali) week of ``date``
+    week_start = models.DateField(_("Week Start"))
+    jalali_year = models.PositiveSmallIntegerField(_("Jalali Year"))
+    jalali_month = models.PositiveSmallIntegerField(_("Jalali Month"))
+    jalali_day = models.PositiveSmallIntegerField(_("Jalali Day"))
+    category = models.ForeignKey(
+        Category, on_delete=models.CASCADE, related_name="day_rollups"
+    )
+    orders = models.PositiveIntegerField(_("Orders"), default=0)
+    revenue = models.DecimalField(
+        _("Revenue"), max_digits=14, decimal_places=2, default=Decimal("0.00")
+    )
+    received = models.DecimalField(
+        _("Received"), max_digits=14, decimal_places=2, default=Decimal("0.00")
+    )
+
+    class Meta:
+        ordering = ["date", "category"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "category"], name="unique_order_day_rollup"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["jalali_year", "jalali_month"], name="order_rollup_month_idx"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.category} {self.date}: {self.orders} orders"
+
+
+class ExportJob(models.Model):
+    """
+    An order export written in the background by ``apps.group.exports``.
+    ``filters`` are the ``EXPORT_FILTERS`` the orders are selected by; the
+    file is kept until ``expires_at`` and then removed with its contents.
+    """
+
+    class Format(models.TextChoices):
+        CSV = "csv", "CSV"
+        XLSX = "xlsx", "Excel"
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("Pending")
+        RUNNING = "running", _("Running")
+        DONE = "done", _("Done")
+        FAILED = "failed", _("Failed")
+        EXPIRED = "expired", _("Expired")
+
+    requested_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, related_name="export_jobs"
+    )
+    format = models.CharField(_("Format"), max_length=4, choices=Format.choices)
+    filters = models.JSONField(_("Filters"), default=dict, blank=True)
+    status = models.CharField(
+        _("Status"), max_length=8, choices=Status.choices, default=Status.PENDING
+    )
+    total_rows = models.PositiveIntegerField(_("Total Rows"), default=0)
+    exported_rows = models.PositiveIntegerField(_("Exported Rows"), default=0)
+    file = models.FileField(_("File"), upload_to="exports/", blank=True)
+    error = models.TextField(_("Error"), blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(_("Finished At"), null=True, blank=True)
+    expires_at = models.DateTimeField(_("Expires At"), null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "expires_at"], name="export_job_expiry_idx")
+        ]
+
+    def __str__(self):
+        return f"Export {self.pk} ({self.format}, {self.status})"
+
+    @property
+    def progress(self):
+        """Percentage of the rows written so far."""
+        if self.status == self.Status.DONE:
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(100, self.exported_rows * 100 // self.total_rows)
+
+
+class ImportJob(models.Model):
+    """
+    An order sheet uploaded for import by ``apps.group.imports``. ``errors``
+    lists the rejected rows (up to ``IMPORT_MAX_ERRORS``) with the reasons;
+    the uploaded file is removed once it has been read.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("Pending")
+        RUNNING = "running", _("Running")
+        DONE = "done", _("Done")
+        FAILED = "failed", _("Failed")
+
+    requested_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, related_name="import_jobs"
+    )
+    format = models.CharField(
+        _("Format"), max_length=4, choices=ExportJob.Format.choices
+    )
+    file = models.FileField(_("File"), upload_to="imports/", blank=True)
+    # Validate every row without writing any order; imported_rows then
+    # counts the rows that would have been imported
+    dry_run = models.BooleanField(_("Dry Run"), default=False)
+    status = models.CharField(
+        _("Status"), max_length=8, choices=Status.choices, default=Status.PENDING
+    )
+    total_rows = models.PositiveIntegerField(_("Total Rows"), default=0)
+    imported_rows = models.PositiveIntegerField(_("Imported Rows"), default=0)
+    failed_rows = models.PositiveIntegerField(_("Failed Rows"), default=0)
+    errors = models.JSONField(_("Errors"), default=list, blank=True)
+    error = models.TextField(_("Error"), blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(_("Finished At"), null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Import {self.pk} ({self.format}, {self.status})"
@@ -0,0 +1,180 @@
+"""
+Order reports by Jalali day, week, month and year.
+
+``OrderDayRollup`` holds one row per category per business day. Saving or
+deleting an order or its reception adds the difference it makes to the rows
+it moves between (``add_to_rollups``) once the transaction commits, with
+``F()`` increments so concurrent writers add up instead of overwriting each
+other; ``rebuild_rollups`` recomputes everything, e.g. after orders were
+written with ``bulk_create``. Reports then sum rollup rows in the database
+instead of converting every order's timestamp in Python.
+"""
+
+import datetime
+from decimal import Decimal
+
+from apps.common.business_day import business_day, shop_timezone
+from apps.common.jalali import format_jalali, to_jalali_many
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+
+from .models import Order, OrderDayRollup
+
+BATCH_SIZE = 1000
+
+# period -> rollup fields grouped on
+PERIODS = {
+    "day": ["date"],
+    "week": ["week_start"],
+    "month": ["jalali_year", "jalali_month"],
+    "year": ["jalali_year"],
+}
+
+
+def week_start(day):
+    """The Saturday starting ``day``'s week."""
+    return day - datetime.timedelta(days=(day.weekday() + 2) % 7)
+
+
+def build_rollup(day, jalali, category_id, orders, revenue, received):
+    year, month, jalali_day = jalali
+    return OrderDayRollup(
+        date=day,
+        week_start=week_start(day),
+        jalali_year=year,
+        jalali_month=month,
+        jalali_day=jalali_day,
+        category_id=category_id,
+        orders=orders,
+        revenue=revenue or Decimal("0.00"),
+        received=received or Decimal("0.00"),
+    )
+
+
+def day_totals(orders, *keys):
+    return orders.values(*keys, "category_id").annotate(
+        orders=Count("pk"),
+        revenue=Sum("reception_details__price"),
+        received=Sum("reception_details__receive_price"),
+    )
+
+
+def add_to_rollups(entries):
+    """
+    Add ``(created_at, category_id, orders, revenue, received)`` entries to
+    the rollup rows of their day and category after the current transaction
+    commits.
+    """
+    changes = {}
+    for created_at, category_id, orders, revenue, received in entries:
+        key = (business_day(created_at), category_id)
+        total = changes.get(key, (0, 0, 0))
+        changes[key] = (
+            total[0] + orders,
+            total[1] + (revenue or 0),
+            total[2] + (received or 0),
+        )
+    changes = {key: change for key, change in changes.items() if any(change)}
+    if changes:
+        transaction.on_commit(lambda: apply_changes(changes))
+
+
+@transaction.atomic
+def apply_changes(changes):
+    """Add ``{(day, category_id): (orders, revenue, received)}`` to the rows."""
+    days = sorted({day for day, _ in changes})
+    jalali = dict(zip(days, to_jalali_many(days)))
+    # Missing rows are created empty first, so every change is an increment
+    OrderDayRollup.objects.bulk_create(
+        [
+            build_rollup(day, jalali[day], category_id, 0, None, None)
+            for day, category_id in changes
+        ],
+        ignore_conflicts=True,
+    )
+    for (day, category_id), (orders, revenue, received) in changes.items():
+        OrderDayRollup.objects.filter(date=day, category_id=category_id).update(
+            orders=F("orders") + orders,
+            revenue=F("revenue") + revenue,
+            received=F("received") + received,
+        )
+
+
+@transaction.atomic
+def rebuild_rollups():
+    """Recompute every rollup row from the orders; returns the row count."""
+    totals = list(
+        day_totals(
+            Order.objects.annotate(
+                day=TruncDate("created_at", tzinfo=shop_timezone())
+            ).order_by(),
+            "day",
+        )
+    )
+    jalali = to_jalali_many(row["day"] for row in totals)
+    OrderDayRollup.objects.all().delete()
+    OrderDayRollup.objects.bulk_create(
+        (
+            build_rollup(
+                row["day"],
+                jalali_day,
+                row["category_id"],
+                row["orders"],
+                row["revenue"],
+                row["received"],
+            )
+            for row, jalali_day in zip(totals, jalali)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    return len(totals)
+
+
+def period_label(period, row):
+    if period == "day":
+        return format_jalali(row["date"])
+    if period == "week":
+        return format_jalali(row["week_start"])
+    if period == "month":
+        return f"{row['jalali_year']:04d}-{row['jalali_month']:02d}"
+    return f"{row['jalali_year']:04d}"
+
+
+def order_report(period, start=None, end=None, category_id=None, by_category=False):
+    """
+    Orders, revenue and amount received per ``period`` between the Gregorian
+    days ``start`` and ``end`` (both included), optionally per category.
+    """
+    # Rows whose orders were all deleted are kept at zero
+    rollups = OrderDayRollup.objects.filter(orders__gt=0).order_by()
+    if start is not None:
+        rollups = rollups.filter(date__gte=start)
+    if end is not None:
+        rollups = rollups.filter(date__lte=end)
+    if category_id is not None:
+        rollups = rollups.filter(category_id=category_id)
+
+    keys = PERIODS[period] + (["category_id", "category__name"] if by_category else [])
+    rows = (
+        rollups.values(*keys)
+        .annotate(
+            orders=Sum("orders"), revenue=Sum("revenue"), received=Sum("received")
+        )
+        .order_by(*keys)
+    )
+
+    report = []
+    for row in rows:
+        entry = {"period": period_label(period, row)}
+        if by_category:
+            entry["category"] = row["category_id"]
+            entry["category_name"] = row["category__name"]
+        entry.update(
+            orders=row["orders"],
+            revenue=row["revenue"],
+            received=row["received"],
+            remaining=row["revenue"] - row["received"],
+        )
+        report.append(entry)
+    return report
@@ -3,51 +3,52 @@
 import datetime
 from decimal import Decimal
 
-import jdatetime
+from apps.common.jalali import format_jalali, parse_jalali
 from apps.users.models import User  # Assuming User model is here
 from django import forms
 from django.contrib.auth import get_user_model  # Use this!
+from django.core.exceptions import ValidationError
+from django.urls import reverse
 
 # from jdatetime import datetime # Careful with name clashes, use jdatetime.datetime
 from rest_framework import serializers
 
-from .models import AttributeType, AttributeValue, Category, Order, ReceptionOrder
+from .exports import clean_filters
+from .imports import file_format
+from .models import (
+    AttributeType,
+    AttributeValue,
+    Category,
+    ExportJob,
+    ImportJob,
+    Order,
+    ReceptionOrder,
+)
 
 
-# Custom Jalali Date Field (keep as is)
+# Custom Jalali Date Field
 class JalaliDateField(serializers.DateField):
     def to_representation(self, value):
         if value is None:
             return None
         # Handle both date and datetime objects gracefully
-        if isinstance(value, datetime.datetime):
-            value = value.date()
-        elif not isinstance(value, datetime.date):
+        if not isinstance(value, datetime.date):
             return str(value)  # Or raise error for unexpected type
-
         try:
-            jalali_date = jdatetime.date.fromgregorian(date=value)
-            return jalali_date.strftime("%Y-%m-%d")
+            return format_jalali(value)
         except ValueError:
-            # Handle potential errors during conversion
-            return str(value)  # Fallback or log error
+            return str(value)  # Outside the Jalali calendar's range
 
     def to_internal_value(self, data):
         if not data:
             return None
         try:
-            # Attempt parsing common Jalali formats
-            jalali_dt = jdatetime.datetime.strptime(data, "%Y-%m-%d")
-            return jalali_dt.togregorian().date()
-        except (ValueError, TypeError):
-            try:
-                # Maybe try another format?
-                jalali_dt = jdatetime.datetime.strptime(data, "%Y/%m/%d")
-                return jalali_dt.togregorian().date()
-            except (ValueError, TypeError):
-                raise serializers.ValidationError(
-                    "Invalid date format. Use YYYY-MM-DD or YYYY/MM/DD."
-                )
+            # YYYY-MM-DD or YYYY/MM/DD in the Jalali calendar
+            return parse_jalali(data)
+        except (ValueError, TypeError, AttributeError):
+            raise serializers.ValidationError(
+                "Invalid date format. Use YYYY-MM-DD or YYYY/MM/DD."
+            )
 
 
 # Category Serializer (keep as is)
@@ -247,3 +248,89 @@ class ReceptionOrderSerializerByPrice(serializers.ModelSerializer):
         read_only_fields = ["reminder_price", "created_at", "order"]
 
     # No custom create needed if model calculates reminder
+
+
+class OrderReportQuerySerializer(serializers.Serializer):
+    period = serializers.ChoiceField(choices=["day", "week", "month", "year"])
+    start = JalaliDateField(required=False)
+    end = JalaliDateField(required=False)
+    category = serializers.IntegerField(required=False)
+    by_category = serializers.BooleanField(default=False)
+
+
+class OrderReportRowSerializer(serializers.Serializer):
+    period = serializers.CharField()
+    category = serializers.IntegerField(required=False)
+    category_name = serializers.CharField(required=False)
+    orders = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+    received = serializers.DecimalField(max_digits=14, decimal_places=2)
+    remaining = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class ExportJobCreateSerializer(serializers.Serializer):
+    format = serializers.ChoiceField(choices=ExportJob.Format.choices)
+    filters = serializers.DictField(required=False, default=dict)
+
+    def validate_filters(self, value):
+        try:
+            return clean_filters(value)
+        except ValidationError as e:
+            raise serializers.ValidationError(e.messages)
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    progress = serializers.IntegerField(read_only=True)
+    download = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            "id",
+            "format",
+            "filters",
+            "status",
+            "progress",
+            "total_rows",
+            "exported_rows",
+            "error",
+            "download",
+            "created_at",
+            "finished_at",
+            "expires_at",
+        ]
+
+    def get_download(self, job):
+        if job.status != ExportJob.Status.DONE:
+            return None
+        url = reverse("export-job-download", args=[job.pk])
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+
+
+class ImportJobCreateSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate_file(self, value):
+        if file_format(value.name) not in ExportJob.Format.values:
+            raise serializers.ValidationError("Upload a .csv or .xlsx file.")
+        return value
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImportJob
+        fields = [
+            "id",
+            "format",
+            "dry_run",
+            "status",
+            "total_rows",
+            "imported_rows",
+            "failed_rows",
+            "errors",
+            "error",
+            "created_at",
+            "finished_at",
+        ]
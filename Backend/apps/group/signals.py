@@ -1,9 +1,10 @@
-import jdatetime
-from django.db import models
-from django.db.models.signals import pre_save
+from apps.common.business_day import business_day
+from apps.common.jalali import to_jalali
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
-from .models import Order
+from .models import Order, ReceptionOrder
+from .reports import add_to_rollups
 
 
 def generate_secret_key(order_id):
@@ -11,19 +12,10 @@ def generate_secret_key(order_id):
     first_three_digits = str(order_id).zfill(3)
 
     # Get the current date in the Jalali (Persian) calendar
-    current_jalali_date = jdatetime.datetime.now()
+    year, month, day = to_jalali(business_day())
 
-    # Extract the last digit of the current Jalali year
-    last_digit_of_year = str(current_jalali_date.year)[-1]  # e.g., '4' for 1404
-
-    # Get the current month and day in Jalali calendar
-    month_part = current_jalali_date.strftime(
-        "%m"
-    )  # Two-digit month (e.g., '03' for Farvardin)
-    day_part = current_jalali_date.strftime("%d")  # Two-digit day (e.g., '25')
-
-    # Combine all parts to form the secret key
-    secret_key = f"{first_three_digits}{last_digit_of_year}{month_part}{day_part}"
+    # Last digit of the Jalali year ('4' for 1404), two-digit month and day
+    secret_key = f"{first_three_digits}{year % 10}{month:02d}{day:02d}"
 
     return secret_key
 
@@ -32,3 +24,79 @@ def generate_secret_key(order_id):
 def generate_order_secret_key(sender, instance, **kwargs):
     if not instance.secret_key:
         instance.secret_key = generate_secret_key(instance.id)
+
+
+def remember(sender, instance, *fields):
+    instance._previous_rollup = None
+    if instance.pk:
+        instance._previous_rollup = (
+            sender.objects.filter(pk=instance.pk).values_list(*fields).first()
+        )
+
+
+@receiver(pre_save, sender=Order)
+def remember_order_rollup(sender, instance, **kwargs):
+    remember(sender, instance, "created_at", "category_id")
+
+
+@receiver(post_save, sender=Order)
+def count_order(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous_rollup", None)
+    current = (instance.created_at, instance.category_id)
+    if previous == current:
+        return
+    # The reception's amounts move along with the order
+    price, received = (
+        ReceptionOrder.objects.filter(order_id=instance.pk)
+        .values_list("price", "receive_price")
+        .first()
+    ) or (0, 0)
+    entries = [(*current, 1, price, received)]
+    if previous is not None:
+        entries.append((*previous, -1, -(price or 0), -(received or 0)))
+    add_to_rollups(entries)
+
+
+@receiver(post_delete, sender=Order)
+def uncount_order(sender, instance, **kwargs):
+    # The reception is deleted first and takes its amounts with it
+    add_to_rollups([(instance.created_at, instance.category_id, -1, 0, 0)])
+
+
+@receiver(pre_save, sender=ReceptionOrder)
+def remember_reception_rollup(sender, instance, **kwargs):
+    remember(sender, instance, "order_id", "price", "receive_price")
+
+
+def reception_entries(order_id, price, received, sign=1):
+    """Rollup entries adding (``sign=-1``: removing) a reception's amounts."""
+    order = (
+        Order.objects.filter(pk=order_id)
+        .values_list("created_at", "category_id")
+        .first()
+    )
+    if order is None:
+        return []
+    return [(*order, 0, sign * (price or 0), sign * (received or 0))]
+
+
+@receiver(post_save, sender=ReceptionOrder)
+def count_reception(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous_rollup", None)
+    current = (instance.order_id, instance.price, instance.receive_price)
+    if previous == current:
+        return
+    entries = reception_entries(*current)
+    if previous is not None:
+        entries += reception_entries(*previous, sign=-1)
+    add_to_rollups(entries)
+
+
+@receiver(post_delete, sender=ReceptionOrder)
+def uncount_reception(sender, instance, **kwargs):
+    # Deleted before its order when the whole order is, so the order is found
+    add_to_rollups(
+        reception_entries(
+            instance.order_id, instance.price, instance.receive_price, sign=-1
+        )
+    )
@@ -1,4 +1,370 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import random
+import re
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+import openpyxl
+from apps.api.models import BlogPost
+from apps.api.models import Category as ReceptionCategory
+from apps.api.models import PostCategory, Reception
+from apps.common import business_day as business_days
+from apps.common import paginators
+from apps.common.business_day import business_day
+from apps.common.jalali import jalali_month
+from apps.common.models import AboutModel
+from apps.common.models import Category as ContentCategory
+from apps.common.models import CustomerImages, Images, Services, SubCategory
+from apps.common.views import ImageUploadView
+from apps.staff.models import Salary, Staff, UpsentModel
+from apps.staff.payroll import run_payroll
+from apps.users.models import ChatMassage, Contact, User
+from apps.users.views import FalseMessageReadStatusView
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+from rest_framework.generics import GenericAPIView
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from . import exports, factories, imports
+from .exports import expire_exports, run_export, start_export
+from .factories import ROLE_NAMES
+from .models import (
+    AttributeType,
+    AttributeValue,
+    Category,
+    ExportJob,
+    ImportJob,
+    Order,
+    OrderDayRollup,
+    ReceptionOrder,
+)
+from .reports import order_report
+from .views import ExportJobDownloadView, ReceptionListOldOrdersView
+
+# Roles every route is requested as
+ROLES = [User.Admin, User.Designer, User.SuperDesigner, User.Reception, User.Printer]
+
+# No GET request may run more queries than this, whatever the data volume
+QUERY_BUDGET = 15
+
+# Orders, messages and gallery items before the first and second measurement;
+# QUERY_COUNT_ROWS=40 trades the realistic volume for a quick run.
+SMALL, LARGE = 5, int(os.environ.get("QUERY_COUNT_ROWS", 2000))
+
+
+# Models behind the views that name neither a queryset nor a serializer
+VIEW_MODELS = {ImageUploadView: Images, ExportJobDownloadView: ExportJob}
+# Routes looking rows up outside their view's queryset
+ROUTE_ROWS = {
+    "order-today-detail": lambda: Order.objects.filter(
+        created_at__gte=timezone.now() - timedelta(hours=1)
+    ),
+}
+
+
+def iter_routes(patterns=None, prefix=""):
+    """(regex, view class, name) for every DRF GET route in the project URLconf."""
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        regex = prefix + pattern.pattern.regex.pattern.lstrip("^")
+        if isinstance(pattern, URLResolver):
+            yield from iter_routes(pattern.url_patterns, regex)
+        elif isinstance(pattern, URLPattern):
+            view = getattr(pattern.callback, "cls", None)
+            # API docs are generated, not application endpoints.
+            if (
+                view is None
+                or not issubclass(view, APIView)
+                or view.__module__.startswith("drf_yasg")
+            ):
+                continue
+            # Viewset routes list the methods they map to actions
+            actions = getattr(pattern.callback, "actions", None)
+            if actions is None:
+                actions = {"get": None} if hasattr(view, "get") else {}
+            if "get" in actions:
+                yield regex, view, pattern.name
+
+
+def build_path(regex, values):
+    """Fill the named groups of a route regex; None when a value is unknown."""
+    missing = set(re.findall(r"\(\?P<(\w+)>", regex)) - values.keys()
+    if missing:
+        return None
+    # Format suffixes either follow a literal dot or include it
+    path = re.sub(
+        r"\(\?P<(\w+)>(\\\.)?[^)]*\)",
+        lambda m: ("." if m.group(2) else "") + str(values[m.group(1)]),
+        regex,
+    )
+    path = re.sub(r"(\\Z|\$)$", "", path).removesuffix("/?")
+    path = path.replace("\\.", ".").replace("\\", "")
+    return "/" + path
+
+
+@override_settings(INSTRUMENTATION={"ENABLED": False})
+@mock.patch("celery.app.task.Task.apply_async")
+class TestQueryCounts(TestCase):
+    """
+    Every GET route, as every role, must stay within QUERY_BUDGET queries and
+    run the same number of queries whether the tables are small or large, so
+    a new N+1 anywhere fails the suite.
+    """
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.rng = random.Random(36)
+        self.users = {role: factories.make_user(role) for role in ROLES}
+        # Admin-only routes are measured too
+        User.objects.filter(role=User.Admin).update(is_staff=True, is_admin=True)
+        self.users[User.Admin].refresh_from_db()
+        self.categories = factories.make_categories(3, self.rng)
+        self.grow(SMALL)
+        self.add_records()
+
+    def add_records(self):
+        """A row for every detail route the growing tables do not cover."""
+        admin, designer = self.users[User.Admin], self.users[User.Designer]
+        # An order from before today, waiting at the reception
+        order = Order.objects.create(
+            order_name="Banner",
+            customer_name="Customer",
+            category=self.categories[0],
+            designer=designer,
+            status="Reception",
+        )
+        Order.objects.filter(pk=order.pk).update(
+            created_at=timezone.now() - timedelta(days=7)
+        )
+        post_category = PostCategory.objects.create(category_name="News")
+        BlogPost.objects.create(
+            title="Post", category=post_category, description="<p>Post</p>"
+        )
+        Reception.objects.create(
+            designer=designer,
+            customer_name="Customer",
+            order_name="Order",
+            description="<p>Order</p>",
+            category=ReceptionCategory.objects.create(name="Print"),
+        )
+        Services.objects.create(title="Print", description="<p>x</p>", image="s.jpg")
+        Images.objects.create(images="slider/images/a.jpg")
+        AboutModel.objects.create(image="gallery/about/a.jpg")
+        category = ContentCategory.objects.create(
+            name="Print", description="<p>x</p>", image="c.jpg"
+        )
+        SubCategory.objects.create(category=category, name="Cards", image="s.jpg")
+        CustomerImages.objects.create(name="Logo", image="customer_images/a.jpg")
+        Contact.objects.create(email="c@example.com", name="C", content="Hi")
+        staff = Staff.objects.create(
+            name="Staff",
+            father_name="Father",
+            nic=1000,
+            photo="staff/images/photo.jpg",
+            address="Kabul",
+            location=Staff.Location.SHOP,
+            position=Staff.Position.PRINTER,
+            salary_per_day=Decimal("100.00"),
+        )
+        UpsentModel.objects.create(staff=staff, day=date(2026, 9, 2))
+        Salary.objects.create(staff=staff, amount=Decimal("100.00"))
+        run_payroll(date(2026, 9, 1), date(2026, 9, 30))
+        run_export(start_export(admin, ExportJob.Format.CSV).pk)
+        ImportJob.objects.create(requested_by=admin, format="csv")
+
+    def grow(self, count):
+        rng, users = self.rng, list(self.users.values())
+        orders = factories.make_orders(
+            count, rng, self.categories, [self.users[User.Designer]]
+        )
+        factories.make_reception_orders(orders[::2], rng, [self.users[User.Reception]])
+        factories.make_messages(count * 2, rng, users)
+        factories.make_gallery(count, rng)
+
+    def path_values(self, view, name=None):
+        order = Order.objects.order_by("pk").first()
+        designer, reception = self.users[User.Designer], self.users[User.Reception]
+        values = {
+            "status": "Designer",
+            "category_id": self.categories[0].pk,
+            "order_id": order.pk,
+            "email": designer.email,
+            "user_email": designer.email,
+            "user_id": designer.pk,
+            "sender_id": designer.pk,
+            "receiver_id": reception.pk,
+            "format": "json",
+        }
+        if name in ROUTE_ROWS:
+            values["pk"] = ROUTE_ROWS[name]().order_by("pk").first().pk
+            return values
+        # Detail routes get a row the view itself returns to some role
+        for user in self.users.values():
+            instance = self.first_instance(view, values, user)
+            if instance is not None:
+                values["pk"] = values["id"] = instance.pk
+                break
+        return values
+
+    def first_instance(self, view, values, user):
+        queryset = None
+        if issubclass(view, GenericAPIView):
+            request = Request(APIRequestFactory().get("/"))
+            request.user = user
+            handler = view(
+                request=request, kwargs=values, format_kwarg=None, action="retrieve"
+            )
+            try:
+                queryset = handler.get_queryset()
+            except AssertionError:  # neither a queryset nor get_queryset()
+                pass
+        if queryset is None and view in VIEW_MODELS:
+            queryset = VIEW_MODELS[view].objects.all()
+        return queryset.order_by("pk").first() if queryset is not None else None
+
+    def query_params(self, view):
+        if view is FalseMessageReadStatusView:
+            unread = ChatMassage.objects.filter(is_read=False).order_by("pk").first()
+            return {"receiver_id": unread.receiver_id}
+        return {}
+
+    def measure(self):
+        client = APIClient()
+        client.raise_request_exception = False
+        results, skipped = {}, []
+        for regex, view, name in iter_routes():
+            path = build_path(regex, self.path_values(view, name))
+            if path is None:
+                skipped.append(regex)
+                continue
+            for role, user in self.users.items():
+                cache.clear()
+                client.force_authenticate(user)
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(path, self.query_params(view))
+                results[path, ROLE_NAMES[role]] = (
+                    response.status_code,
+                    len(queries),
+                )
+        self.assertEqual(skipped, [], "\n".join(["Routes with no values:", *skipped]))
+        return results
+
+    def test_queries_are_bounded_and_independent_of_volume(self, apply_async):
+        small = self.measure()
+        self.grow(LARGE - SMALL)
+        large = self.measure()
+
+        # A route no role can read measures nothing but its error handling
+        statuses = {}
+        for (path, _), (status, _) in large.items():
+            statuses.setdefault(path, []).append(status)
+        problems = [
+            f"{path}: no role gets a 2xx ({', '.join(map(str, codes))})"
+            for path, codes in sorted(statuses.items())
+            if all(code >= 300 for code in codes)
+        ]
+        for key, (status, count) in sorted(large.items()):
+            path, role = key
+            if status >= 500:
+                problems.append(f"{path} as {role}: HTTP {status}")
+            elif count > QUERY_BUDGET:
+                problems.append(f"{path} as {role}: {count} queries")
+            elif key in small and count > small[key][1]:
+                problems.append(f"{path} as {role}: {small[key][1]} -> {count} queries")
+        self.assertEqual(problems, [], "\n".join(problems))
+
+
+@override_settings(INSTRUMENTATION={"ENABLED": False})
+class TestBenchmarkCommand(TestCase):
+    def test_writes_percentiles_for_every_scenario(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "results.json")
+            call_command(
+                "benchmark_orders",
+                "--current-database",
+                "--orders=20",
+                "--categories=2",
+                "--iterations=3",
+                "--warmup=0",
+                f"--output={output}",
+                stdout=io.StringIO(),
+            )
+            with open(output) as fp:
+                results = json.load(fp)
+
+        self.assertEqual(results["meta"]["orders"], 20)
+        self.assertIn("reception_orders.settle", results["scenarios"])
+        for name, row in results["scenarios"].items():
+            self.assertEqual(row["errors"], 0, name)
+            self.assertLessEqual(row["p50_ms"], row["p99_ms"])
+
+
+class TestGenerateOrders(TestCase):
+    def generate(self, **options):
+        call_command(
+            "generate_orders",
+            orders=60,
+            categories=3,
+            designers=2,
+            receptionists=1,
+            batch_size=20,
+            stdout=io.StringIO(),
+            **options,
+        )
+
+    def test_data_is_consistent_with_categories(self):
+        self.generate(days=30)
+
+        self.assertEqual(Order.objects.count(), 60)
+        for order in Order.objects.select_related("category"):
+            self.assertIn(order.status, order.category.stages)
+            names = set(
+                order.category.attribute_types.values_list("name", flat=True)
+            )
+            self.assertEqual(set(order.attributes), names)
+        for payment in ReceptionOrder.objects.all():
+            self.assertLessEqual(payment.receive_price, payment.price)
+            self.assertEqual(
+                payment.reminder_price, payment.price - payment.receive_price
+            )
+        self.assertEqual(ChatMassage.objects.count(), 30)
+        self.assertGreater(
+            Order.objects.filter(
+                created_at__lt=timezone.now() - timedelta(days=7)
+            ).count(),
+            0,
+        )
+
+    def test_same_seed_generates_same_orders(self):
+        def snapshot():
+            return list(
+                Order.objects.order_by("secret_key").values_list(
+                    "customer_name", "status", "attributes"
+                )
+            )
+
+        self.generate(seed=1)
+        first = snapshot()
+        Order.objects.all().delete()
+        self.generate(seed=1)
+        self.assertEqual(snapshot(), first)
+
 
 # # Create your tests here.
 # from decimal import Decimal
@@ -237,4 +603,502 @@ from django.test import TestCase
 #             delivery_date=validated_data["delivery_date"],
 #         )
 
-#         return reception_order
\ No newline at end of file
+#         return reception_order
+
+
+class TestOrderReports(TestCase):
+    def setUp(self):
+        rng = random.Random(46)
+        self.categories = factories.make_categories(2, rng)
+        self.designer = factories.make_user(User.Designer)
+        self.reception = factories.make_user(User.Reception)
+        orders = factories.make_orders(
+            80, rng, self.categories, [self.designer], days=90
+        )
+        factories.make_reception_orders(orders[::2], rng, [self.reception])
+        # bulk_create bypasses the signals, as an import would
+        call_command("rebuild_order_rollups", stdout=io.StringIO())
+
+    def expected_months(self):
+        months = {}
+        for order in Order.objects.select_related("reception_details"):
+            year, month = jalali_month(business_day(order.created_at))
+            key = f"{year:04d}-{month:02d}"
+            orders, revenue = months.get(key, (0, 0))
+            payment = getattr(order, "reception_details", None)
+            months[key] = (orders + 1, revenue + (payment.price if payment else 0))
+        return months
+
+    def report_months(self):
+        return {
+            row["period"]: (row["orders"], row["revenue"])
+            for row in order_report("month")
+        }
+
+    def expected_categories(self):
+        categories = {}
+        for order in Order.objects.select_related("reception_details"):
+            payment = getattr(order, "reception_details", None)
+            orders, received = categories.get(order.category_id, (0, 0))
+            received += payment.receive_price if payment else 0
+            categories[order.category_id] = (orders + 1, received)
+        return categories
+
+    def report_categories(self):
+        categories = {}
+        for row in order_report("year", by_category=True):
+            orders, received = categories.get(row["category"], (0, 0))
+            categories[row["category"]] = (
+                orders + row["orders"],
+                received + row["received"],
+            )
+        return categories
+
+    def test_rollups_match_the_orders(self):
+        self.assertEqual(self.report_months(), self.expected_months())
+        by_category = order_report("year", by_category=True)
+        self.assertEqual(sum(row["orders"] for row in by_category), 80)
+        self.assertEqual(
+            {row["category"] for row in by_category},
+            {category.pk for category in self.categories},
+        )
+
+    def test_saves_and_deletes_update_the_rollups(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(
+                order_name="Poster",
+                customer_name="Customer",
+                category=self.categories[0],
+                status="Designer",
+            )
+            ReceptionOrder.objects.create(
+                order=order, reception_name=self.reception, price=500, receive_price=200
+            )
+        self.assertEqual(self.report_months(), self.expected_months())
+        today = OrderDayRollup.objects.get(
+            date=business_day(order.created_at), category=self.categories[0]
+        )
+        self.assertGreaterEqual(today.received, 200)
+
+        # Only the difference is written, after the commit
+        with self.captureOnCommitCallbacks() as callbacks:
+            order.category = self.categories[1]
+            order.save()
+            order.reception_details.receive_price = 500
+            order.reception_details.save()
+            order.status = "Printer"
+            order.save()
+        self.assertEqual(len(callbacks), 2)
+        with CaptureQueriesContext(connection) as queries:
+            for callback in callbacks:
+                callback()
+        self.assertFalse([q for q in queries.captured_queries if "DELETE" in q["sql"]])
+        self.assertEqual(self.report_months(), self.expected_months())
+        self.assertEqual(self.report_categories(), self.expected_categories())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order.delete()
+        self.assertEqual(self.report_months(), self.expected_months())
+
+    def test_api(self):
+        client = APIClient()
+        client.force_authenticate(self.designer)
+        url = "/group/reports/orders/"
+        self.assertEqual(client.get(url).status_code, 403)
+
+        User.objects.filter(pk=self.designer.pk).update(is_staff=True)
+        self.designer.refresh_from_db()
+        client.force_authenticate(self.designer)
+        response = client.get(url, {"period": "week", "by_category": "true"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sum(row["orders"] for row in response.data), 80)
+        self.assertEqual(
+            set(response.data[0]),
+            {
+                "period",
+                "category",
+                "category_name",
+                "orders",
+                "revenue",
+                "received",
+                "remaining",
+            },
+        )
+
+        last = max(row["period"] for row in response.data)
+        response = client.get(url, {"period": "day", "start": last})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(all(row["period"] >= last for row in response.data))
+
+        self.assertEqual(client.get(url, {"period": "decade"}).status_code, 400)
+
+
+@override_settings(SHOP_TIME_ZONE="Asia/Kabul", INSTRUMENTATION={"ENABLED": False})
+class TestBusinessDay(TestCase):
+    def setUp(self):
+        self.designer = factories.make_user(User.Designer)
+        self.reception = factories.make_user(User.Reception)
+        category = factories.make_categories(1, random.Random(47))[0]
+        start, _ = business_days.today_range()
+        # Kabul is UTC+4:30, so its day starts at 19:30 UTC the day before
+        self.assertEqual((start.hour, start.minute), (0, 0))
+        self.today, self.yesterday = factories.make_orders(
+            2, random.Random(47), [category], [self.designer], statuses=["Designer"]
+        )
+        Order.objects.filter(pk=self.today.pk).update(
+            created_at=min(start + timedelta(minutes=1), timezone.now())
+        )
+        Order.objects.filter(pk=self.yesterday.pk).update(
+            created_at=start - timedelta(minutes=1)
+        )
+        self.client = APIClient()
+
+    def keys(self, response):
+        return [row["id"] for row in response.data["results"]]
+
+    def test_today_is_the_shops_day(self):
+        self.client.force_authenticate(self.designer)
+        response = self.client.get("/group/orders/today/")
+        self.assertEqual(self.keys(response), [self.today.pk])
+        response = self.client.get("/group/orders/")
+        self.assertEqual(self.keys(response), [self.yesterday.pk])
+
+        response = self.client.get(f"/group/orders/today/{self.yesterday.pk}/")
+        self.assertEqual(response.status_code, 404)
+        day = business_day(timezone.now()).isoformat()
+        response = self.client.get("/group/orders/today/", {"date": day})
+        self.assertEqual(self.keys(response), [self.today.pk])
+
+    def test_range_is_computed_once_per_request(self):
+        self.client.force_authenticate(self.reception)
+        with mock.patch.object(
+            business_days, "day_range", wraps=business_days.day_range
+        ) as day_range:
+            response = self.client.get(
+                f"/group/orders/reception_list/today/{self.today.pk}/"
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(day_range.call_count, 1)
+
+        # /group/orders/reception_list/ is shadowed by the order detail route
+        request = APIRequestFactory().get("/group/orders/reception_list/")
+        force_authenticate(request, self.reception)
+        response = ReceptionListOldOrdersView.as_view()(request)
+        self.assertEqual(self.keys(response), [self.yesterday.pk])
+
+
+@override_settings(INSTRUMENTATION={"ENABLED": False})
+class TestOrderAdmin(TestCase):
+    def setUp(self):
+        self.rng = random.Random(48)
+        self.admin = factories.make_user(User.Admin, is_staff=True, is_admin=True)
+        self.designers = [factories.make_user(User.Designer) for _ in range(2)]
+        self.categories = factories.make_categories(2, self.rng)
+        self.client.force_login(self.admin)
+
+    def grow(self, count):
+        orders = factories.make_orders(
+            count, self.rng, self.categories, self.designers
+        )
+        factories.make_reception_orders(orders[::2], self.rng, [self.admin])
+        return orders
+
+    def changelist_queries(self, name, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(name), params or {})
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelists_run_the_same_queries_at_any_size(self):
+        self.grow(SMALL)
+        year = Order.objects.earliest("created_at").created_at.year
+        views = [
+            ("admin:group_order_changelist", None),
+            ("admin:group_order_changelist", {"created_at__year": year}),
+            ("admin:group_order_changelist", {"status": "Designer"}),
+            ("admin:group_receptionorder_changelist", None),
+        ]
+        small = [self.changelist_queries(*view) for view in views]
+        self.grow(LARGE - SMALL)
+        large = [self.changelist_queries(*view) for view in views]
+        self.assertEqual(small, large)
+
+    def test_date_hierarchy_does_not_scan_the_table(self):
+        orders = self.grow(SMALL)
+        day = timezone.localtime(orders[0].created_at)
+        params = {"created_at__year": day.year, "created_at__month": day.month}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("admin:group_order_changelist"), params)
+        self.assertContains(response, f"created_at__day={day.day}")
+        self.assertFalse(
+            any("DISTINCT" in query["sql"] for query in queries.captured_queries)
+        )
+
+    def test_unfiltered_tables_are_counted_from_the_estimate(self):
+        orders = self.grow(4)
+        Order.objects.filter(pk=orders[0].pk).delete()
+        last = max(order.pk for order in orders)
+        with mock.patch.object(paginators, "EXACT_COUNT_LIMIT", 0):
+            paginator = paginators.EstimatedCountPaginator(Order.objects.all(), 2)
+            self.assertEqual(paginator.count, last)
+            filtered = Order.objects.filter(category__in=self.categories)
+            paginator = paginators.EstimatedCountPaginator(filtered, 2)
+            self.assertEqual(paginator.count, 3)
+        paginator = paginators.EstimatedCountPaginator(Order.objects.all(), 2)
+        self.assertEqual(paginator.count, 3)
+
+
+@override_settings(INSTRUMENTATION={"ENABLED": False})
+@mock.patch("celery.app.task.Task.apply_async")
+class TestExportJobs(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        rng = random.Random(49)
+        self.admin = factories.make_user(User.Admin, is_staff=True, is_admin=True)
+        self.designers = [factories.make_user(User.Designer) for _ in range(2)]
+        self.orders = factories.make_orders(
+            7, rng, factories.make_categories(2, rng), self.designers
+        )
+
+    def read_csv(self, job):
+        with job.file.open("rb") as file:
+            return list(csv.reader(io.StringIO(file.read().decode())))
+
+    def test_csv_is_written_in_chunks(self, apply_async):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = start_export(self.admin, ExportJob.Format.CSV)
+        apply_async.assert_called_once()
+
+        with CaptureQueriesContext(connection) as queries:
+            job = run_export(job.pk, chunk_size=3)
+        chunk_reads = [q for q in queries.captured_queries if "LIMIT 3" in q["sql"]]
+        self.assertEqual(len(chunk_reads), 4)  # three chunks and the empty read
+        self.assertEqual((job.status, job.progress), (ExportJob.Status.DONE, 100))
+        self.assertEqual((job.total_rows, job.exported_rows), (7, 7))
+        rows = self.read_csv(job)
+        self.assertEqual(rows[0][:2], ["Order Name", "Customer Name"])
+        self.assertEqual(
+            [row[0] for row in rows[1:]],
+            [order.order_name for order in sorted(self.orders, key=lambda o: o.pk)],
+        )
+        # A redelivered task does not export again
+        self.assertIsNone(run_export(job.pk))
+
+    def test_xlsx_keeps_the_filters(self, apply_async):
+        designer = self.designers[0]
+        job = start_export(
+            self.admin, ExportJob.Format.XLSX, {"designer": designer.pk}
+        )
+        job = run_export(job.pk)
+        with job.file.open("rb") as file:
+            sheet = openpyxl.load_workbook(file).active
+        self.assertEqual(
+            sheet.max_row - 1, Order.objects.filter(designer=designer).count()
+        )
+
+    def test_status_endpoint_and_download(self, apply_async):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(
+                "/group/exports/orders/",
+                {"format": "csv", "filters": {"status": "Designer"}},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["status"], ExportJob.Status.PENDING)
+        self.assertIsNone(response.data["download"])
+        apply_async.assert_called_once()
+
+        run_export(response.data["id"])
+        response = client.get(f"/group/exports/{response.data['id']}/")
+        self.assertEqual(response.data["progress"], 100)
+        download = client.get(response.data["download"])
+        self.assertEqual(download.status_code, 200)
+        self.assertEqual(
+            len(b"".join(download.streaming_content).splitlines()),
+            Order.objects.filter(status="Designer").count() + 1,
+        )
+
+        response = client.post(
+            "/group/exports/orders/",
+            {"format": "csv", "filters": {"customer": "x"}},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+        with mock.patch.object(exports, "EXPORT_MAX_IDS", 2):
+            response = client.post(
+                "/group/exports/orders/",
+                {"format": "csv", "filters": {"ids": [1, 2, 3]}},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 400)
+
+    def test_expired_files_are_removed(self, apply_async):
+        job = run_export(start_export(self.admin, ExportJob.Format.CSV).pk)
+        storage, name = job.file.storage, job.file.name
+        self.assertEqual(expire_exports(now=job.expires_at - timedelta(seconds=1)), 0)
+        self.assertEqual(expire_exports(now=job.expires_at), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.file.name), (ExportJob.Status.EXPIRED, ""))
+        self.assertFalse(storage.exists(name))
+
+    def test_admin_action_queues_the_changelist_filters(self, apply_async):
+        self.client.force_login(self.admin)
+        url = reverse("admin:group_order_changelist")
+        data = {
+            "action": "export_all_orders",
+            "select_across": "1",
+            "_selected_action": [self.orders[0].pk],
+        }
+        self.client.post(f"{url}?status=Designer", data)
+        self.client.post(url, {**data, "select_across": "0"})
+        order = self.orders[0]
+        self.client.post(f"{url}?q={order.secret_key}", data)
+        first, second, third = ExportJob.objects.order_by("pk")
+        self.assertEqual(first.filters, {"status": "Designer"})
+        self.assertEqual(second.filters, {"ids": [order.pk]})
+        self.assertEqual(third.filters, {"search": str(order.secret_key)})
+        rows = self.read_csv(run_export(third.pk))
+        self.assertEqual([row[0] for row in rows[1:]], [order.order_name])
+
+        # A changelist filter exports cannot repeat is refused, not listed by id
+        response = self.client.post(f"{url}?order_name=x", data, follow=True)
+        self.assertEqual(ExportJob.objects.count(), 3)
+        self.assertContains(response, "Exports cannot filter by order_name")
+
+
+@override_settings(INSTRUMENTATION={"ENABLED": False})
+@mock.patch("celery.app.task.Task.apply_async")
+class TestOrderImports(TestCase):
+    HEADER = "Order Name,Customer Name,Category,Designer,Status,Paper,Due,Urgent"
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.admin = factories.make_user(User.Admin, is_staff=True, is_admin=True)
+        self.designer = factories.make_user(User.Designer)
+        self.category = Category.objects.create(
+            name="Banner", stages=["Designer", "Printer"]
+        )
+        paper = AttributeType.objects.create(
+            name="Paper", category=self.category, attribute_type="dropdown"
+        )
+        for value in ["A4", "A5"]:
+            AttributeValue.objects.create(attribute=paper, attribute_value=value)
+        AttributeType.objects.create(
+            name="Due", category=self.category, attribute_type="date"
+        )
+        AttributeType.objects.create(
+            name="Urgent", category=self.category, attribute_type="checkbox"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def upload(self, name, content, **data):
+        return self.client.post(
+            "/group/imports/orders/",
+            {"file": SimpleUploadedFile(name, content), **data},
+            format="multipart",
+        )
+
+    def sheet(self, *rows):
+        return "\n".join([self.HEADER, *rows]).encode()
+
+    def test_rows_are_validated_and_imported(self, apply_async):
+        email = self.designer.email
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.upload(
+                "orders.csv",
+                self.sheet(
+                    f"Flyer,Ali,banner,{email},,A4,1403-07-28,yes",
+                    "Poster,Sara,Unknown,,,,,",
+                    f"Card,Reza,{self.category.pk},,Printer,A5,2024-10-19,",
+                    "Menu,Nima,Banner,,Packing,B1,soon,maybe",
+                ),
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            (response.data["imported_rows"], response.data["failed_rows"]), (2, 2)
+        )
+        errors = {row["row"]: set(row["errors"]) for row in response.data["errors"]}
+        self.assertEqual(
+            errors, {3: {"category"}, 5: {"status", "Paper", "Due", "Urgent"}}
+        )
+
+        flyer, card = Order.objects.order_by("secret_key")
+        self.assertEqual(card.secret_key, flyer.secret_key + 1)
+        self.assertEqual((flyer.designer, flyer.status), (self.designer, "Designer"))
+        self.assertEqual(
+            flyer.attributes, {"Paper": "A4", "Due": "2024-10-19", "Urgent": True}
+        )
+        self.assertEqual(card.attributes, {"Paper": "A5", "Due": "2024-10-19"})
+        # Written with bulk_create, counted in the report rollups all the same
+        rollup = OrderDayRollup.objects.get(category=self.category)
+        self.assertEqual(rollup.orders, 2)
+        self.assertEqual(ImportJob.objects.get().file.name, "")
+
+    def test_chunks_share_one_insert_and_one_key_block(self, apply_async):
+        rows = [f"Order {index},Customer,Banner,,,A4,," for index in range(5)]
+        job = ImportJob.objects.create(
+            format="csv",
+            file=SimpleUploadedFile("orders.csv", self.sheet(*rows)),
+        )
+        with CaptureQueriesContext(connection) as queries:
+            job = imports.run_import(job.pk, chunk_size=2)
+        inserts = [
+            query
+            for query in queries.captured_queries
+            if query["sql"].startswith('INSERT INTO "group_order"')
+        ]
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual((job.total_rows, job.imported_rows), (5, 5))
+        keys = list(Order.objects.order_by("pk").values_list("secret_key", flat=True))
+        self.assertEqual(keys, list(range(keys[0], keys[0] + 5)))
+
+    def test_xlsx_dry_run_and_unreadable_files(self, apply_async):
+        workbook = openpyxl.Workbook()
+        workbook.active.append(self.HEADER.split(","))
+        workbook.active.append(["Flyer", "Ali", "Banner", None, None, "A4", None, True])
+        workbook.active.append(["Card", "Reza", "Banner", None, None, 7, None, None])
+        content = io.BytesIO()
+        workbook.save(content)
+
+        response = self.upload("orders.xlsx", content.getvalue(), dry_run=True)
+        self.assertEqual(
+            (response.data["imported_rows"], response.data["failed_rows"]), (1, 1)
+        )
+        self.assertFalse(Order.objects.exists())
+
+        response = self.upload("orders.xlsx", b"not a workbook")
+        self.assertEqual(response.data["status"], ImportJob.Status.FAILED)
+        response = self.upload("orders.txt", b"")
+        self.assertEqual(response.status_code, 400)
+
+    def test_large_files_are_imported_in_the_background(self, apply_async):
+        with mock.patch.object(imports, "IMPORT_BACKGROUND_BYTES", 10):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.upload(
+                    "orders.csv", self.sheet("Flyer,Ali,Banner,,,A4,,")
+                )
+        self.assertEqual(response.status_code, 202)
+        apply_async.assert_called_once()
+        self.assertFalse(Order.objects.exists())
+
+        imports.run_import(response.data["id"])
+        response = self.client.get(f"/group/imports/{response.data['id']}/")
+        self.assertEqual(response.data["status"], ImportJob.Status.DONE)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_single_orders_continue_after_imported_keys(self, apply_async):
+        factories.make_orders(3, random.Random(50), [self.category], [self.designer])
+        last = Order.objects.order_by("-secret_key").first().secret_key
+        self.upload("orders.csv", self.sheet("Flyer,Ali,Banner,,,A4,,"))
+        order = Order.objects.create(
+            order_name="Card", customer_name="Reza", category=self.category
+        )
+        self.assertEqual(order.secret_key, last + 2)
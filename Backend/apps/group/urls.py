@@ -11,8 +11,14 @@ from .views import (
     CategoryAttributeView,
     CategoryCreateView,
     CategoryUpdateView,
+    ExportJobCreateView,
+    ExportJobDetailView,
+    ExportJobDownloadView,
+    ImportJobCreateView,
+    ImportJobDetailView,
     OrderListByCategoryView,
     OrderListView,
+    OrderReportView,
     OrderStatusDetailView,
     OrderStatusRoleViewSet,
     OrderStatusUpdateView,
@@ -118,6 +124,16 @@ urlpatterns = [
         UpdateReminderPriceView.as_view(),
         name="update-reminder-price",
     ),
+    path("reports/orders/", OrderReportView.as_view(), name="order-report"),
+    path("exports/orders/", ExportJobCreateView.as_view(), name="export-job-create"),
+    path("exports/<int:pk>/", ExportJobDetailView.as_view(), name="export-job-detail"),
+    path(
+        "exports/<int:pk>/download/",
+        ExportJobDownloadView.as_view(),
+        name="export-job-download",
+    ),
+    path("imports/orders/", ImportJobCreateView.as_view(), name="import-job-create"),
+    path("imports/<int:pk>/", ImportJobDetailView.as_view(), name="import-job-detail"),
     path("", include(router.urls)),
     path(
         "group/orders/reception_list/",
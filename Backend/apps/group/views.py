@@ -4,6 +4,8 @@ import csv
 import uuid
 from decimal import Decimal
 
+from apps.common.business_day import in_range, is_within, outside_range, today_range
+from apps.common.instrumentation import InstrumentedViewMixin
 from apps.group.filters import OrderFilter
 from apps.group.paginations import OrderPagination
 from apps.group.permissions import IsSuperDesignerOrReception
@@ -15,9 +17,8 @@ from django.core.exceptions import ValidationError
 from django.db.models import Q
 from django.db.models.signals import pre_save
 from django.dispatch import receiver
-from django.http import Http404, HttpResponse
+from django.http import FileResponse, Http404, HttpResponse
 from django.shortcuts import get_object_or_404
-from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics, status, viewsets
@@ -25,17 +26,35 @@ from rest_framework.decorators import action
 from rest_framework.exceptions import NotFound, PermissionDenied
 from rest_framework.exceptions import ValidationError as DRFValidationError
 from rest_framework.filters import SearchFilter
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import AttributeType, AttributeValue, Category, Order, ReceptionOrder
+from .exports import start_export
+from .imports import start_import
+from .models import (
+    AttributeType,
+    AttributeValue,
+    Category,
+    ExportJob,
+    ImportJob,
+    Order,
+    ReceptionOrder,
+)
+from .reports import order_report
 from .serializers import (
     AttributeTypeSerializer,
     AttributeValueSerializer,
     CategorySerializer,
+    ExportJobCreateSerializer,
+    ExportJobSerializer,
+    ImportJobCreateSerializer,
+    ImportJobSerializer,
     JalaliDateField,
     OrderSerializer,
+    OrderReportQuerySerializer,
+    OrderReportRowSerializer,
     OrderSerializerByPrice,
     OrderStatusUpdateSerializer,
     ReceptionOrderSerializer,
@@ -123,7 +142,7 @@ class CategoryAttributeView(APIView):
         return Response(response_data, status=status.HTTP_200_OK)
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(InstrumentedViewMixin, viewsets.ModelViewSet):
     """
     EXISTING: API endpoint for Orders. Handles /orders/, /orders/{pk}/, etc.
     (Logic Unchanged by new requirements)
@@ -161,16 +180,16 @@ class OrderViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Default queryset excludes today's orders, applying role filters."""
         queryset = self._get_base_queryset_for_user()
-        today = timezone.now().date()
-        queryset = queryset.exclude(created_at__date=today)
+        queryset = queryset.filter(
+            outside_range("created_at", today_range(self.request))
+        )
         return queryset.order_by("-created_at")
 
     @action(detail=False, methods=["get"], url_path="today", url_name="today-list")
     def today_orders_list(self, request, *args, **kwargs):
         """Custom action to list only orders created today, applying role filters."""
         queryset = self._get_base_queryset_for_user()
-        today = timezone.now().date()
-        queryset = queryset.filter(created_at__date=today)
+        queryset = queryset.filter(in_range("created_at", today_range(request)))
         queryset = self.filter_queryset(queryset)
         page = self.paginate_queryset(queryset)
         if page is not None:
@@ -188,8 +207,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         except Http404:
             raise NotFound(detail=f"Order {pk} not found or permission denied.")
 
-        today = timezone.now().date()
-        if obj.created_at.date() != today:
+        if not is_within(obj.created_at, today_range(self.request)):
             raise NotFound(detail=f"Order {pk} was not created today.")
 
         self.check_object_permissions(self.request, obj)
@@ -266,7 +284,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         instance.delete()
 
 
-class OrderListView(generics.ListAPIView):
+class OrderListView(InstrumentedViewMixin, generics.ListAPIView):
     """EXISTING: Read-only list view for Orders filtered ONLY by status from URL path."""
 
     serializer_class = OrderSerializer
@@ -344,7 +362,7 @@ class OrderStatusDetailView(generics.RetrieveUpdateDestroyAPIView):
         return obj
 
 
-class OrderListByCategoryView(generics.ListAPIView):
+class OrderListByCategoryView(InstrumentedViewMixin, generics.ListAPIView):
     """EXISTING: Read-only list view for Orders filtered by category_id from URL path."""
 
     serializer_class = OrderSerializer
@@ -405,7 +423,7 @@ class OrderStatusUpdateView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class ReceptionOrderViewSet(viewsets.ModelViewSet):
+class ReceptionOrderViewSet(InstrumentedViewMixin, viewsets.ModelViewSet):
     """EXISTING: API endpoint for ReceptionOrder records."""
 
     serializer_class = ReceptionOrderSerializer
@@ -603,9 +621,8 @@ class ReceptionListOldOrdersView(generics.ListAPIView):
         if getattr(user, "role", None) != reception_role_id:
             return Order.objects.none()
 
-        today = timezone.now().date()
         queryset = (
-            Order.objects.exclude(created_at__date=today)
+            Order.objects.filter(outside_range("created_at", today_range(self.request)))
             .exclude(status__iexact="Reception")
             .select_related("designer", "category")
             .order_by("-created_at")
@@ -631,9 +648,8 @@ class ReceptionTodayNonReceptionOrdersViewSet(viewsets.ModelViewSet):
         if getattr(user, "role", None) != reception_role_id:
             return Order.objects.none()
 
-        today = timezone.now().date()
         queryset = (
-            Order.objects.filter(created_at__date=today)
+            Order.objects.filter(in_range("created_at", today_range(self.request)))
             .exclude(status__iexact="Reception")
             .select_related("designer", "category")
             .order_by("-created_at")
@@ -669,8 +685,10 @@ class ReceptionTodayNonReceptionOrdersViewSet(viewsets.ModelViewSet):
                 message="You must have the Reception role to access this object.",
             )
 
-        today = timezone.now().date()
-        if obj.created_at.date() != today or obj.status.lower() == "reception":
+        if (
+            not is_within(obj.created_at, today_range(request))
+            or obj.status.lower() == "reception"
+        ):
             raise NotFound(
                 "This order does not match the criteria for this endpoint "
                 "(must be created today and status not 'Reception')."
@@ -717,36 +735,27 @@ class OrderStatusRoleViewSet(viewsets.ModelViewSet):
     lookup_field = "pk"
     http_method_names = ["get", "put", "patch", "delete", "head", "options"]
 
-    # def _get_user_role_display_name(self, user):
-    #     """Helper to safely get the role's display name."""
-    #     if not hasattr(user, 'role') or user.role is None:
-    #         return None
-    #     try:
-    #         return user.get_role_display()
-    #     except AttributeError:
-    #          print(f"Warning: Could not get role display name for user {user.id}")
-    #          for role_int, role_name in User.ROLE_CHOICES:
-    #              if role_int == user.role:
-    #                  return role_name
-    #          return None
-
-    # def _user_can_access_status_url(self, user, status_from_url):
-    #     """Checks if the user's role permits accessing this specific status URL."""
-    #     if not status_from_url:
-    #         return False
-
-    #     user_role_int = getattr(user, 'role', None)
-    #     is_admin = user.is_admin or user_role_int == User.Admin
-    #     is_super_designer = user_role_int == User.SuperDesigner
-
-    #     if is_admin or is_super_designer:
-    #         return True
-
-    #     user_role_name = self._get_user_role_display_name(user)
-    #     if user_role_name and user_role_name.lower() == status_from_url.lower():
-    #         return True
-
-    #     return False
+    def _get_user_role_display_name(self, user):
+        """Helper to safely get the role's display name."""
+        if getattr(user, "role", None) is None:
+            return None
+        return dict(User.ROLE_CHOICES).get(user.role)
+
+    def _user_can_access_status_url(self, user, status_from_url):
+        """Checks if the user's role permits accessing this specific status URL."""
+        if not status_from_url:
+            return False
+
+        user_role_int = getattr(user, "role", None)
+        is_admin = user.is_admin or user_role_int == User.Admin
+        is_super_designer = user_role_int == User.SuperDesigner
+
+        if is_admin or is_super_designer:
+            return True
+
+        user_role_name = self._get_user_role_display_name(user) or ""
+        return user_role_name.lower() == status_from_url.lower()
+
     def get_queryset(self):
         """
         Filters the queryset by the 'status' value from the URL.
@@ -799,3 +808,98 @@ class OrderStatusRoleViewSet(viewsets.ModelViewSet):
             return True
 
         return True
+
+
+class OrderReportView(APIView):
+    """
+    Orders, revenue and amounts received per Jalali day, week (from
+    Saturday), month or year, read from the daily rollups. ``start`` and
+    ``end`` are Jalali dates; ``by_category`` splits every period by category.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        query = OrderReportQuerySerializer(
+            data={"period": "month", **request.query_params.dict()}
+        )
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        report = order_report(
+            params["period"],
+            start=params.get("start"),
+            end=params.get("end"),
+            category_id=params.get("category"),
+            by_category=params["by_category"],
+        )
+        return Response(OrderReportRowSerializer(report, many=True).data)
+
+
+class ExportJobCreateView(APIView):
+    """
+    Queue an export of the orders matching ``filters`` (see
+    ``apps.group.exports.EXPORT_FILTERS``); answers with the job to poll.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        serializer = ExportJobCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = start_export(request.user, **serializer.validated_data)
+        return Response(
+            ExportJobSerializer(job, context={"request": request}).data,
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class ExportJobDetailView(generics.RetrieveAPIView):
+    """Status and progress of an export, with its download link once done."""
+
+    queryset = ExportJob.objects.all()
+    serializer_class = ExportJobSerializer
+    permission_classes = [IsAdminUser]
+
+
+class ExportJobDownloadView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, pk):
+        job = get_object_or_404(ExportJob, pk=pk, status=ExportJob.Status.DONE)
+        return FileResponse(
+            job.file.open("rb"),
+            as_attachment=True,
+            filename=f"orders-{job.pk}.{job.format}",
+        )
+
+
+class ImportJobCreateView(APIView):
+    """
+    Import an order sheet (CSV or XLSX). Small files are imported before
+    answering with the per-row report; larger ones answer 202 with the job
+    to poll.
+    """
+
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        serializer = ImportJobCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = start_import(request.user, **serializer.validated_data)
+        return Response(
+            ImportJobSerializer(job).data,
+            status=(
+                status.HTTP_202_ACCEPTED
+                if job.status == ImportJob.Status.PENDING
+                else status.HTTP_201_CREATED
+            ),
+        )
+
+
+class ImportJobDetailView(generics.RetrieveAPIView):
+    """Progress of an import and the rows it rejected."""
+
+    queryset = ImportJob.objects.all()
+    serializer_class = ImportJobSerializer
+    permission_classes = [IsAdminUser]
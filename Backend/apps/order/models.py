@@ -1,11 +1,74 @@
+import threading
 from collections import deque
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Max
+from django.db.models.functions import Cast, Substr
 
 User = get_user_model()
 
 
+class IdSequence(models.Model):
+    """Persistent counter shared by every process that hands out IDs."""
+
+    name = models.CharField(max_length=100, unique=True)
+    next_value = models.PositiveBigIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} -> {self.next_value}"
+
+    @classmethod
+    def reserve(cls, name, size, initial=1):
+        """
+        Atomically reserve ``size`` consecutive values and return the first one.
+
+        The increment is a single ``UPDATE ... SET next_value = next_value + size``
+        so concurrent workers serialize on the row instead of racing on a
+        read-modify-write. ``initial`` (a value or a callable returning one)
+        seeds the row and is only evaluated when the row is first created.
+        """
+        with transaction.atomic():
+            increment = cls.objects.filter(name=name)
+            if not increment.update(next_value=F("next_value") + size):
+                initial = initial() if callable(initial) else initial
+                cls.objects.get_or_create(name=name, defaults={"next_value": initial})
+                increment.update(next_value=F("next_value") + size)
+            end = cls.objects.values_list("next_value", flat=True).get(name=name)
+        return end - size
+
+
+class BlockIdGenerator:
+    """
+    Hands out IDs from blocks reserved in ``IdSequence``.
+
+    Each process keeps the unused part of its current block in memory, so only
+    one query is needed per ``block_size`` IDs. IDs never repeat across
+    processes or restarts; an unused tail of a block is simply skipped.
+    """
+
+    def __init__(self, name, block_size=None, initial=None):
+        self.name = name
+        self.block_size = block_size or getattr(settings, "ID_SEQUENCE_BLOCK_SIZE", 20)
+        self.initial = initial
+        self._next = 0
+        self._end = 0
+        self._lock = threading.Lock()
+
+    def next_value(self):
+        with self._lock:
+            if self._next >= self._end:
+                start = IdSequence.reserve(
+                    self.name, self.block_size, self.initial or 1
+                )
+                self._next, self._end = start, start + self.block_size
+            value = self._next
+            self._next += 1
+            return value
+
+
 class Order(models.Model):
     STATUS_CHOICES = [
         ("waiting", "Waiting"),
@@ -36,16 +99,25 @@ class Order(models.Model):
         self.save()
 
 
+def next_order_number():
+    """First number for a fresh sequence: continue after the highest existing order_id."""
+    # Compared as numbers: as strings "ORD-1000000" sorts below "ORD-999999"
+    last = Order.objects.filter(order_id__regex=r"^ORD-[0-9]+$").aggregate(
+        last=Max(Cast(Substr("order_id", 5), models.BigIntegerField()))
+    )["last"]
+    return (last or 0) + 1
+
+
 class OrderSystem:
     def __init__(self):
         self.order_queue = deque()  # Queue for orders waiting for a user
-        self.order_counter = 1  # Start from 1 for the order ID
+        self.id_generator = BlockIdGenerator(
+            "order.order_id", initial=next_order_number
+        )
 
     def generate_order_id(self):
-        """Generate an incremental order ID."""
-        order_id = f"ORD-{self.order_counter:06d}"
-        self.order_counter += 1
-        return order_id
+        """Generate an incremental order ID backed by the shared sequence."""
+        return f"ORD-{self.id_generator.next_value():06d}"
 
     def create_order(self):
         """Create an order and assign it to an available user."""
@@ -1,3 +1,63 @@
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from .models import (
+    BlockIdGenerator,
+    IdSequence,
+    Order,
+    OrderSystem,
+    next_order_number,
+)
+
+
+class TestBlockIdGenerator(TestCase):
+    def test_generators_sharing_a_sequence_never_collide(self):
+        """two processes (generators) draw disjoint blocks from one sequence"""
+        first = BlockIdGenerator("test.seq", block_size=5)
+        second = BlockIdGenerator("test.seq", block_size=5)
+        values = [first.next_value() for _ in range(7)]
+        values += [second.next_value() for _ in range(7)]
+        self.assertEqual(len(values), len(set(values)))
+        self.assertEqual(IdSequence.objects.get(name="test.seq").next_value, 21)
+
+    def test_restart_continues_after_reserved_block(self):
+        """a new generator (process restart) starts after the last reserved block"""
+        BlockIdGenerator("test.restart", block_size=10).next_value()
+        restarted = BlockIdGenerator("test.restart", block_size=10)
+        self.assertEqual(restarted.next_value(), 11)
+
+    def test_sequence_starts_after_existing_orders(self):
+        """a fresh sequence skips order_ids created before it existed"""
+        Order.objects.create(order_id="ORD-000041")
+        order = OrderSystem().create_order()
+        self.assertEqual(order.order_id, "ORD-000042")
+
+    def test_sequence_continues_after_the_numerically_highest_order(self):
+        Order.objects.create(order_id="ORD-999999")
+        Order.objects.create(order_id="ORD-1000000")
+        self.assertEqual(next_order_number(), 1000001)
+
+    def test_initial_value_is_computed_once_per_sequence(self):
+        calls = []
+
+        def initial():
+            calls.append(1)
+            return 100
+
+        generator = BlockIdGenerator("test.initial", block_size=2, initial=initial)
+        values = [generator.next_value() for _ in range(5)]
+        self.assertEqual(values, [100, 101, 102, 103, 104])
+        self.assertEqual(len(calls), 1)
+
+
+class TestOrderCreateView(TestCase):
+    def test_repeated_creates_after_restart_do_not_collide(self):
+        """each OrderSystem instance simulates a worker restart"""
+        client = APIClient()
+        for _ in range(3):
+            response = client.post(reverse("order-create"))
+            self.assertEqual(response.status_code, 201)
+            OrderSystem().create_order()
+        self.assertEqual(Order.objects.count(), 6)
+        self.assertEqual(Order.objects.values("order_id").distinct().count(), 6)
@@ -0,0 +1,145 @@
+"""
+Staff attendance: absences entered for a span of days at once, and the
+monthly absence counts (``AttendanceMonth``) the payroll screen reads.
+
+An absence is one ``UpsentModel`` row per staff member and day, unique on
+``(staff, day)``. Every change to absences recounts the affected months from
+that index, so the monthly rows never drift from the absences themselves.
+"""
+
+import calendar
+import datetime
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, TruncMonth
+
+from .ledger import post_entries
+from .models import AttendanceMonth, Salary, Staff, StaffLedgerEntry, UpsentModel
+
+# Longest span marked in one request
+MAX_ABSENCE_SPAN_DAYS = 92
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def month_end(day):
+    return day.replace(day=calendar.monthrange(day.year, day.month)[1])
+
+
+def days_between(start, end):
+    for offset in range((end - start).days + 1):
+        yield start + datetime.timedelta(days=offset)
+
+
+def refresh_months(staff_ids=None, days=None):
+    """
+    Recount ``AttendanceMonth`` for ``staff_ids`` (all staff when ``None``)
+    over the months containing ``days`` (every month when ``None``).
+    """
+    absences = UpsentModel.objects.order_by()
+    summaries = AttendanceMonth.objects.all()
+    if staff_ids is not None:
+        absences = absences.filter(staff_id__in=staff_ids)
+        summaries = summaries.filter(staff_id__in=staff_ids)
+    if days is not None:
+        months = {month_start(day) for day in days}
+        absences = absences.filter(
+            reduce(or_, (Q(day__range=(m, month_end(m))) for m in months))
+        )
+        summaries = summaries.filter(month__in=months)
+
+    counts = (
+        absences.annotate(month=TruncMonth("day"))
+        .values("staff_id", "month")
+        .annotate(absent_days=Count("pk"))
+    )
+    with transaction.atomic():
+        summaries.delete()
+        AttendanceMonth.objects.bulk_create(
+            AttendanceMonth(
+                staff_id=count["staff_id"],
+                month=count["month"],
+                absent_days=count["absent_days"],
+            )
+            for count in counts
+        )
+
+
+@transaction.atomic
+def mark_absent(staff_id, start, end):
+    """
+    Record ``staff_id`` absent on every day from ``start`` to ``end`` it is
+    not already absent on, charging each day like a single absence does.
+    Returns the new absences.
+    """
+    if end < start:
+        raise ValidationError("The span ends before it starts.")
+    if (end - start).days >= MAX_ABSENCE_SPAN_DAYS:
+        raise ValidationError(
+            f"At most {MAX_ABSENCE_SPAN_DAYS} days can be marked at once."
+        )
+
+    salary_per_day = (
+        Staff.objects.select_for_update()
+        .values_list("salary_per_day", flat=True)
+        .get(pk=staff_id)
+    )
+    taken = set(
+        UpsentModel.objects.filter(
+            staff_id=staff_id, day__range=(start, end)
+        ).values_list("day", flat=True)
+    )
+    absences = UpsentModel.objects.bulk_create(
+        UpsentModel(staff_id=staff_id, day=day)
+        for day in days_between(start, end)
+        if day not in taken
+    )
+    if not absences:
+        return absences
+    if not connection.features.can_return_rows_from_bulk_insert:
+        # e.g. MySQL leaves the pks unset; the ledger entries need them
+        absences = list(
+            UpsentModel.objects.filter(
+                staff_id=staff_id, day__in=[absence.day for absence in absences]
+            ).order_by("day")
+        )
+
+    post_entries(
+        StaffLedgerEntry(
+            staff_id=staff_id,
+            amount=-salary_per_day,
+            kind=StaffLedgerEntry.Kind.ABSENCE,
+            absence=absence,
+        )
+        for absence in absences
+    )
+    Salary.objects.bulk_create(
+        Salary(staff_id=staff_id, amount=salary_per_day) for _ in absences
+    )
+    refresh_months([staff_id], [absence.day for absence in absences])
+    return absences
+
+
+def monthly_attendance(month):
+    """
+    Active staff with ``absent_days`` in ``month``: one query reading one
+    ``AttendanceMonth`` row per staff member.
+    """
+    absent_days = AttendanceMonth.objects.filter(
+        staff=OuterRef("pk"), month=month_start(month)
+    ).values("absent_days")
+    return (
+        Staff.objects.filter(state=Staff.State.ACTIVE)
+        .annotate(
+            absent_days=Coalesce(
+                Subquery(absent_days), Value(0), output_field=IntegerField()
+            )
+        )
+        .order_by("name", "pk")
+    )
@@ -0,0 +1,42 @@
+from django_filters import rest_framework as filters
+
+from .models import Salary, Staff, UpsentModel
+
+
+class StaffFilter(filters.FilterSet):
+    location = filters.ChoiceFilter(choices=Staff.Location.choices)
+    position = filters.ChoiceFilter(choices=Staff.Position.choices)
+    state = filters.ChoiceFilter(choices=Staff.State.choices)
+    cleared_from = filters.DateFilter(field_name="clear_date", lookup_expr="gte")
+    cleared_to = filters.DateFilter(field_name="clear_date", lookup_expr="lte")
+
+    class Meta:
+        model = Staff
+        fields = ["location", "position", "state"]
+
+
+class StaffDetailsFilter(filters.FilterSet):
+    """Filters rows belonging to a staff member by that staff member's details."""
+
+    location = filters.ChoiceFilter(
+        field_name="staff__location", choices=Staff.Location.choices
+    )
+    position = filters.ChoiceFilter(
+        field_name="staff__position", choices=Staff.Position.choices
+    )
+    state = filters.ChoiceFilter(field_name="staff__state", choices=Staff.State.choices)
+
+
+class SalaryFilter(StaffDetailsFilter):
+    class Meta:
+        model = Salary
+        fields = ["staff", "location", "position", "state"]
+
+
+class UpsentModelFilter(StaffDetailsFilter):
+    start = filters.DateFilter(field_name="day", lookup_expr="gte")
+    end = filters.DateFilter(field_name="day", lookup_expr="lte")
+
+    class Meta:
+        model = UpsentModel
+        fields = ["staff", "location", "position", "state", "start", "end"]
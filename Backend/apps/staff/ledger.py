@@ -0,0 +1,136 @@
+"""
+The append-only ledger behind ``Staff.total``.
+
+Every balance change is a ``StaffLedgerEntry`` written in the same
+transaction as an ``UPDATE ... SET total = total + amount``, so concurrent
+writers never overwrite each other's changes and the balance can always be
+rebuilt from the ledger (``manage.py reconcile_staff_balances``).
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Staff, StaffLedgerEntry
+
+
+def post_entry(staff_id, amount, kind, absence=None, note=""):
+    with transaction.atomic():
+        entry = StaffLedgerEntry.objects.create(
+            staff_id=staff_id, amount=amount, kind=kind, absence=absence, note=note
+        )
+        Staff.objects.filter(pk=staff_id).update(total=F("total") + amount)
+    return entry
+
+
+def post_entries(entries):
+    """Post many entries with one INSERT and one UPDATE per staff member."""
+    with transaction.atomic():
+        entries = StaffLedgerEntry.objects.bulk_create(entries)
+        totals = defaultdict(Decimal)
+        for entry in entries:
+            totals[entry.staff_id] += entry.amount
+        for staff_id, amount in totals.items():
+            Staff.objects.filter(pk=staff_id).update(total=F("total") + amount)
+    return entries
+
+
+def set_balance(staff_id, total, note=""):
+    """Post the adjustment that brings a staff member's balance to ``total``."""
+    with transaction.atomic():
+        current = (
+            Staff.objects.select_for_update()
+            .values_list("total", flat=True)
+            .get(pk=staff_id)
+        )
+        if total != current:
+            return post_entry(
+                staff_id, total - current, StaffLedgerEntry.Kind.ADJUSTMENT, note=note
+            )
+
+
+def reverse_absence(absence):
+    """Credit back what an absence being deleted was charged."""
+    charged = absence.ledger_entries.filter(staff_id=absence.staff_id).aggregate(
+        total=Sum("amount")
+    )["total"]
+    if charged:
+        post_entry(
+            absence.staff_id,
+            -charged,
+            StaffLedgerEntry.Kind.ABSENCE_REVERSAL,
+            note=f"Absence on {absence.day} removed",
+        )
+
+
+def move_absence(absence, old_staff_id):
+    """
+    Move the charge of an absence edited to another staff member: credit back
+    what ``old_staff_id`` was charged for it and charge the new staff member.
+    The reversal stays linked to the absence, so its entries net to the charge
+    of whoever it belongs to now.
+    """
+    with transaction.atomic():
+        charged = absence.ledger_entries.filter(staff_id=old_staff_id).aggregate(
+            total=Sum("amount")
+        )["total"]
+        if charged:
+            post_entry(
+                old_staff_id,
+                -charged,
+                StaffLedgerEntry.Kind.ABSENCE_REVERSAL,
+                absence=absence,
+                note=f"Absence on {absence.day} moved to another staff member",
+            )
+        absence.create_salary()
+
+
+def ledger_total():
+    """Per-staff sum of the ledger, for use in ``annotate``/``update``."""
+    entries = (
+        StaffLedgerEntry.objects.filter(staff=OuterRef("pk"))
+        .order_by()
+        .values("staff")
+        .annotate(total=Sum("amount"))
+        .values("total")
+    )
+    return Coalesce(
+        Subquery(entries),
+        Value(Decimal("0.00")),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+def unreconciled():
+    """Staff whose balance differs from their ledger."""
+    return (
+        Staff.objects.annotate(ledger_total=ledger_total())
+        .exclude(total=F("ledger_total"))
+        .order_by("pk")
+    )
+
+
+def reconcile():
+    """Rebuild every balance from the ledger in one UPDATE."""
+    return Staff.objects.update(total=ledger_total())
+
+
+def adopt_balances(note="Opening balance"):
+    """
+    Post one adjustment per staff member whose balance is not (yet) backed
+    by the ledger, so that existing balances are kept as opening entries.
+    """
+    with transaction.atomic():
+        entries = StaffLedgerEntry.objects.bulk_create(
+            StaffLedgerEntry(
+                staff=staff,
+                amount=staff.total - staff.ledger_total,
+                kind=StaffLedgerEntry.Kind.ADJUSTMENT,
+                note=note,
+            )
+            for staff in unreconciled().select_for_update()
+        )
+    return entries
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from apps.staff.ledger import adopt_balances, reconcile, unreconciled
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare every staff balance with the sum of its ledger entries and, "
+        "with --fix, rebuild the balances from the ledger in bulk."
+    )
+
+    def add_arguments(self, parser):
+        action = parser.add_mutually_exclusive_group()
+        action.add_argument(
+            "--fix",
+            action="store_true",
+            help="Set every balance to the sum of its ledger entries.",
+        )
+        action.add_argument(
+            "--adopt",
+            action="store_true",
+            help="Keep the current balances, posting the differences as "
+            "opening adjustments (once, for balances from before the ledger).",
+        )
+
+    def handle(self, *args, **options):
+        mismatched = list(unreconciled())
+        for staff in mismatched:
+            self.stdout.write(
+                f"{staff.pk} {staff.name}: balance {staff.total}, "
+                f"ledger {staff.ledger_total}"
+            )
+
+        if options["fix"]:
+            updated = reconcile()
+            self.stdout.write(
+                self.style.SUCCESS(f"Rebuilt {updated} balances from the ledger.")
+            )
+        elif options["adopt"]:
+            entries = adopt_balances()
+            self.stdout.write(
+                self.style.SUCCESS(f"Posted {len(entries)} opening adjustments.")
+            )
+        else:
+            self.stdout.write(f"{len(mismatched)} balances differ from the ledger.")
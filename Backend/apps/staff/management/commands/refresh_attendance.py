@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.staff.attendance import refresh_months
+from apps.staff.models import AttendanceMonth
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the monthly attendance summaries of every staff member from "
+        "their absences, e.g. after absences were imported in bulk."
+    )
+
+    def handle(self, *args, **options):
+        refresh_months()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{AttendanceMonth.objects.count()} monthly summaries recounted."
+            )
+        )
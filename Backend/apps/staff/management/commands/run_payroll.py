@@ -0,0 +1,40 @@
+import datetime
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.staff.payroll import month_period, run_payroll
+
+
+class Command(BaseCommand):
+    help = "Compute and store the payroll run of a month or a date range."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--month", help="YYYY-MM")
+        parser.add_argument("--start", type=datetime.date.fromisoformat)
+        parser.add_argument("--end", type=datetime.date.fromisoformat)
+        parser.add_argument(
+            "--no-clear",
+            action="store_false",
+            dest="clear",
+            help="Leave the staff clear dates unchanged.",
+        )
+
+    def handle(self, *args, **options):
+        if options["month"]:
+            year, month = map(int, options["month"].split("-"))
+            start, end = month_period(year, month)
+        elif options["start"] and options["end"]:
+            start, end = options["start"], options["end"]
+        else:
+            raise CommandError("Pass --month or both --start and --end.")
+
+        try:
+            run = run_payroll(start, end, clear=options["clear"])
+        except ValidationError as e:
+            raise CommandError(e.messages[0])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{run}: {run.staff_count} staff, {run.total_amount} total"
+            )
+        )
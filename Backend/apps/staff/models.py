@@ -1,8 +1,9 @@
 from decimal import Decimal
-from statistics import harmonic_mean
 
-from django.db import models
-from django.db.models.signals import post_save
+from apps.common.models import RenditionsModel
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 
@@ -13,19 +14,41 @@ class UpsentModel(models.Model):
         "Staff", on_delete=models.PROTECT, related_name="upsent_models"
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["staff", "day"], name="unique_staff_absence_day"
+            )
+        ]
+        # (staff, day) answers one staff member's ranges; this one, "who was
+        # absent between two days" across all staff.
+        indexes = [models.Index(fields=["day"], name="staff_absence_day_idx")]
+
     def __str__(self):
         return f"Upsent day: {self.day} - Staff: {self.staff.name}"
 
+    def save(self, *args, **kwargs):
+        # The post_save signal charges the ledger in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def create_salary(self):
-        staff = self.staff
-        salary_for_the_day = staff.salary_per_day
-        total_salary = staff.total - salary_for_the_day
-        staff.total = total_salary
-        staff.save()
-        Salary.objects.create(staff=staff, amount=salary_for_the_day)
+        from .ledger import post_entry
 
+        with transaction.atomic():
+            salary_for_the_day = Staff.objects.values_list(
+                "salary_per_day", flat=True
+            ).get(pk=self.staff_id)
+            post_entry(
+                self.staff_id,
+                -salary_for_the_day,
+                StaffLedgerEntry.Kind.ABSENCE,
+                absence=self,
+            )
+            Salary.objects.create(staff_id=self.staff_id, amount=salary_for_the_day)
 
-class Staff(models.Model):
+
+class Staff(RenditionsModel):
     class Position(models.TextChoices):
         DESIGNER = "Designer", _("Designer")
         RECEPTION = "Reception", _("Reception")
@@ -58,17 +81,23 @@ class Staff(models.Model):
         max_digits=12, decimal_places=2, default=Decimal("0.00")
     )
 
-    upsent_day = models.ForeignKey(
-        UpsentModel, on_delete=models.PROTECT, related_name="staff_members"
-    )
-    
-    
-
     clear_date = models.DateField(null=True, blank=True)
 
     def __str__(self):
         return f"{self.name} ({self.position})"
 
+    def save(self, *args, **kwargs):
+        # ``total`` is only changed through the ledger, with an UPDATE relative
+        # to the stored value; saving a loaded instance must not write back a
+        # balance that another transaction has since changed.
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "total"
+            ]
+        super().save(*args, **kwargs)
+
 
 class Salary(models.Model):
     staff = models.ForeignKey(
@@ -82,8 +111,177 @@ class Salary(models.Model):
         return f"{self.staff.name} - {self.amount}"
 
 
+class AttendanceMonth(models.Model):
+    """
+    Absence days of one staff member in one calendar month, kept up to date
+    by ``apps.staff.attendance`` so that a month's attendance is read from
+    one row per staff member instead of counted from every absence.
+    """
+
+    staff = models.ForeignKey(
+        Staff, on_delete=models.CASCADE, related_name="attendance_months"
+    )
+    # first day of the month
+    month = models.DateField(_("Month"))
+    absent_days = models.PositiveSmallIntegerField(_("Absent Days"), default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["month", "staff"], name="unique_attendance_month"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.staff.name} {self.month:%Y-%m}: {self.absent_days}"
+
+
+class StaffLedgerEntry(models.Model):
+    """
+    One change to a staff member's balance. ``Staff.total`` is the sum of the
+    staff member's entries; entries are only ever added (see
+    ``apps.staff.ledger``), so a mistake is corrected by another entry.
+    """
+
+    class Kind(models.TextChoices):
+        ABSENCE = "Absence", _("Absence")
+        ABSENCE_REVERSAL = "AbsenceReversal", _("Absence Reversal")
+        ADJUSTMENT = "Adjustment", _("Adjustment")
+
+    staff = models.ForeignKey(
+        Staff, on_delete=models.PROTECT, related_name="ledger_entries"
+    )
+    kind = models.CharField(_("Kind"), choices=Kind.choices, max_length=20)
+    amount = models.DecimalField(_("Amount"), max_digits=12, decimal_places=2)
+    absence = models.ForeignKey(
+        UpsentModel,
+        on_delete=models.SET_NULL,
+        related_name="ledger_entries",
+        null=True,
+        blank=True,
+    )
+    note = models.CharField(_("Note"), max_length=250, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["pk"]
+
+    def __str__(self):
+        return f"{self.staff.name} {self.amount:+} ({self.kind})"
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValidationError("Ledger entries cannot be changed.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValidationError("Ledger entries cannot be deleted.")
+
+
+class PayrollRun(models.Model):
+    """
+    The pay computed for every active staff member over one period. Runs and
+    their entries are written once by ``apps.staff.payroll.run_payroll`` and
+    never changed; a correction is a new run for a later period.
+    """
+
+    period_start = models.DateField(_("Period Start"))
+    period_end = models.DateField(_("Period End"))
+    staff_count = models.PositiveIntegerField(_("Staff"), default=0)
+    total_amount = models.DecimalField(
+        _("Total Amount"), max_digits=14, decimal_places=2, default=Decimal("0.00")
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-period_end"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["period_start", "period_end"], name="unique_payroll_period"
+            )
+        ]
+
+    def __str__(self):
+        return f"Payroll {self.period_start} - {self.period_end}"
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValidationError("Payroll runs cannot be changed.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValidationError("Payroll runs cannot be deleted.")
+
+
+class PayrollEntry(models.Model):
+    run = models.ForeignKey(
+        PayrollRun, on_delete=models.PROTECT, related_name="entries"
+    )
+    staff = models.ForeignKey(
+        Staff, on_delete=models.PROTECT, related_name="payroll_entries"
+    )
+    # first day paid: the period start, or the day after the staff's clear_date
+    start = models.DateField(_("Start"))
+    days = models.PositiveIntegerField(_("Days"))
+    absent_days = models.PositiveIntegerField(_("Absent Days"))
+    salary_per_day = models.DecimalField(max_digits=12, decimal_places=2)
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["run", "staff"], name="unique_payroll_entry"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.staff.name} - {self.amount} ({self.run})"
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValidationError("Payroll entries cannot be changed.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValidationError("Payroll entries cannot be deleted.")
+
+
+@receiver(pre_save, sender=UpsentModel)
+def remember_upsent_day(sender, instance, **kwargs):
+    # An edited absence may move to another month, which must be recounted too
+    instance._stored_staff_day = (
+        UpsentModel.objects.filter(pk=instance.pk).values_list("staff", "day").first()
+        if instance.pk is not None
+        else None
+    )
+
+
 # Signal to trigger salary creation after an UpsentModel is created
 @receiver(post_save, sender=UpsentModel)
 def handle_upsent_salary(sender, instance, created, **kwargs):
+    from .attendance import refresh_months
+
+    stored = getattr(instance, "_stored_staff_day", None)
     if created:
         instance.create_salary()
+    elif stored and stored[0] != instance.staff_id:
+        from .ledger import move_absence
+
+        move_absence(instance, stored[0])
+    refresh_months([instance.staff_id], [instance.day])
+    if stored and stored != (instance.staff_id, instance.day):
+        refresh_months([stored[0]], [stored[1]])
+
+
+@receiver(pre_delete, sender=UpsentModel)
+def reverse_upsent_salary(sender, instance, **kwargs):
+    from .ledger import reverse_absence
+
+    reverse_absence(instance)
+
+
+@receiver(post_delete, sender=UpsentModel)
+def refresh_upsent_month(sender, instance, **kwargs):
+    from .attendance import refresh_months
+
+    refresh_months([instance.staff_id], [instance.day])
@@ -0,0 +1,8 @@
+from rest_framework.pagination import PageNumberPagination
+
+
+class StaffPagination(PageNumberPagination):
+    page_size = 20
+    page_query_param = "pagenum"
+    page_size_query_param = "page_size"
+    max_page_size = 100
@@ -0,0 +1,86 @@
+"""
+Pay-period computation for all staff at once.
+
+A staff member is paid ``salary_per_day`` for every day of the period after
+their ``clear_date`` (the last day they were paid up to) on which they were
+not absent. Absences are counted for every staff member in one aggregate
+query and the entries are written with one ``bulk_create``.
+"""
+
+import datetime
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .models import PayrollEntry, PayrollRun, Staff
+
+
+def month_period(year, month):
+    """First and last day of a calendar month."""
+    start = datetime.date(year, month, 1)
+    following = (start + datetime.timedelta(days=32)).replace(day=1)
+    return start, following - datetime.timedelta(days=1)
+
+
+def payroll_staff(period_start, period_end):
+    """Active staff not yet paid up to ``period_end``, with their absences."""
+    in_period = Q(
+        upsent_models__day__gte=period_start, upsent_models__day__lte=period_end
+    ) & (Q(clear_date__isnull=True) | Q(upsent_models__day__gt=F("clear_date")))
+    return (
+        Staff.objects.filter(state=Staff.State.ACTIVE)
+        .filter(Q(clear_date__isnull=True) | Q(clear_date__lt=period_end))
+        .annotate(
+            absent_days=Count("upsent_models__day", filter=in_period, distinct=True)
+        )
+        .order_by("pk")
+    )
+
+
+def build_entries(run, staff_members):
+    one_day = datetime.timedelta(days=1)
+    for staff in staff_members:
+        start = run.period_start
+        if staff.clear_date is not None and staff.clear_date >= start:
+            start = staff.clear_date + one_day
+        days = (run.period_end - start).days + 1
+        absent_days = min(staff.absent_days, days)
+        yield PayrollEntry(
+            run=run,
+            staff=staff,
+            start=start,
+            days=days,
+            absent_days=absent_days,
+            salary_per_day=staff.salary_per_day,
+            amount=staff.salary_per_day * (days - absent_days),
+        )
+
+
+@transaction.atomic
+def run_payroll(period_start, period_end, clear=True):
+    """
+    Compute and store the ``PayrollRun`` for a period. With ``clear`` every
+    paid staff member's ``clear_date`` moves to the period end, so the next
+    run starts where this one stopped.
+    """
+    if period_end < period_start:
+        raise ValidationError("The payroll period ends before it starts.")
+    if PayrollRun.objects.filter(
+        period_start__lte=period_end, period_end__gte=period_start
+    ).exists():
+        raise ValidationError("A payroll run already covers part of this period.")
+
+    run = PayrollRun.objects.create(period_start=period_start, period_end=period_end)
+    entries = PayrollEntry.objects.bulk_create(
+        build_entries(run, payroll_staff(period_start, period_end))
+    )
+    PayrollRun.objects.filter(pk=run.pk).update(
+        staff_count=len(entries),
+        total_amount=sum((entry.amount for entry in entries), Decimal("0.00")),
+    )
+    if clear:
+        Staff.objects.filter(payroll_entries__run=run).update(clear_date=period_end)
+    run.refresh_from_db()
+    return run
@@ -1,9 +1,41 @@
+from apps.common.serializers import RenditionsField
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
 
-from .models import Salary, Staff, UpsentModel
+from .attendance import mark_absent, month_end
+from .ledger import post_entry, set_balance
+from .models import (
+    PayrollEntry,
+    PayrollRun,
+    Salary,
+    Staff,
+    StaffLedgerEntry,
+    UpsentModel,
+)
+from .payroll import run_payroll
 
 
 class StaffSerializer(serializers.ModelSerializer):
+    """
+    Photos are uploaded through ``photo``; single staff members return the
+    original's URL too, lists just the ``LIST_FIELDS`` with the thumbnail
+    (the original until its renditions are built).
+    """
+
+    LIST_FIELDS = (
+        "id",
+        "name",
+        "photo_thumbnail",
+        "salary_per_day",
+        "location",
+        "position",
+        "state",
+        "total",
+    )
+
+    photo = serializers.ImageField()
+    photo_thumbnail = RenditionsField(source="photo", size="thumbnail")
+
     class Meta:
         model = Staff
         fields = [
@@ -12,6 +44,7 @@ class StaffSerializer(serializers.ModelSerializer):
             "father_name",
             "nic",
             "photo",
+            "photo_thumbnail",
             "address",
             "salary_per_day",
             "location",
@@ -19,9 +52,36 @@ class StaffSerializer(serializers.ModelSerializer):
             "state",
             "total",
             "clear_date",
-            "upsent_day",
         ]
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if isinstance(self.parent, serializers.ListSerializer):
+            data = {field: data[field] for field in self.LIST_FIELDS}
+        return data
+
+    # Balance changes are posted to the ledger rather than saved on the row.
+    def create(self, validated_data):
+        total = validated_data.pop("total", None)
+        staff = super().create(validated_data)
+        if total:
+            post_entry(
+                staff.pk,
+                total,
+                StaffLedgerEntry.Kind.ADJUSTMENT,
+                note="Opening balance",
+            )
+            staff.refresh_from_db(fields=["total"])
+        return staff
+
+    def update(self, instance, validated_data):
+        total = validated_data.pop("total", None)
+        staff = super().update(instance, validated_data)
+        if total is not None:
+            set_balance(staff.pk, total, note="Balance edited")
+            staff.refresh_from_db(fields=["total"])
+        return staff
+
 
 class SalarySerializer(serializers.ModelSerializer):
     class Meta:
@@ -29,17 +89,123 @@ class SalarySerializer(serializers.ModelSerializer):
         fields = ["id", "staff", "amount"]
 
 
+class StaffSummarySerializer(serializers.ModelSerializer):
+    photo_thumbnail = RenditionsField(source="photo", size="thumbnail")
+
+    class Meta:
+        model = Staff
+        fields = ["id", "name", "position", "location", "photo_thumbnail"]
+
+
+class StaffSummaryField(serializers.PrimaryKeyRelatedField):
+    """Written as a staff id, read as the staff member's summary."""
+
+    def use_pk_only_optimization(self):
+        return False
+
+    def to_representation(self, value):
+        return StaffSummarySerializer(value, context=self.context).data
+
+
 class UpsentModelSerializer(serializers.ModelSerializer):
-    staff = StaffSerializer()
+    # The post_save signal records the salary deduction.
+    staff = StaffSummaryField(queryset=Staff.objects.all())
 
     class Meta:
         model = UpsentModel
         fields = ["id", "day", "staff"]
 
+
+class AbsenceSpanSerializer(serializers.Serializer):
+    """Marks a staff member absent from ``start`` to ``end``, both included."""
+
+    staff = serializers.PrimaryKeyRelatedField(queryset=Staff.objects.all())
+    start = serializers.DateField()
+    end = serializers.DateField()
+
+    def create(self, validated_data):
+        try:
+            absences = mark_absent(
+                validated_data["staff"].pk,
+                validated_data["start"],
+                validated_data["end"],
+            )
+        except DjangoValidationError as error:
+            raise serializers.ValidationError(error.messages)
+        return {**validated_data, "days": [absence.day for absence in absences]}
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data["marked_days"] = [day.isoformat() for day in instance.get("days", [])]
+        return data
+
+
+class StaffAttendanceSerializer(serializers.ModelSerializer):
+    """A row of ``monthly_attendance``; ``month`` comes from the context."""
+
+    absent_days = serializers.IntegerField(read_only=True)
+    present_days = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Staff
+        fields = [
+            "id",
+            "name",
+            "position",
+            "location",
+            "salary_per_day",
+            "absent_days",
+            "present_days",
+        ]
+
+    def get_present_days(self, staff):
+        return month_end(self.context["month"]).day - staff.absent_days
+
+
+class PayrollEntrySerializer(serializers.ModelSerializer):
+    staff_name = serializers.CharField(source="staff.name", read_only=True)
+
+    class Meta:
+        model = PayrollEntry
+        fields = [
+            "id",
+            "staff",
+            "staff_name",
+            "start",
+            "days",
+            "absent_days",
+            "salary_per_day",
+            "amount",
+        ]
+
+
+class PayrollRunSerializer(serializers.ModelSerializer):
+    clear = serializers.BooleanField(default=True, write_only=True)
+
+    class Meta:
+        model = PayrollRun
+        fields = [
+            "id",
+            "period_start",
+            "period_end",
+            "staff_count",
+            "total_amount",
+            "created_at",
+            "clear",
+        ]
+        read_only_fields = ["staff_count", "total_amount", "created_at"]
+        # overlapping periods are rejected by run_payroll
+        validators = []
+
     def create(self, validated_data):
-        staff_data = validated_data.pop("staff")
-        upsent_instance = UpsentModel.objects.create(**validated_data)
+        try:
+            return run_payroll(**validated_data)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError({"period": e.messages})
+
 
-        upsent_instance.create_salary()
+class PayrollRunDetailSerializer(PayrollRunSerializer):
+    entries = PayrollEntrySerializer(many=True, read_only=True)
 
-        return upsent_instance
+    class Meta(PayrollRunSerializer.Meta):
+        fields = PayrollRunSerializer.Meta.fields + ["entries"]
@@ -1,3 +1,431 @@
-from django.test import TestCase
+import datetime
+import threading
+import time
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from apps.users.models import User
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import IntegrityError, OperationalError, connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .attendance import mark_absent, monthly_attendance
+from .ledger import post_entry, unreconciled
+from .models import AttendanceMonth, PayrollRun, Staff, StaffLedgerEntry, UpsentModel
+from .payroll import month_period, run_payroll
+from .serializers import StaffSerializer
+
+
+def make_staff(name, salary_per_day, **fields):
+    fields = {
+        "father_name": "Father",
+        "nic": 1000,
+        "photo": "staff/images/photo.jpg",
+        "address": "Kabul",
+        "location": Staff.Location.SHOP,
+        "position": Staff.Position.DESIGNER,
+        **fields,
+    }
+    return Staff.objects.create(
+        name=name, salary_per_day=Decimal(salary_per_day), **fields
+    )
+
+
+def absent(staff, *days):
+    for day in days:
+        UpsentModel.objects.create(staff=staff, day=datetime.date(*day))
+
+
+class TestPayroll(TestCase):
+    def setUp(self):
+        self.september = month_period(2026, 9)
+        self.full = make_staff("Full", "100")
+        self.cleared = make_staff(
+            "Cleared", "50", clear_date=datetime.date(2026, 9, 15)
+        )
+        self.inactive = make_staff("Inactive", "80", state=Staff.State.INACTIVE)
+        self.paid_up = make_staff(
+            "Paid up", "70", clear_date=datetime.date(2026, 9, 30)
+        )
+        absent(self.full, (2026, 9, 3), (2026, 9, 10), (2026, 10, 1))
+        absent(self.cleared, (2026, 9, 10), (2026, 9, 20))
+
+    def test_month_is_computed_for_all_staff_at_once(self):
+        with self.assertNumQueries(9):
+            run = run_payroll(*self.september)
+
+        entries = {entry.staff_id: entry for entry in run.entries.all()}
+        self.assertEqual(entries.keys(), {self.full.pk, self.cleared.pk})
+
+        full = entries[self.full.pk]
+        self.assertEqual((full.days, full.absent_days), (30, 2))
+        self.assertEqual(full.amount, Decimal("2800.00"))
+
+        cleared = entries[self.cleared.pk]
+        self.assertEqual(cleared.start, datetime.date(2026, 9, 16))
+        self.assertEqual((cleared.days, cleared.absent_days), (15, 1))
+        self.assertEqual(cleared.amount, Decimal("700.00"))
+
+        self.assertEqual(run.staff_count, 2)
+        self.assertEqual(run.total_amount, Decimal("3500.00"))
+        self.assertEqual(
+            set(Staff.objects.values_list("name", "clear_date")),
+            {
+                ("Full", datetime.date(2026, 9, 30)),
+                ("Cleared", datetime.date(2026, 9, 30)),
+                ("Inactive", None),
+                ("Paid up", datetime.date(2026, 9, 30)),
+            },
+        )
+
+    def test_runs_are_immutable_and_do_not_overlap(self):
+        run = run_payroll(*self.september)
+
+        with self.assertRaises(ValidationError):
+            run_payroll(datetime.date(2026, 9, 20), datetime.date(2026, 10, 10))
+        with self.assertRaises(ValidationError):
+            run.save()
+        with self.assertRaises(ValidationError):
+            run.entries.first().delete()
+
+    def test_api(self):
+        admin = User.objects.create_user(
+            first_name="A", last_name="B", email="admin@example.com", password="x"
+        )
+        User.objects.filter(pk=admin.pk).update(is_staff=True)
+        admin.refresh_from_db()
+        client = APIClient()
+        client.force_authenticate(admin)
+
+        response = client.post(
+            reverse("payroll-run-list-create"),
+            {"period_start": "2026-09-01", "period_end": "2026-09-30"},
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data["total_amount"], "3500.00")
+
+        response = client.get(reverse("payroll-run-detail", args=[response.data["id"]]))
+        self.assertEqual(
+            sorted(entry["staff_name"] for entry in response.data["entries"]),
+            ["Cleared", "Full"],
+        )
+
+        response = client.post(
+            reverse("payroll-run-list-create"),
+            {"period_start": "2026-09-15", "period_end": "2026-10-15"},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(PayrollRun.objects.count(), 1)
+
+
+class TestStaffLedger(TestCase):
+    def setUp(self):
+        self.staff = make_staff("Ledger", "100")
+
+    def balance(self):
+        return Staff.objects.values_list("total", flat=True).get(pk=self.staff.pk)
+
+    def test_stale_instances_do_not_lose_updates(self):
+        stale = Staff.objects.get(pk=self.staff.pk)
+        absent(self.staff, (2026, 9, 1), (2026, 9, 2))
+        stale.address = "Herat"
+        stale.save()
+
+        self.assertEqual(self.balance(), Decimal("-200.00"))
+        self.assertEqual(Staff.objects.get(pk=self.staff.pk).address, "Herat")
+        self.assertFalse(unreconciled().exists())
+
+    def test_deleting_an_absence_posts_a_reversal(self):
+        absent(self.staff, (2026, 9, 1))
+        UpsentModel.objects.get().delete()
+
+        self.assertEqual(self.balance(), Decimal("0.00"))
+        self.assertEqual(
+            list(self.staff.ledger_entries.values_list("kind", "amount")),
+            [
+                (StaffLedgerEntry.Kind.ABSENCE, Decimal("-100.00")),
+                (StaffLedgerEntry.Kind.ABSENCE_REVERSAL, Decimal("100.00")),
+            ],
+        )
+        with self.assertRaises(ValidationError):
+            self.staff.ledger_entries.first().delete()
+
+    def test_moving_an_absence_moves_its_charge(self):
+        other = make_staff("Other", "40")
+        absent(self.staff, (2026, 9, 1))
+        absence = UpsentModel.objects.get()
+        admin = User.objects.create_user(
+            first_name="A", last_name="B", email="move@example.com", password="x"
+        )
+        client = APIClient()
+        client.force_authenticate(admin)
+
+        response = client.patch(
+            reverse("upsentmodel-detail", args=[absence.pk]), {"staff": other.pk}
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.balance(), Decimal("0.00"))
+        self.assertEqual(Staff.objects.get(pk=other.pk).total, Decimal("-40.00"))
+        self.assertFalse(unreconciled().exists())
+
+        UpsentModel.objects.get().delete()
+        self.assertEqual(Staff.objects.get(pk=other.pk).total, Decimal("0.00"))
+        self.assertEqual(self.balance(), Decimal("0.00"))
+
+    def test_reconcile_command(self):
+        absent(self.staff, (2026, 9, 1))
+        legacy = make_staff("Legacy", "50", total=Decimal("300.00"))
+        Staff.objects.filter(pk=self.staff.pk).update(total=Decimal("5.00"))
+
+        out = StringIO()
+        call_command("reconcile_staff_balances", stdout=out)
+        self.assertIn("2 balances differ", out.getvalue())
+        self.assertEqual(self.balance(), Decimal("5.00"))
+
+        call_command("reconcile_staff_balances", "--fix", stdout=StringIO())
+        self.assertEqual(self.balance(), Decimal("-100.00"))
+        self.assertEqual(Staff.objects.get(pk=legacy.pk).total, Decimal("0.00"))
+
+        Staff.objects.filter(pk=legacy.pk).update(total=Decimal("300.00"))
+        call_command("reconcile_staff_balances", "--adopt", stdout=StringIO())
+        self.assertFalse(unreconciled().exists())
+        self.assertEqual(Staff.objects.get(pk=legacy.pk).total, Decimal("300.00"))
+
+    def test_api_balance_edits_go_through_the_ledger(self):
+        admin = User.objects.create_user(
+            first_name="A", last_name="B", email="ledger@example.com", password="x"
+        )
+        client = APIClient()
+        client.force_authenticate(admin)
+        absent(self.staff, (2026, 9, 1))
+
+        response = client.patch(
+            reverse("staff-detail", args=[self.staff.pk]),
+            {"total": "250.00", "address": "Mazar"},
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["total"], "250.00")
+        self.assertEqual(self.staff.ledger_entries.last().amount, Decimal("350.00"))
+        self.assertFalse(unreconciled().exists())
+
+
+class TestAttendance(TestCase):
+    def setUp(self):
+        self.staff = make_staff("Attendance", "100")
+        self.other = make_staff("Other", "50")
+        self.admin = User.objects.create_user(
+            first_name="A", last_name="B", email="attendance@example.com", password="x"
+        )
+        User.objects.filter(pk=self.admin.pk).update(is_staff=True)
+        self.admin.refresh_from_db()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def months(self):
+        return set(
+            AttendanceMonth.objects.values_list("staff__name", "month", "absent_days")
+        )
+
+    def test_span_marks_each_missing_day_once(self):
+        absent(self.staff, (2026, 9, 29))
+
+        response = self.client.post(
+            reverse("absence-span-create"),
+            {"staff": self.staff.pk, "start": "2026-09-28", "end": "2026-10-02"},
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(
+            response.data["marked_days"],
+            ["2026-09-28", "2026-09-30", "2026-10-01", "2026-10-02"],
+        )
+        self.staff.refresh_from_db()
+        self.assertEqual(self.staff.total, Decimal("-500.00"))
+        self.assertFalse(unreconciled().exists())
+        self.assertEqual(
+            self.months(),
+            {
+                ("Attendance", datetime.date(2026, 9, 1), 3),
+                ("Attendance", datetime.date(2026, 10, 1), 2),
+            },
+        )
+
+        response = self.client.post(
+            reverse("absence-span-create"),
+            {"staff": self.staff.pk, "start": "2026-10-02", "end": "2026-09-28"},
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_span_without_pks_from_bulk_insert(self):
+        """backends like MySQL do not set the pks of bulk-inserted rows"""
+        features = mock.patch.object(
+            type(connection.features),
+            "can_return_rows_from_bulk_insert",
+            new_callable=mock.PropertyMock,
+            return_value=False,
+        )
+        with features:
+            absences = mark_absent(
+                self.staff.pk, datetime.date(2026, 9, 1), datetime.date(2026, 9, 3)
+            )
+        self.assertTrue(all(absence.pk for absence in absences))
+        self.assertEqual(
+            StaffLedgerEntry.objects.filter(absence__in=absences).count(), 3
+        )
+        self.assertFalse(unreconciled().exists())
+
+    def test_one_absence_per_staff_and_day(self):
+        absent(self.staff, (2026, 9, 1))
+        with self.assertRaises(IntegrityError):
+            absent(self.staff, (2026, 9, 1))
+
+    def test_months_follow_edits_and_deletes(self):
+        absent(self.staff, (2026, 9, 1), (2026, 9, 2))
+        absence = UpsentModel.objects.get(day=datetime.date(2026, 9, 2))
+        absence.day = datetime.date(2026, 10, 2)
+        absence.save()
+        self.assertEqual(
+            self.months(),
+            {
+                ("Attendance", datetime.date(2026, 9, 1), 1),
+                ("Attendance", datetime.date(2026, 10, 1), 1),
+            },
+        )
+
+        absence.delete()
+        self.assertEqual(self.months(), {("Attendance", datetime.date(2026, 9, 1), 1)})
+
+    def test_month_is_one_query_for_all_staff(self):
+        absent(self.staff, (2026, 9, 1), (2026, 9, 2))
+        absent(self.other, (2026, 8, 31), (2026, 9, 30))
+        for index in range(5):
+            make_staff(f"Present {index}", "10")
+
+        with self.assertNumQueries(1):
+            attendance = {
+                staff.name: staff.absent_days
+                for staff in monthly_attendance(datetime.date(2026, 9, 15))
+            }
+        self.assertEqual(attendance["Attendance"], 2)
+        self.assertEqual(attendance["Other"], 1)
+        self.assertEqual(attendance["Present 0"], 0)
+
+        response = self.client.get(reverse("attendance-month"), {"month": "2026-09"})
+        self.assertEqual(response.status_code, 200)
+        row = next(row for row in response.data if row["name"] == "Attendance")
+        self.assertEqual((row["absent_days"], row["present_days"]), (2, 28))
+
+        response = self.client.get(reverse("attendance-month"), {"month": "Sept"})
+        self.assertEqual(response.status_code, 400)
+
+
+class TestStaffApi(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.designer = make_staff("Designer", "100")
+        self.printer = make_staff("Printer", "80", position=Staff.Position.PRINTER)
+        self.gone = make_staff("Gone", "60", state=Staff.State.INACTIVE)
+        absent(self.designer, (2026, 9, 1), (2026, 9, 20))
+        absent(self.printer, (2026, 9, 2), (2026, 10, 1))
+
+    def test_staff_list_is_paginated_compact_and_filtered(self):
+        response = self.client.get(
+            reverse("staff-list-create"), {"state": "Active", "page_size": 1}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 2)
+        [row] = response.data["results"]
+        self.assertEqual(set(row), set(StaffSerializer.LIST_FIELDS))
+        # No renditions were built for the photo, so the original stands in
+        original = "http://testserver/media/staff/images/photo.jpg"
+        self.assertEqual(row["photo_thumbnail"], {"webp": original, "jpg": original})
+
+        response = self.client.get(
+            reverse("staff-list-create"), {"position": "Printer"}
+        )
+        self.assertEqual([row["name"] for row in response.data["results"]], ["Printer"])
+
+        response = self.client.get(reverse("staff-detail", args=[self.designer.pk]))
+        self.assertEqual(response.data["photo"], original)
+        self.assertIn("address", response.data)
+
+    def test_absence_list_is_filtered_by_staff_details_and_days(self):
+        url = reverse("upsentmodel-list-create")
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                url, {"start": "2026-09-01", "end": "2026-09-30"}
+            )
+        self.assertEqual(
+            [row["day"] for row in response.data["results"]],
+            ["2026-09-20", "2026-09-02", "2026-09-01"],
+        )
+        self.assertEqual(
+            set(response.data["results"][0]["staff"]),
+            {"id", "name", "position", "location", "photo_thumbnail"},
+        )
+
+        response = self.client.get(url, {"position": "Printer"})
+        self.assertEqual(response.data["count"], 2)
+
+    def test_absence_is_created_for_a_staff_id(self):
+        url = reverse("upsentmodel-list-create")
+        response = self.client.post(
+            url, {"staff": self.gone.pk, "day": "2026-09-03"}, format="json"
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data["staff"]["name"], "Gone")
+        self.gone.refresh_from_db()
+        self.assertEqual(self.gone.total, Decimal("-60.00"))
+
+        response = self.client.post(
+            url, {"staff": self.gone.pk, "day": "2026-09-03"}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class TestConcurrentLedgerWriters(TransactionTestCase):
+    writers = 4
+    entries_per_writer = 10
+
+    @staticmethod
+    def post_retrying(staff_id, amount):
+        # The in-memory SQLite test database is shared between threads through
+        # its shared cache, which fails with "table is locked" instead of
+        # waiting like a file database does; retry the whole transaction then.
+        while True:
+            try:
+                return post_entry(staff_id, amount, "Adjustment")
+            except OperationalError as error:
+                if "locked" not in str(error):
+                    raise
+                time.sleep(0.001)
+
+    @mock.patch("celery.app.task.Task.apply_async")
+    def test_no_update_is_lost(self, apply_async):
+        staff = make_staff("Concurrent", "10")
+        start = threading.Barrier(self.writers)
+        errors = []
+
+        def write():
+            try:
+                start.wait()
+                for _ in range(self.entries_per_writer):
+                    self.post_retrying(staff.pk, Decimal("1.00"))
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=write) for _ in range(self.writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        staff.refresh_from_db()
+        self.assertEqual(staff.total, self.writers * self.entries_per_writer)
+        self.assertFalse(unreconciled().exists())
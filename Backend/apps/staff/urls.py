@@ -14,6 +14,16 @@ urlpatterns = [
         views.UpsentModelRetrieveUpdateDestroyView.as_view(),
         name="upsentmodel-detail",
     ),
+    path(
+        "upsentmodels/span/",
+        views.AbsenceSpanCreateView.as_view(),
+        name="absence-span-create",
+    ),
+    path(
+        "attendance/",
+        views.AttendanceMonthView.as_view(),
+        name="attendance-month",
+    ),
     # Staff URLs
     path("staff/", views.StaffListCreateView.as_view(), name="staff-list-create"),
     path(
@@ -27,4 +37,14 @@ urlpatterns = [
         views.SalaryRetrieveUpdateDestroyView.as_view(),
         name="salary-detail",
     ),
+    path(
+        "payroll-runs/",
+        views.PayrollRunListCreateView.as_view(),
+        name="payroll-run-list-create",
+    ),
+    path(
+        "payroll-runs/<int:pk>/",
+        views.PayrollRunDetailView.as_view(),
+        name="payroll-run-detail",
+    ),
 ]
@@ -1,29 +1,81 @@
+import datetime
+
+from apps.common.business_day import business_day
+from django.db.models import Prefetch
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics
-from rest_framework.permissions import AllowAny
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import SearchFilter
+from rest_framework.permissions import AllowAny, IsAdminUser
 
-from .models import Salary, Staff, UpsentModel
-from .serializers import SalarySerializer, StaffSerializer, UpsentModelSerializer
+from .attendance import monthly_attendance
+from .filters import SalaryFilter, StaffFilter, UpsentModelFilter
+from .models import PayrollEntry, PayrollRun, Salary, Staff, UpsentModel
+from .paginations import StaffPagination
+from .serializers import (
+    AbsenceSpanSerializer,
+    PayrollRunDetailSerializer,
+    PayrollRunSerializer,
+    SalarySerializer,
+    StaffAttendanceSerializer,
+    StaffSerializer,
+    UpsentModelSerializer,
+)
 
 
 # View for listing and creating UpsentModel instances
 class UpsentModelListCreateView(generics.ListCreateAPIView):
-    queryset = UpsentModel.objects.all()
+    queryset = UpsentModel.objects.select_related("staff").order_by("-day", "pk")
     serializer_class = UpsentModelSerializer
     permission_classes = [AllowAny]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = UpsentModelFilter
+    pagination_class = StaffPagination
 
 
 # View for retrieving, updating, and deleting an UpsentModel instance
 class UpsentModelRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = UpsentModel.objects.all()
+    queryset = UpsentModel.objects.select_related("staff")
     serializer_class = UpsentModelSerializer
     permission_classes = [AllowAny]
 
 
+# View for marking a staff member absent over a span of days
+class AbsenceSpanCreateView(generics.CreateAPIView):
+    serializer_class = AbsenceSpanSerializer
+    permission_classes = [AllowAny]
+
+
+# View for every active staff member's absences in one month (?month=YYYY-MM)
+class AttendanceMonthView(generics.ListAPIView):
+    serializer_class = StaffAttendanceSerializer
+    permission_classes = [IsAdminUser]
+
+    def get_month(self):
+        month = self.request.query_params.get("month")
+        if not month:
+            return business_day().replace(day=1)
+        try:
+            return datetime.datetime.strptime(month, "%Y-%m").date()
+        except ValueError:
+            raise ValidationError({"month": "Expected a month as YYYY-MM."})
+
+    def get_queryset(self):
+        return monthly_attendance(self.get_month())
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), "month": self.get_month()}
+
+
 # View for listing and creating Staff instances
 class StaffListCreateView(generics.ListCreateAPIView):
-    queryset = Staff.objects.all()
+    queryset = Staff.objects.order_by("name", "pk")
     serializer_class = StaffSerializer
     permission_classes = [AllowAny]
+    filter_backends = [DjangoFilterBackend, SearchFilter]
+    filterset_class = StaffFilter
+    search_fields = ["name", "father_name"]
+    pagination_class = StaffPagination
 
 
 # View for retrieving, updating, and deleting a Staff instance
@@ -35,9 +87,12 @@ class StaffRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
 
 # View for listing and creating Salary instances
 class SalaryListCreateView(generics.ListCreateAPIView):
-    queryset = Salary.objects.all()
+    queryset = Salary.objects.order_by("-pk")
     serializer_class = SalarySerializer
     permission_classes = [AllowAny]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = SalaryFilter
+    pagination_class = StaffPagination
 
 
 # View for retrieving, updating, and deleting a Salary instance
@@ -45,3 +100,19 @@ class SalaryRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Salary.objects.all()
     serializer_class = SalarySerializer
     permission_classes = [AllowAny]
+
+
+# View for listing payroll runs and running the payroll of a new period
+class PayrollRunListCreateView(generics.ListCreateAPIView):
+    queryset = PayrollRun.objects.all()
+    serializer_class = PayrollRunSerializer
+    permission_classes = [IsAdminUser]
+
+
+# View for one payroll run with the pay of every staff member
+class PayrollRunDetailView(generics.RetrieveAPIView):
+    queryset = PayrollRun.objects.prefetch_related(
+        Prefetch("entries", PayrollEntry.objects.select_related("staff"))
+    )
+    serializer_class = PayrollRunDetailSerializer
+    permission_classes = [IsAdminUser]
@@ -24,7 +24,7 @@ from .models import Contact
 # Custom admin class for the Contact model
 
 class ContactAdmin(admin.ModelAdmin):
-    list_display = ('email', 'name', 'content')
+    list_display = ('email', 'name', 'content', 'created_at', 'notified_at')
 
     search_fields = ('email', 'name')
 
@@ -34,10 +34,11 @@ class ContactAdmin(admin.ModelAdmin):
             'fields': ('email', 'name', 'content')
         }),
         ('Date Information', {
-            'fields': ('created_at',),
+            'fields': ('created_at', 'notified_at'),
             'classes': ('collapse',),
         }),
     )
+    readonly_fields = ('created_at', 'notified_at')
 
     actions = ['delete_selected']
 
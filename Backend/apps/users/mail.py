@@ -0,0 +1,176 @@
+import datetime
+import logging
+import threading
+import time
+from functools import lru_cache
+from smtplib import SMTPServerDisconnected
+
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.contrib.sites.models import Site
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import get_template
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+logger = logging.getLogger(__name__)
+
+# messages per batch (one metrics record and on_sent() call each)
+EMAIL_BATCH_SIZE = getattr(settings, "EMAIL_BATCH_SIZE", 100)
+# seconds an idle pooled SMTP connection is reused before reconnecting
+EMAIL_CONNECTION_MAX_AGE = getattr(settings, "EMAIL_CONNECTION_MAX_AGE", 60)
+
+METRICS_PREFIX = "mail:metrics"
+METRICS = ("messages", "batches", "connections", "failures", "send_ms")
+
+
+@lru_cache(maxsize=None)
+def load_template(template_name):
+    return get_template(template_name)
+
+
+def render_email(template_name, context):
+    return load_template(template_name).render(context)
+
+
+def site_domain():
+    # The sites framework keeps the current Site in memory after one query.
+    return Site.objects.get_current().domain
+
+
+def build_html_email(subject, template_name, context, to):
+    email = EmailMessage(
+        subject=subject, body=render_email(template_name, context), to=to
+    )
+    email.content_subtype = "html"
+    return email
+
+
+def build_user_email(
+    user, subject, template_name, link=None, domain=None, protocol="https"
+):
+    """Activation email when ``link`` is None, otherwise a link email (reset)."""
+    domain = domain or site_domain()
+    uid = urlsafe_base64_encode(force_bytes(user.pk))
+    token = default_token_generator.make_token(user)
+    context = {"user": user, "domain": domain, "uid": uid, "token": token}
+    if link is None:
+        context["activation_link"] = (
+            f"{protocol}://{domain}/users/activate/{uid}/{token}/"
+        )
+        context["current_year"] = datetime.datetime.now().year
+    else:
+        context["link"] = link
+    return build_html_email(subject, template_name, context, [user.email])
+
+
+def record(metric, amount=1):
+    key = f"{METRICS_PREFIX}:{metric}"
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key, amount)
+    except ValueError:  # evicted between add and incr
+        cache.set(key, amount, None)
+
+
+def email_metrics():
+    """Totals shared by every process using the cache, plus throughput."""
+    values = cache.get_many([f"{METRICS_PREFIX}:{metric}" for metric in METRICS])
+    totals = {metric: values.get(f"{METRICS_PREFIX}:{metric}", 0) for metric in METRICS}
+    seconds = totals["send_ms"] / 1000
+    totals["messages_per_second"] = (
+        round(totals["messages"] / seconds, 2) if seconds else None
+    )
+    return totals
+
+
+class EmailDispatcher:
+    """
+    Sends email over one pooled connection per process, in batches of
+    ``EMAIL_BATCH_SIZE``, instead of a fresh SMTP handshake per message. A
+    connection idle for longer than ``EMAIL_CONNECTION_MAX_AGE`` is replaced,
+    and a server-side disconnect is retried once on a new connection.
+    """
+
+    def __init__(self, batch_size=None, max_age=None):
+        self.batch_size = batch_size or EMAIL_BATCH_SIZE
+        self.max_age = max_age if max_age is not None else EMAIL_CONNECTION_MAX_AGE
+        self._connection = None
+        self._last_used = 0
+        self._lock = threading.Lock()
+
+    def get_connection(self):
+        if (
+            self._connection is not None
+            and time.monotonic() - self._last_used > self.max_age
+        ):
+            self.close()
+        if self._connection is None:
+            self._connection = get_connection(fail_silently=False)
+            self._connection.open()
+            record("connections")
+        self._last_used = time.monotonic()
+        return self._connection
+
+    def close(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                logger.debug("Ignoring error closing the mail connection")
+            self._connection = None
+
+    def send_message(self, message):
+        try:
+            return self.get_connection().send_messages([message]) or 0
+        except SMTPServerDisconnected:
+            self.close()
+            return self.get_connection().send_messages([message]) or 0
+
+    def send_batch(self, batch, delivered):
+        """
+        Send ``batch`` over the pooled connection, appending each message the
+        server accepts to ``delivered``. The backends hand messages to the
+        server one at a time anyway, so going message by message costs no
+        round trips and tells a failure part-way through a batch apart from
+        the messages already delivered.
+        """
+        for message in batch:
+            if self.send_message(message):
+                delivered.append(message)
+        return len(delivered)
+
+    def send(self, messages, on_sent=None):
+        """
+        Send ``messages``; returns how many the server accepted.
+        ``on_sent(messages)`` is called with the messages accepted in every
+        batch, also before a failure is raised, so a caller can retry just
+        the messages that were not delivered.
+        """
+        messages = list(messages)
+        sent = 0
+        with self._lock:
+            for start in range(0, len(messages), self.batch_size):
+                batch = messages[start : start + self.batch_size]
+                delivered = []
+                started = time.monotonic()
+                try:
+                    count = self.send_batch(batch, delivered)
+                except Exception:
+                    record("failures")
+                    self.close()
+                    raise
+                finally:
+                    if delivered and on_sent is not None:
+                        on_sent(delivered)
+                elapsed = time.monotonic() - started
+                sent += count
+                record("messages", count)
+                record("batches")
+                record("send_ms", int(elapsed * 1000))
+                logger.info(f"Sent {count} emails in {elapsed:.3f}s")
+        return sent
+
+
+dispatcher = EmailDispatcher()
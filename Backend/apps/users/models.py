@@ -1,8 +1,8 @@
-from profile import Profile
+import datetime
 
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
 from django.db import models
-from pyexpat import model
+from django.utils import timezone
 
 
 class UserManager(BaseUserManager):
@@ -127,6 +127,12 @@ class UserProfile(models.Model):
             return "No user associated"
 
 
+class ChatMassageQuerySet(models.QuerySet):
+    def with_profiles(self):
+        """Load both users and their profiles, as MassageSerializer renders them."""
+        return self.select_related("sender__userprofile", "receiver__userprofile")
+
+
 class ChatMassage(models.Model):
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name="sender")
     receiver = models.ForeignKey(
@@ -137,6 +143,8 @@ class ChatMassage(models.Model):
     is_read = models.BooleanField(default=False)
     date = models.DateTimeField(auto_now_add=True)
 
+    objects = ChatMassageQuerySet.as_manager()
+
     class Meta:
         ordering = ["-date"]
         verbose_name_plural = "Messages"
@@ -146,19 +154,52 @@ class ChatMassage(models.Model):
 
     @property
     def sender_profile(self):
-        sender_profile = UserProfile.objects.get(user=self.sender)
-        return sender_profile
+        return self.sender.userprofile
 
     @property
     def receiver_profile(self):
-        receiver_profile = UserProfile.objects.get(user=self.receiver)
-        return receiver_profile
+        return self.receiver.userprofile
 
 
 class Contact(models.Model):
     email = models.EmailField(unique=True, max_length=300)
     name = models.CharField(max_length=255)
     content = models.TextField()
+    created_at = models.DateTimeField(default=timezone.now)
+    # Set once the message went out in an admin digest (send_contact_digest)
+    notified_at = models.DateTimeField(null=True, blank=True, db_index=True)
 
     def __str__(self):
         return self.email
+
+
+class TaskLease(models.Model):
+    """
+    A named claim every process sees through the database, held until
+    ``expires_at``; e.g. the contact digest waiting to be sent.
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} until {self.expires_at}"
+
+    @classmethod
+    def acquire(cls, name, seconds):
+        """Claim ``name`` for ``seconds`` unless it is held; returns whether."""
+        now = timezone.now()
+        expires_at = now + datetime.timedelta(seconds=seconds)
+        _, created = cls.objects.get_or_create(
+            name=name, defaults={"expires_at": expires_at}
+        )
+        # An expired claim is taken over with one UPDATE, so only one wins
+        return created or bool(
+            cls.objects.filter(name=name, expires_at__lte=now).update(
+                expires_at=expires_at
+            )
+        )
+
+    @classmethod
+    def release(cls, name):
+        cls.objects.filter(name=name).update(expires_at=timezone.now())
@@ -1,5 +1,3 @@
-from profile import Profile
-
 from django.contrib.auth import authenticate
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.password_validation import validate_password
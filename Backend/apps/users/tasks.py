@@ -1,81 +1,116 @@
 import datetime
 import logging
-from io import BytesIO
+from smtplib import SMTPException
 
-import requests
 from apps.api.models import BlogPost
-from apps.api.serializers import BlogPostSerializer
+from apps.common.business_day import business_day
 from apps.common.models import Gallery, GalleryCategory, Images, Services
+from apps.common.renditions import generate_renditions
+from apps.group.exports import expire_exports, run_export
+from apps.group.imports import run_import
 from apps.group.models import Order, ReceptionOrder
+from apps.staff.payroll import month_period, run_payroll
+from celery.utils.time import get_exponential_backoff_interval
 from config.celery import app
+from django.apps import apps as django_apps
 from django.conf import settings
-from django.contrib.auth.tokens import default_token_generator
-from django.contrib.sites.models import Site
-from django.core.files import File
-from django.core.files.base import ContentFile
-from django.core.files.storage import default_storage
-from django.core.mail import EmailMessage
-from django.template.loader import render_to_string
-from django.utils.encoding import force_bytes
-from django.utils.http import urlsafe_base64_encode
+from django.contrib.auth import get_user_model
 from django.utils.timezone import now
-from PIL import Image
+
+from .mail import build_html_email, build_user_email, dispatcher, site_domain
+from .models import Contact, TaskLease
+from .utils import CONTACT_DIGEST_LEASE
 
 logger = logging.getLogger(__name__)
 
+# contact messages per digest email
+CONTACT_DIGEST_BATCH_SIZE = 50
+
+
+@app.task(bind=True, max_retries=5)
+def send_bulk_email_notification_task(
+    self, user_ids, email_subject, email_template, link=None
+):
+    """
+    One email per user (activation or reset) over the pooled connection. A
+    failed send is retried with backoff for the users not yet emailed only.
+    """
+    users = get_user_model().objects.filter(id__in=user_ids).order_by("pk")
+    domain = site_domain()
+    # message -> user, to tell who was emailed when a send fails
+    recipients = {
+        build_user_email(
+            user, email_subject, email_template, link, domain=domain
+        ): user.pk
+        for user in users.iterator()
+    }
+    delivered = set()
+
+    def on_sent(messages):
+        delivered.update(recipients[message] for message in messages)
 
-@app.task
-def send_email_notification_task(user_id, email_subject, email_template, link=None):
-    from django.contrib.auth import get_user_model
-
-    User = get_user_model()
-    user = User.objects.get(id=user_id)
-
-    # Get the current site and protocol
-    current_site = Site.objects.get_current()
-    domain = current_site.domain
-    protocol = "https"  # Adjust this as per your setup
-
-    # Generate the uid and token for user
-    uid = urlsafe_base64_encode(force_bytes(user.pk))
-    token = default_token_generator.make_token(user)
-
-    # Check if it's a password reset or activation email
-    if link is None:
-        # Activation email
-        activation_link = f"{protocol}://{domain}/users/activate/{uid}/{token}/"
-        email_message = render_to_string(
-            email_template,
+    try:
+        return dispatcher.send(recipients, on_sent=on_sent)
+    except (SMTPException, OSError) as e:
+        remaining = [pk for pk in recipients.values() if pk not in delivered]
+        raise self.retry(
+            args=(remaining, email_subject, email_template, link),
+            exc=e,
+            countdown=get_exponential_backoff_interval(
+                factor=1, retries=self.request.retries, maximum=600, full_jitter=True
+            ),
+        )
+
+
+@app.task(
+    autoretry_for=(SMTPException, OSError),
+    retry_backoff=True,
+    retry_backoff_max=600,
+    retry_jitter=True,
+    max_retries=5,
+)
+def send_contact_digest():
+    """
+    Email the admin every contact message not yet reported, in digests of
+    ``CONTACT_DIGEST_BATCH_SIZE`` sent over the pooled mail connection. Each
+    digest's messages are marked once it is sent, so a failed attempt is
+    retried with backoff for the unreported messages only.
+    """
+    # Messages arriving from here on schedule the next digest.
+    TaskLease.release(CONTACT_DIGEST_LEASE)
+    contacts = list(
+        Contact.objects.filter(notified_at__isnull=True).order_by("created_at", "id")
+    )
+    if not contacts:
+        return 0
+
+    domain = site_domain()
+    batch_size = CONTACT_DIGEST_BATCH_SIZE
+    batches = [
+        contacts[start : start + batch_size]
+        for start in range(0, len(contacts), batch_size)
+    ]
+    for batch in batches:
+        message = build_html_email(
+            (
+                "New Contact Message"
+                if len(batch) == 1
+                else f"{len(batch)} New Contact Messages"
+            ),
+            "account/email/contact_digest.html",
             {
-                "user": user,
+                "contacts": batch,
                 "domain": domain,
-                "uid": uid,
-                "token": token,
-                "activation_link": activation_link,
                 "current_year": datetime.datetime.now().year,
             },
+            [settings.ADMIN_EMAIL],
         )
-    else:
-        # Password reset email
-        email_message = render_to_string(
-            email_template,
-            {
-                "user": user,
-                "domain": domain,
-                "uid": uid,
-                "token": token,
-                "link": link,
-            },
+        dispatcher.send([message])
+        Contact.objects.filter(pk__in=[contact.pk for contact in batch]).update(
+            notified_at=now()
         )
-
-    # Prepare and send email
-    email = EmailMessage(
-        subject=email_subject,
-        body=email_message,
-        to=[user.email],
-    )
-    email.content_subtype = "html"
-    email.send()
+    logger.info(f"Sent {len(contacts)} contact messages in {len(batches)} emails")
+    return len(contacts)
 
 
 @app.task
@@ -249,37 +284,25 @@ def delete_image(image_id):
 
 @app.task
 def create_or_update_blog_post(data):
-    # Get the image URL from the data
-    image_url = data.get("image")
+    # The image is passed as a storage name and reused as-is; the post's own
+    # file is never downloaded over HTTP and stored a second time.
+    from apps.api.serializers import BlogPostSerializer
 
-    if image_url:
-        # If the image URL is relative, make it absolute
-        if image_url.startswith("/"):
-            image_url = f"{settings.BASE_URL}{image_url}"
+    image_name = data.pop("image", None)
+    blog_post = BlogPost.objects.filter(id=data.get("id")).first()
 
-        try:
-            # Download the image using requests
-            response = requests.get(image_url)
-            response.raise_for_status()  # Raise exception for 4xx/5xx responses
-
-            # Process the image (save it as a file object)
-            image_file = BytesIO(response.content)
-            image_file.name = "image.jpg"  # Set the file name for the image
-            data["image"] = File(
-                image_file, name="image.jpg"
-            )  # Attach the file to the data
-
-        except requests.exceptions.RequestException as e:
-            raise ValueError(f"Error downloading image: {e}")
-
-    blog_post_data = BlogPostSerializer(data=data)
-
-    if blog_post_data.is_valid():
-        blog_post = blog_post_data.save()
-        return blog_post.id
-    else:
+    blog_post_data = BlogPostSerializer(
+        blog_post, data=data, partial=blog_post is not None
+    )
+    if not blog_post_data.is_valid():
         raise ValueError(f"Invalid data: {blog_post_data.errors}")
 
+    blog_post = blog_post_data.save()
+    if image_name and blog_post.image.name != image_name:
+        blog_post.image.name = image_name
+        blog_post.save(update_fields=["image"])
+    return blog_post.id
+
 
 @app.task
 def delete_blog_post(blog_post_id):
@@ -292,21 +315,45 @@ def delete_blog_post(blog_post_id):
         return f"Blog post with ID {blog_post_id} does not exist."
 
 
-@app.task
-def process_uploaded_image(image_path):
+@app.task(bind=True, max_retries=3, default_retry_delay=30)
+def process_uploaded_image(self, image_name):
+    """Generate thumbnail/medium/large WebP and JPEG renditions of a stored image."""
+    from apps.common.signals import renditions_built
+
     try:
-        image = Image.open(image_path)
-        image = image.resize((800, 800))
-        buffer = BytesIO()
-        image.save(buffer, format="PNG")
-        buffer.seek(0)
-        file_name = image_path.split("/")[-1]
-        new_image_path = f"resized_images/{file_name}"
-        default_storage.save(new_image_path, ContentFile(buffer.read()))
+        written = generate_renditions(image_name)
+        logger.info(f"Generated {len(written)} renditions for {image_name}")
+        renditions_built(image_name)
+        return written
+    except FileNotFoundError:
+        logger.warning(f"Image {image_name} no longer exists, skipping renditions.")
+    except ValueError as e:
+        logger.warning(f"Cannot build renditions for {image_name}: {e}")
+    except OSError as e:
+        raise self.retry(exc=e)
+
+
+@app.task(bind=True, max_retries=3, default_retry_delay=30)
+def process_rich_text_images(self, model_label, pk):
+    """
+    Build renditions for CKEditor images embedded in a rich text description,
+    then re-render it so the cached HTML points at them.
+    """
+    model = django_apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return
+    stored_html = instance.description_html
+    for name in instance.render_description().missing_renditions:
+        try:
+            generate_renditions(name)
+        except (FileNotFoundError, ValueError) as e:
+            logger.warning(f"Cannot build renditions for {name}: {e}")
+        except OSError as e:
+            raise self.retry(exc=e)
 
-        print(f"Processed and saved image to {new_image_path}")
-    except Exception as e:
-        print(f"Error processing image: {e}")
+    if instance.render_description().html != stored_html:
+        instance.save(update_fields=["description"])
 
 
 @app.task
@@ -362,3 +409,42 @@ def log_delete_gallery_task(gallery_id):
         print(f"Gallery deleted: {gallery.id} at {now()}")
     except Gallery.DoesNotExist:
         print(f"Gallery with ID {gallery_id} does not exist")
+
+
+@app.task
+def run_monthly_payroll(year=None, month=None):
+    """Month-end payroll for all staff; defaults to the month that just ended."""
+    if year is None or month is None:
+        last_month = business_day().replace(day=1) - datetime.timedelta(days=1)
+        year, month = last_month.year, last_month.month
+    run = run_payroll(*month_period(year, month))
+    logger.info(f"{run}: {run.staff_count} staff, {run.total_amount} total")
+    return run.pk
+
+
+@app.task
+def export_orders(job_id):
+    """Write the file of an ``ExportJob`` (see ``apps.group.exports``)."""
+    job = run_export(job_id)
+    if job is not None:
+        logger.info(f"{job}: {job.exported_rows} rows written to {job.file.name}")
+    return job_id
+
+
+@app.task
+def expire_export_jobs():
+    """Remove export files past their expiry; run hourly by celery beat."""
+    count = expire_exports()
+    logger.info(f"Expired {count} order exports")
+    return count
+
+
+@app.task
+def import_orders(job_id):
+    """Import the sheet of an ``ImportJob`` (see ``apps.group.imports``)."""
+    job = run_import(job_id)
+    if job is not None:
+        logger.info(
+            f"{job}: {job.imported_rows} orders imported, {job.failed_rows} rejected"
+        )
+    return job_id
@@ -1,6 +1,35 @@
-from django.test import SimpleTestCase
+import time
+from smtplib import SMTPException
+from unittest import mock
+
+from django.conf import settings
+from django.core import mail
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.mail.backends import locmem
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
 
 from . import calculator
+from .models import Contact
+from .mail import EmailDispatcher, dispatcher, email_metrics
+from .tasks import send_bulk_email_notification_task, send_contact_digest
+
+
+def fail_nth_send(n):
+    """Make the ``n``-th message sent fail, with the ones before it delivered."""
+    send_messages = locmem.EmailBackend.send_messages
+    calls = iter(range(1, 1000))
+
+    def send(backend, messages):
+        if next(calls) == n:
+            raise SMTPException("Connection lost")
+        return send_messages(backend, messages)
+
+    return mock.patch.object(
+        locmem.EmailBackend, "send_messages", autospec=True, side_effect=send
+    )
 
 
 class TestCalculator(SimpleTestCase):
@@ -13,3 +42,210 @@ class TestCalculator(SimpleTestCase):
         """subtract tow number"""
         result = calculator.subtract(30, 10)
         self.assertEqual(result, 20)
+
+
+class TestBeatSchedule(SimpleTestCase):
+    def test_scheduled_tasks_exist(self):
+        """every celery beat entry names a registered task"""
+        from config.celery import app
+
+        schedule = settings.CELERY_BEAT_SCHEDULE
+        expire = schedule["expire-export-jobs"]
+        self.assertEqual(expire["task"], "apps.users.tasks.expire_export_jobs")
+        for entry in schedule.values():
+            self.assertIn(entry["task"], app.tasks)
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    ADMIN_EMAIL="admin@example.com",
+)
+class TestContactDigest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def submit(self, index):
+        return self.client.post(
+            reverse("contact-list"),
+            {"email": f"c{index}@example.com", "name": f"C{index}", "content": "Hi"},
+        )
+
+    @mock.patch("apps.users.tasks.send_contact_digest.apply_async")
+    def test_request_does_not_wait_for_smtp(self, apply_async):
+        """a slow mail server never slows down the contact form"""
+        slow_smtp = mock.patch.object(
+            locmem.EmailBackend, "send_messages", side_effect=lambda m: time.sleep(2)
+        )
+        with slow_smtp, self.captureOnCommitCallbacks(execute=True):
+            started = time.monotonic()
+            for index in range(3):
+                self.assertEqual(self.submit(index).status_code, 201)
+            elapsed = time.monotonic() - started
+
+        self.assertLess(elapsed, 1)
+        self.assertEqual(mail.outbox, [])
+        apply_async.assert_called_once_with(countdown=60)  # burst is debounced
+
+    @mock.patch("apps.users.tasks.send_contact_digest.apply_async")
+    def test_one_digest_is_queued_across_processes(self, apply_async):
+        """the debounce does not depend on a cache the processes share"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.submit(0)
+            cache.clear()  # another process, with its own cache
+            self.submit(1)
+        apply_async.assert_called_once()
+
+        send_contact_digest()  # releases the claim for the next burst
+        with self.captureOnCommitCallbacks(execute=True):
+            self.submit(2)
+        self.assertEqual(apply_async.call_count, 2)
+
+    def test_burst_is_sent_as_one_digest(self):
+        for index in range(3):
+            Contact.objects.create(
+                email=f"c{index}@example.com", name=f"C{index}", content="Hi"
+            )
+
+        self.assertEqual(send_contact_digest(), 3)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["admin@example.com"])
+        self.assertIn("c2@example.com", mail.outbox[0].body)
+        self.assertFalse(Contact.objects.filter(notified_at__isnull=True).exists())
+        self.assertEqual(send_contact_digest(), 0)  # nothing is sent twice
+
+    @mock.patch("apps.users.tasks.CONTACT_DIGEST_BATCH_SIZE", 2)
+    def test_failed_digest_resends_only_unreported_messages(self):
+        for index in range(5):
+            Contact.objects.create(
+                email=f"c{index}@example.com", name=f"C{index}", content="Hi"
+            )
+
+        with fail_nth_send(2), self.assertRaises(SMTPException):
+            send_contact_digest()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(Contact.objects.filter(notified_at__isnull=True).count(), 3)
+
+        self.assertEqual(send_contact_digest(), 3)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertIn("c4@example.com", mail.outbox[2].body)
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class TestEmailDispatcher(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_messages_are_batched_over_one_connection(self):
+        dispatcher = EmailDispatcher(batch_size=2)
+        messages = [
+            mail.EmailMessage("Hi", "Body", to=[f"u{n}@example.com"]) for n in range(5)
+        ]
+
+        with mock.patch(
+            "apps.users.mail.get_connection", wraps=mail.get_connection
+        ) as connections:
+            self.assertEqual(dispatcher.send(messages), 5)
+            dispatcher.send(messages[:1])  # the pooled connection is reused
+
+        connections.assert_called_once()
+        self.assertEqual(len(mail.outbox), 6)
+        metrics = email_metrics()
+        self.assertEqual((metrics["messages"], metrics["batches"]), (6, 4))
+
+        client = APIClient()
+        url = reverse("email-metrics")
+        user = get_user_model().objects.create_user(
+            email="admin@example.com", password="pass", first_name="A", last_name="B"
+        )
+        client.force_authenticate(user)
+        self.assertEqual(client.get(url).status_code, 403)
+        user.is_staff = True
+        user.save()
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["messages"], 6)
+
+    def test_idle_connection_is_replaced(self):
+        dispatcher = EmailDispatcher(max_age=0)
+        with mock.patch(
+            "apps.users.mail.get_connection", wraps=mail.get_connection
+        ) as connections:
+            dispatcher.send([mail.EmailMessage("Hi", "Body", to=["a@example.com"])])
+            time.sleep(0.01)
+            dispatcher.send([mail.EmailMessage("Hi", "Body", to=["b@example.com"])])
+        self.assertEqual(connections.call_count, 2)
+
+    def test_bulk_activation_wave(self):
+        users = [
+            get_user_model().objects.create_user(
+                email=f"u{n}@example.com",
+                password="pass",
+                first_name="U",
+                last_name=str(n),
+            )
+            for n in range(3)
+        ]
+
+        sent = send_bulk_email_notification_task(
+            [user.id for user in users],
+            "Activate Your Account",
+            "account/email/activation_email.html",
+            "https://example.com/activate/",
+        )
+
+        self.assertEqual(sent, 3)
+        self.assertCountEqual(
+            [message.to[0] for message in mail.outbox], [u.email for u in users]
+        )
+        self.assertIn('href="https://example.com/activate/"', mail.outbox[0].body)
+
+    def test_registration_email_goes_through_the_dispatcher(self):
+        data = {
+            "first_name": "New",
+            "last_name": "User",
+            "email": "new@example.com",
+            "role": get_user_model().ROLE_CHOICES[0][0],
+            "password": "Pass12345!",
+            "password_confirm": "Pass12345!",
+        }
+        task = send_bulk_email_notification_task
+        # Run the task in-process when it is queued after the commit
+        with mock.patch.object(
+            task, "delay", side_effect=task
+        ) as delay, self.captureOnCommitCallbacks(execute=True):
+            response = APIClient().post("/users/create/", data)
+
+        self.assertEqual(response.status_code, 201)
+        user = get_user_model().objects.get(email="new@example.com")
+        self.assertEqual(delay.call_args.args[0], [user.id])
+        self.assertEqual(mail.outbox[0].to, ["new@example.com"])
+
+    def test_bulk_retry_skips_delivered_recipients(self):
+        users = [
+            get_user_model().objects.create_user(
+                email=f"u{n}@example.com",
+                password="pass",
+                first_name="U",
+                last_name=str(n),
+            )
+            for n in range(5)
+        ]
+
+        # The fourth message fails after the third of its batch went out;
+        # eager retries run at once, with the arguments they were given
+        with mock.patch.object(dispatcher, "batch_size", 2), fail_nth_send(4):
+            send_bulk_email_notification_task.apply(
+                (
+                    [user.id for user in users],
+                    "Reset",
+                    "account/email/reset_password_email.html",
+                    "x",
+                )
+            )
+
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            [user.email for user in users],
+        )
@@ -5,6 +5,7 @@ from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
     CreateUserView,
     DeleteUserView,
+    EmailMetricsView,
     FalseMessageReadStatusView,
     GetMassages,
     MessageInBox,
@@ -31,6 +32,8 @@ router.register("users", UserViewSet, basename="user")
 router.register('contact', ContactViewSet)
 router.register('free-status', UserFreeStatusViewSet, basename='user-free-status')
 urlpatterns = [
+    # Before the email route, which would otherwise match ids as well
+    path("profile/<int:pk>/", ProfileDetail.as_view()),
     path(
         "profile/<str:user_email>/",
         ProfilePicUpdateView.as_view(),
@@ -45,6 +48,7 @@ urlpatterns = [
         name="create_user",
     ),
     path("api/roles/", RoleChoicesView.as_view()),
+    path("api/email-metrics/", EmailMetricsView.as_view(), name="email-metrics"),
     path("profiles/", UserProfileView.as_view(), name="user-profile"),
     path("create/", CreateUserView.as_view(), name="create_user"),
     path("activate/<uidb64>/<token>/", activate_account, name="activate_account"),
@@ -58,7 +62,6 @@ urlpatterns = [
     path("message/<user_id>/", MessageInBox.as_view()),
     path("get-message/<sender_id>/<receiver_id>/", GetMassages.as_view()),
     path("send-message/", SendMessage.as_view()),
-    path("profile/<int:pk>/", ProfileDetail.as_view()),
     path("message/sender/<int:sender_id>/", SenderMessage.as_view(), name="sender"),
     path(
         "update-message-read-status/",
@@ -1,6 +1,7 @@
 import datetime
 import random
 
+from apps.common.instrumentation import InstrumentedViewMixin
 from apps.users.models import ChatMassage, UserProfile
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
@@ -15,7 +16,12 @@ from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 from rest_framework import generics, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import NotFound, PermissionDenied
-from rest_framework.permissions import AllowAny, BasePermission, IsAuthenticated
+from rest_framework.permissions import (
+    AllowAny,
+    BasePermission,
+    IsAdminUser,
+    IsAuthenticated,
+)
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
@@ -32,8 +38,9 @@ from .serializers import (
     ContactSerializer,
     UserFreeStatus
 )
-from .tasks import send_email_notification_task
-from .utils import send_admin_notification, send_email_notification
+from .mail import email_metrics
+from .tasks import send_bulk_email_notification_task
+from .utils import queue_contact_digest, send_email_notification
 
 # Get the custom User model
 User = get_user_model()
@@ -155,9 +162,11 @@ class CreateUserView(generics.CreateAPIView):
                         "account/email/activation_email.html"  # Path to the template
                     )
 
-                    # Send the email
-                    send_email_notification_task.delay(
-                        user.id, email_subject, email_template, activation_link
+                    # Send the email once the user is committed
+                    transaction.on_commit(
+                        lambda: send_bulk_email_notification_task.delay(
+                            [user.id], email_subject, email_template, activation_link
+                        )
                     )
                     return Response(
                         {
@@ -203,6 +212,15 @@ def activate_account(request, uidb64, token):
         return HttpResponse("Invalid activation link", status=400)
 
 
+class EmailMetricsView(APIView):
+    """Email totals and throughput of every process sharing the cache."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(email_metrics())
+
+
 class RoleChoicesView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -364,8 +382,8 @@ class PasswordRegisterEmailVerifyApiView(generics.RetrieveAPIView):
             email_template = "account/email/reset_password_email.html"
 
             # Send the reset password email
-            send_email_notification_task.delay(
-                user.id, email_subject, email_template, link
+            send_bulk_email_notification_task.delay(
+                [user.id], email_subject, email_template, link
             )
 
         return user
@@ -428,7 +446,7 @@ class PasswordChangeApiView(generics.CreateAPIView):
             )
 
 
-class MessageInBox(generics.ListAPIView):
+class MessageInBox(InstrumentedViewMixin, generics.ListAPIView):
     serializer_class = MassageSerializer
 
     def get_queryset(self):
@@ -439,12 +457,14 @@ class MessageInBox(generics.ListAPIView):
         )
         latest_messages_subquery = latest_messages.values("id")[:1]
 
-        return ChatMassage.objects.filter(
-            id__in=Subquery(latest_messages_subquery)
-        ).order_by("-id")
+        return (
+            ChatMassage.objects.filter(id__in=Subquery(latest_messages_subquery))
+            .with_profiles()
+            .order_by("-id")
+        )
 
 
-class SenderMessage(generics.ListAPIView):
+class SenderMessage(InstrumentedViewMixin, generics.ListAPIView):
 
     queryset = ChatMassage.objects.all()  # Default queryset
     serializer_class = MassageSerializer
@@ -466,12 +486,14 @@ class SenderMessage(generics.ListAPIView):
         )
 
         # Now filter the original messages by the latest message IDs
-        return ChatMassage.objects.filter(
-            sender=sender_id, id__in=latest_message_ids
-        ).order_by("-id")
+        return (
+            ChatMassage.objects.filter(sender=sender_id, id__in=latest_message_ids)
+            .with_profiles()
+            .order_by("-id")
+        )
 
 
-class GetMassages(generics.ListAPIView):
+class GetMassages(InstrumentedViewMixin, generics.ListAPIView):
     serializer_class = MassageSerializer
     permission_classes = [AllowAny]
 
@@ -480,7 +502,7 @@ class GetMassages(generics.ListAPIView):
         receiver_id = self.kwargs["receiver_id"]
         message = ChatMassage.objects.filter(
             sender__in=[sender_id, receiver_id], receiver__in=[sender_id, receiver_id]
-        )
+        ).with_profiles()
         return message
 
 
@@ -491,7 +513,7 @@ class SendMessage(generics.CreateAPIView):
 
     def get(self, request, *args, **kwargs):
 
-        messages = ChatMassage.objects.all()  # Assuming the model is 'Message'
+        messages = ChatMassage.objects.with_profiles()
         serializer = MassageSerializer(messages, many=True)  # Serializing the messages
         return Response(serializer.data)
 
@@ -547,7 +569,7 @@ class FalseMessageReadStatusView(APIView):
 
         unread_messages = ChatMassage.objects.filter(
             receiver_id=receiver_id, is_read=False
-        )
+        ).with_profiles()
 
         if not unread_messages.exists():
             return Response(
@@ -569,16 +591,10 @@ class ContactViewSet(viewsets.ModelViewSet):
     serializer_class = ContactSerializer
     permission_classes = [AllowAny]
 
-    def create(self, request, *args, **kwargs):
-        response = super().create(request, *args, **kwargs)
-        contact = Contact.objects.get(id=response.data['id'])
-
-        # Send the email notification to the admin
-        email_subject = "New Contact Message"
-        email_template = 'account/email/contact_notification.html'  
-        send_admin_notification(request, contact, email_subject, email_template)
-
-        return response
+    def perform_create(self, serializer):
+        serializer.save()
+        # The admin is emailed by a background digest, never inside the request
+        transaction.on_commit(queue_contact_digest)
 
 
 class UserFreeStatusViewSet(viewsets.ModelViewSet):
@@ -0,0 +1,13 @@
+"""
+Layered settings: ``base`` holds everything shared, ``development`` and
+``production`` adjust it. ``config.settings`` loads the profile named by
+DJANGO_ENV (development when unset); a profile can also be selected directly
+with DJANGO_SETTINGS_MODULE=config.settings.production.
+"""
+
+from decouple import config
+
+if config("DJANGO_ENV", default="development") == "production":
+    from .production import *  # noqa: F401,F403
+else:
+    from .development import *  # noqa: F401,F403
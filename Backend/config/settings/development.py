@@ -0,0 +1,4 @@
+from .base import *  # noqa: F401,F403
+from .base import config
+
+DEBUG = config("DEBUG", default=True, cast=bool)
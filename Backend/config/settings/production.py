@@ -0,0 +1,22 @@
+from decouple import Csv
+
+from .base import *  # noqa: F401,F403
+from .base import cache_config, config, database_config
+
+DEBUG = False
+
+ALLOWED_HOSTS = config("ALLOWED_HOSTS", cast=Csv())
+
+# Keep connections open between requests (checked before reuse) instead of
+# connecting, and on SQLite re-applying the pragmas, on every request.
+DATABASES = {
+    "default": database_config(
+        config("DATABASE_URL", default=""),
+        conn_max_age=config("CONN_MAX_AGE", default=600, cast=int),
+    )
+}
+
+# Shared by every worker process; Redis already runs for Celery.
+CACHES = {
+    "default": cache_config(config("CACHE_URL", default="redis://localhost:6379/1"))
+}
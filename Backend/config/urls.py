@@ -4,7 +4,6 @@ from django.contrib import admin
 from django.urls import include, path
 from drf_yasg import openapi
 from drf_yasg.views import get_schema_view
-from networkx import pappus_graph
 from rest_framework import permissions
 
 schema_view = get_schema_view(